@@ -0,0 +1,84 @@
+"""
+Speed / recall trade-off of detecting on a downscaled copy.
+
+Runs FaceBlurrer.detect_scored_boxes on the sample images in Results/ at
+several detection resolutions. Recall is measured against the
+full-resolution boxes of the same mode (IoU >= 0.3 counts as found).
+
+    python benchmarks/bench_detect_resolution.py [--group] [images...]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from face_blur_nms import iou_matrix  # noqa: E402
+from face_blur_core import FaceBlurrer, detection_scale  # noqa: E402
+
+SIZES = [None, 1920, 1280, 960, 640, 'auto']
+
+
+def sample_images():
+    paths = sorted(glob.glob(os.path.join(ROOT, 'Results', '*')))
+    return [p for p in paths
+            if os.path.splitext(p)[1].lower() in ('.png', '.jpg', '.jpeg')
+            and not os.path.splitext(p)[0].endswith('_blurred')]
+
+
+def recall(reference, found, iou_thresh=0.3):
+    if len(reference) == 0:
+        return 1.0
+    if len(found) == 0:
+        return 0.0
+    return float((iou_matrix(reference, found).max(axis=1) >= iou_thresh).mean())
+
+
+def _time(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000, result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('images', nargs='*')
+    ap.add_argument('--group', action='store_true', help='Group Photo Mode')
+    ap.add_argument('--repeats', type=int, default=3)
+    args = ap.parse_args(argv)
+
+    images = args.images or sample_images()
+    print(f"{'image':24s} {'detect size':>11s} {'scale':>6s} {'ms':>8s} {'speedup':>8s} {'boxes':>6s} {'recall':>7s}")
+    for path in images:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            continue
+        ih, iw = img.shape[:2]
+        reference = None
+        base_ms = None
+        for size in SIZES:
+            blurrer = FaceBlurrer(0.5, 1, group_mode=args.group, detect_size=size)
+            try:
+                ms, (boxes, _) = _time(lambda: blurrer.detect_scored_boxes(img), args.repeats)
+            finally:
+                blurrer.cleanup()
+            if reference is None:
+                reference, base_ms = boxes, ms
+            scale = detection_scale(ih, iw, size)
+            print(f"{os.path.basename(path)[:24]:24s} {str(size or 'full'):>11s} {scale:6.2f} {ms:8.1f} "
+                  f"{base_ms / ms:7.1f}x {len(boxes):6d} {recall(reference, boxes):7.2f}")
+
+
+if __name__ == '__main__':
+    main()
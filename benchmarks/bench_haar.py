@@ -0,0 +1,123 @@
+"""
+Micro-benchmark: ROI-restricted Haar fallback vs the old full-frame sweep.
+
+Stills: time per image and small-face recall against the full sweep.
+Video: a slow pan over each image, where the fallback only re-searches
+cells that changed between full sweeps.
+
+    python benchmarks/bench_haar.py
+    python benchmarks/bench_haar.py photo.jpg --upscale 2
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from face_blur_haar import HaarFallback  # noqa: E402
+from face_blur_nms import iou_matrix  # noqa: E402
+
+
+def load_cascade():
+    path = os.path.join(ROOT, "haarcascade_frontalface_default.xml")
+    cascade = cv2.CascadeClassifier(path)
+    if cascade.empty():
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    return cascade
+
+
+def min_side_for(gray):
+    # Same rule as FaceBlurrer._collect_haar_boxes
+    return max(20, int(min(gray.shape[:2]) * 0.02))
+
+
+def legacy_sweep(cascade, gray):
+    m = min_side_for(gray)
+    faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(m, m))
+    return [tuple(int(v) for v in f) for f in faces]
+
+
+def recall(reference, found, iou=0.3):
+    if not reference:
+        return 1.0
+    if not found:
+        return 0.0
+    m = iou_matrix(np.asarray(reference, dtype=np.float64), np.asarray(found, dtype=np.float64))
+    return float((m.max(axis=1) >= iou).mean())
+
+
+def _time(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        out = fn()
+    return (time.perf_counter() - start) * 1000 / repeats, out
+
+
+def bench_still(cascade, gray, repeats):
+    legacy_ms, legacy = _time(lambda: legacy_sweep(cascade, gray), repeats)
+    fallback = HaarFallback(cascade)
+    max_px = int(min(gray.shape[:2]) * fallback.max_face)
+    small = [f for f in legacy if max(f[2:]) <= max_px]
+    # MediaPipe stand-in: pretend it found the large faces
+    covered = [f for f in legacy if max(f[2:]) > max_px]
+    roi_ms, roi = _time(lambda: fallback.detect(gray, covered, min_side_for(gray)), repeats)
+    return legacy_ms, roi_ms, recall(small, roi), len(small)
+
+
+def bench_video(cascade, gray, frames=30, every=5, pan=2):
+    h, w = gray.shape[:2]
+    crop_w = w - pan * frames
+    clips = [np.ascontiguousarray(gray[:, i * pan:i * pan + crop_w]) for i in range(frames)]
+    start = time.perf_counter()
+    for clip in clips:
+        legacy_sweep(cascade, clip)
+    legacy_ms = (time.perf_counter() - start) * 1000 / frames
+    fallback = HaarFallback(cascade, every=every)
+    start = time.perf_counter()
+    for clip in clips:
+        fallback.detect(clip, (), min_side_for(clip))
+    roi_ms = (time.perf_counter() - start) * 1000 / frames
+    return legacy_ms, roi_ms
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("images", nargs="*", help="Images (default: Results/ samples)")
+    p.add_argument("--upscale", type=float, default=1.0, help="Resize inputs first, e.g. 2 for 4K-like frames")
+    p.add_argument("--repeats", type=int, default=3)
+    args = p.parse_args(argv)
+
+    paths = args.images or sorted(
+        f for f in glob.glob(os.path.join(ROOT, "Results", "*"))
+        if f.lower().endswith((".png", ".jpg", ".jpeg")) and "_blurred" not in f
+    )
+    cascade = load_cascade()
+    if cascade.empty():
+        print("haarcascade_frontalface_default.xml not found", file=sys.stderr)
+        return 2
+    print(f"{'image':24s} {'size':>11s} {'legacy ms':>10s} {'roi ms':>8s} {'recall':>7s} "
+          f"{'video legacy':>13s} {'video roi':>10s}")
+    for path in paths:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            continue
+        if args.upscale != 1.0:
+            img = cv2.resize(img, None, fx=args.upscale, fy=args.upscale, interpolation=cv2.INTER_CUBIC)
+        legacy_ms, roi_ms, rec, n_small = bench_still(cascade, img, args.repeats)
+        v_legacy, v_roi = bench_video(cascade, img)
+        size = f"{img.shape[1]}x{img.shape[0]}"
+        print(f"{os.path.basename(path)[:24]:24s} {size:>11s} {legacy_ms:10.1f} {roi_ms:8.1f} "
+              f"{rec:6.0%}{'*' if n_small == 0 else ' '} {v_legacy:13.1f} {v_roi:10.1f}")
+    print("recall: share of the full sweep's small faces the ROI pass still finds (* = none to find)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Allocation / RSS benchmark: pooled frame buffers vs per-frame allocation.
+
+Runs a synthetic video through the real decode -> blur -> encode loop
+(FramePipeline, the blur engines, a raw-byte sink standing in for
+ffmpeg) with faces drifting across the frame:
+
+- allocation: transient bytes allocated per frame, traced with tracemalloc
+- RSS: resident memory sampled every video-minute over a long run (an
+  hour of 30 fps footage by default) with the buffer pool on; frames
+  the pool adds (at most the pipeline depth) are reported separately
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --minutes 5 --size 3840x2160 --engine pixelate
+
+Exits with status 1 when RSS, pool frames excluded, grows more than
+--max-growth MB after the first video-minute.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from face_blur_buffers import FramePool, ScratchBuffers  # noqa: E402
+from face_blur_kernels import BLUR_ENGINES, DEFAULT_BLUR_ENGINE, get_blur_engine  # noqa: E402
+from face_blur_pipeline import FramePipeline  # noqa: E402
+from face_blur_core import blur_boxes  # noqa: E402
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+
+class SyntheticVideo:
+    """cv2.VideoCapture stand-in: read(frame=None) copies one of a few base frames."""
+
+    def __init__(self, width, height, frames, bases=4):
+        rng = np.random.default_rng(0)
+        self.shape = (height, width, 3)
+        self.bases = [rng.integers(0, 256, self.shape, dtype=np.uint8) for _ in range(bases)]
+        self.frames = frames
+        self.pos = 0
+
+    def read(self, frame=None):
+        if self.pos >= self.frames:
+            return False, None
+        if frame is None:
+            frame = np.empty(self.shape, np.uint8)
+        np.copyto(frame, self.bases[self.pos % len(self.bases)])
+        self.pos += 1
+        return True, frame
+
+
+def moving_boxes(idx, width, height, faces):
+    # Faces drift and breathe in size, so per-box scratch requests vary
+    boxes = []
+    for i in range(faces):
+        side = int(min(width, height) * (0.08 + 0.04 * ((idx // 7 + i) % 5)))
+        x = (idx * 3 + i * width // faces) % max(1, width - side)
+        y = (idx * 2 + i * 97) % max(1, height - side)
+        boxes.append((x, y, side, side))
+    return boxes
+
+
+def make_loop(video, engine, faces, pooled, sink):
+    h, w = video.shape[:2]
+    blur = get_blur_engine(engine)
+    scratch = ScratchBuffers() if pooled else None
+    pool = FramePool(video.shape) if pooled else None
+    counter = [0]
+
+    def process(frame):
+        boxes = moving_boxes(counter[0], w, h, faces)
+        counter[0] += 1
+        return blur_boxes(frame, boxes, blur, scratch=scratch), boxes
+
+    def write(frame):
+        sink.write(frame.data)
+
+    read = video.read
+    if pool is not None:
+        read, write = pool.reader(read), pool.writer(write)
+    return read, process, write, pool
+
+
+def bench_allocations(args, size, pooled, sink):
+    video = SyntheticVideo(*size, frames=args.alloc_frames)
+    read, process, write, pool = make_loop(video, args.engine, args.faces, pooled, sink)
+    # Warm-up: the pool and scratch arenas reach their working size
+    for _ in range(10):
+        ok, frame = read()
+        write(process(frame)[0])
+    tracemalloc.start()
+    transient = 0
+    frames = 0
+    try:
+        while True:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            ok, frame = read()
+            if not ok:
+                break
+            write(process(frame)[0])
+            transient += tracemalloc.get_traced_memory()[1] - before
+            frames += 1
+    finally:
+        tracemalloc.stop()
+    return transient / max(1, frames), pool.allocated if pool is not None else None
+
+
+def bench_rss(args, size, sink):
+    total = int(args.minutes * 60 * args.fps)
+    video = SyntheticVideo(*size, frames=total)
+    read, process, write, pool = make_loop(video, args.engine, args.faces, True, sink)
+    per_minute = int(60 * args.fps)
+    samples = []
+
+    def on_frame(idx, frame, boxes):
+        if idx % per_minute == 0:
+            samples.append((idx / per_minute, rss_mb(), pool.allocated))
+
+    start = time.perf_counter()
+    FramePipeline(read, process, write, on_frame=on_frame).run()
+    samples.append((total / per_minute, rss_mb(), pool.allocated))
+    return samples, total / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--size", default="1920x1080", help="Frame size WxH")
+    p.add_argument("--faces", type=int, default=4)
+    p.add_argument("--engine", default=DEFAULT_BLUR_ENGINE, choices=sorted(BLUR_ENGINES))
+    p.add_argument("--alloc-frames", type=int, default=200, help="Frames traced per allocation run")
+    p.add_argument("--minutes", type=float, default=60, help="Video length of the RSS run (0 skips it)")
+    p.add_argument("--fps", type=float, default=30)
+    p.add_argument("--max-growth", type=float, default=8.0, help="Allowed RSS growth (MB) after minute one")
+    args = p.parse_args(argv)
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    # One worker thread, so the traced numbers are the loop's own
+    cv2.setNumThreads(1)
+
+    frame_mb = size[0] * size[1] * 3 / 1e6
+    print(f"{args.size} ({frame_mb:.1f} MB/frame), {args.faces} faces, engine {args.engine}")
+    with open(os.devnull, "wb") as sink:
+        for pooled in (False, True):
+            per_frame, allocated = bench_allocations(args, size, pooled, sink)
+            label = "pooled" if pooled else "per-frame"
+            extra = f", {allocated} frames in pool" if pooled else ""
+            print(f"{label:10s} transient allocation {per_frame / 1e6:8.3f} MB/frame{extra}")
+
+        if args.minutes <= 0:
+            return 0
+        print(f"RSS over {args.minutes:g} video-minutes at {args.fps:g} fps (pooled):")
+        samples, fps = bench_rss(args, size, sink)
+    for minute, mb, allocated in samples:
+        print(f"  minute {minute:6.1f}  {mb:8.1f} MB  {allocated:3d} frames in pool")
+    # The pool may still add a frame when the queues briefly fill up (bounded by
+    # the pipeline depth); growth beyond that would be a leak
+    _, base_mb, base_frames = samples[1] if len(samples) > 2 else samples[0]
+    growth = max(mb - (n - base_frames) * frame_mb for _, mb, n in samples) - base_mb
+    print(f"{fps:.0f} frames/s, growth after minute one (pool frames excluded) {growth:+.1f} MB")
+    if growth > args.max_growth:
+        print(f"RSS grew more than {args.max_growth:g} MB", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
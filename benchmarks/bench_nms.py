@@ -0,0 +1,70 @@
+"""
+Micro-benchmark: vectorized NMS / WBF vs the old pure-Python _dedup_boxes.
+
+    python benchmarks/bench_nms.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_nms import nms, weighted_box_fusion  # noqa: E402
+
+
+def _legacy_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _legacy_dedup(boxes, iou_thresh=0.35):
+    kept = []
+    for b in boxes:
+        if all(_legacy_iou(b, k) < iou_thresh for k in kept):
+            kept.append(b)
+    return kept
+
+
+def make_boxes(n, img=4000, seed=0):
+    """Crowd-like boxes: ~1/3 are jittered duplicates, like dual-model + Haar output."""
+    rng = np.random.default_rng(seed)
+    base = max(1, (2 * n) // 3)
+    xy = rng.integers(0, img - 200, (base, 2))
+    wh = rng.integers(20, 200, (base, 1)).repeat(2, axis=1)
+    boxes = np.hstack([xy, wh])
+    dup_idx = rng.integers(0, base, n - base)
+    dups = boxes[dup_idx] + rng.integers(-6, 7, (n - base, 4))
+    boxes = np.vstack([boxes, dups])
+    scores = rng.random(n)
+    return [tuple(int(v) for v in b) for b in boxes], scores.tolist()
+
+
+def _time(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def main():
+    print(f"{'boxes':>6s} {'legacy ms':>10s} {'nms ms':>10s} {'wbf ms':>10s} {'speedup':>8s}")
+    for n in (10, 100, 1000):
+        boxes, scores = make_boxes(n)
+        repeats = 200 if n <= 100 else 5
+        t_old = _time(lambda: _legacy_dedup(boxes), repeats)
+        t_nms = _time(lambda: nms(boxes, scores), repeats)
+        t_wbf = _time(lambda: weighted_box_fusion(boxes, scores), repeats)
+        print(f"{n:6d} {t_old:10.3f} {t_nms:10.3f} {t_wbf:10.3f} {t_old / t_nms:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+"""
+Reproducible benchmark suite for the detect / blur / encode hot paths.
+
+Runs offline against the sample media in Results/ plus synthetic frames at
+several resolutions and face counts, in single-model and group mode. Every
+case is a real job through BlurWorker (decode, detect, blur, still or
+video encode as users get them), with its per-stage timings read from the
+worker's JobStats. Each case runs in a fresh process so peak RSS is per
+case; model start-up is excluded from the timings.
+
+    python benchmarks/run_benchmarks.py --out bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --threshold 0.10
+
+Exits with status 1 when any headline metric regresses past the threshold
+relative to the baseline file.
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import multiprocessing as mp
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SYNTHETIC_RESOLUTIONS = {'720p': (1280, 720), '1080p': (1920, 1080), '4k': (3840, 2160)}
+SYNTHETIC_FACES = (1, 8, 32)
+MODES = {'single': False, 'group': True}
+
+# Bumped when what a case measures changes; older baselines are not comparable
+SUITE_VERSION = 2
+
+# metric -> True if higher is better
+HEADLINE_METRICS = {'images_per_s': True, 'video_fps': True, 'peak_rss_mb': False}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def sample_images():
+    paths = sorted(glob.glob(os.path.join(ROOT, 'Results', '*')))
+    return [p for p in paths
+            if os.path.splitext(p)[1].lower() in ('.png', '.jpg', '.jpeg')
+            and not os.path.splitext(p)[0].endswith('_blurred')]
+
+
+def sample_videos():
+    return sorted(glob.glob(os.path.join(ROOT, 'Results', '*.mp4')))
+
+
+def _face_crops(blurrer, images):
+    """Real face crops from the sample images, used to populate synthetic frames."""
+    import cv2
+    crops = []
+    for path in images:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            continue
+        for (x, y, w, h) in blurrer.detect_boxes(img):
+            crops.append(img[y:y + h, x:x + w].copy())
+    return crops
+
+
+def synthetic_frame(width, height, faces, crops, seed=0):
+    """Textured background with `faces` face crops on a jittered grid (deterministic)."""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    frame = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    if not crops:
+        return frame
+    cols = int(np.ceil(np.sqrt(faces * width / height)))
+    rows = int(np.ceil(faces / cols))
+    cell_w, cell_h = width // cols, height // rows
+    for i in range(faces):
+        r, c = divmod(i, cols)
+        crop = crops[i % len(crops)]
+        side = int(min(cell_w, cell_h) * rng.uniform(0.4, 0.8))
+        ch, cw = crop.shape[:2]
+        s = side / max(ch, cw)
+        patch = cv2.resize(crop, (max(1, int(cw * s)), max(1, int(ch * s))))
+        ph, pw = patch.shape[:2]
+        x = c * cell_w + int(rng.integers(0, max(1, cell_w - pw)))
+        y = r * cell_h + int(rng.integers(0, max(1, cell_h - ph)))
+        frame[y:y + ph, x:x + pw] = patch
+    return frame
+
+
+def _run_worker(input_path, output_path, group_mode):
+    """One job through the shipped BlurWorker with instrumentation on.
+
+    Returns (wall seconds, JobStats snapshot); raises if the job fails.
+    """
+    from face_blur_worker import BlurWorker
+    worker = BlurWorker(input_path, output_path, 0.5, 1, group_mode=group_mode, instrument=True)
+    result = {}
+    # Direct connections: slots run inline, no event loop needed
+    worker.finished.connect(lambda path: result.update(output=path))
+    worker.error.connect(lambda msg: result.update(error=msg))
+    start = time.perf_counter()
+    worker.run()
+    elapsed = time.perf_counter() - start
+    if 'output' not in result:
+        raise RuntimeError(result.get('error', 'job ended without output'))
+    return elapsed, worker.job_stats.snapshot()
+
+
+def _stage_ms(snapshot, per):
+    """Stage totals from a JobStats snapshot, in ms per `per` (image or frame)."""
+    return {name: s['total_ms'] / max(per, 1) for name, s in snapshot['stages'].items()}
+
+
+def _image_case(case, group_mode, repeats, threads):
+    import cv2
+    cv2.setNumThreads(threads)
+    tmp = tempfile.mkdtemp(prefix='facebench-')
+    try:
+        if case['kind'] == 'sample':
+            input_path = case['path']
+        else:
+            from face_blur_core import FaceBlurrer
+            blurrer = FaceBlurrer(0.5, 1, group_mode=group_mode)
+            try:
+                crops = _face_crops(blurrer, sample_images())
+            finally:
+                blurrer.cleanup()
+            input_path = os.path.join(tmp, 'synthetic.png')
+            cv2.imwrite(input_path, synthetic_frame(case['width'], case['height'], case['faces'], crops))
+        output_path = os.path.join(tmp, 'out.png')
+        # Warm-up: the detector pool builds the models once per process
+        _run_worker(input_path, output_path, group_mode)
+        times, stages, faces = [], [], 0
+        for _ in range(repeats):
+            elapsed, snap = _run_worker(input_path, output_path, group_mode)
+            times.append(elapsed)
+            stages.append(_stage_ms(snap, 1))
+            faces = snap['boxes_total']
+        per = _median(times)
+        h, w = cv2.imread(input_path, cv2.IMREAD_UNCHANGED).shape[:2]
+        return {
+            'images_per_s': 1.0 / per,
+            'ms_per_image': per * 1000,
+            'megapixels': h * w / 1e6,
+            'faces': faces,
+            'stages_ms': {k: _median([s.get(k, 0.0) for s in stages]) for k in stages[0]},
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _clip(path, frames, dst):
+    """First `frames` frames of a video: stream-copied with ffmpeg, else re-encoded."""
+    import cv2
+    from face_blur_encoder import ffmpeg_available
+    if ffmpeg_available():
+        subprocess.run(['ffmpeg', '-v', 'error', '-y', '-i', path, '-frames:v', str(frames), '-c', 'copy', dst],
+                       check=True)
+        return dst
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    out = cv2.VideoWriter(dst, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+    try:
+        for _ in range(frames):
+            ok, frame = cap.read()
+            if not ok:
+                break
+            out.write(frame)
+    finally:
+        cap.release()
+        out.release()
+    return dst
+
+
+def _video_case(case, group_mode, max_frames, threads):
+    import cv2
+    cv2.setNumThreads(threads)
+    tmp = tempfile.mkdtemp(prefix='facebench-')
+    try:
+        clip = _clip(case['path'], max_frames, os.path.join(tmp, 'clip.mp4'))
+        # Warm-up: the detector pool builds the models once per process
+        _run_worker(_clip(case['path'], 2, os.path.join(tmp, 'warm.mp4')), os.path.join(tmp, 'warm_out.mp4'),
+                    group_mode)
+        # Decode, detect/blur and encode (ffmpeg pipe when available) as a user's job runs them
+        elapsed, snap = _run_worker(clip, os.path.join(tmp, 'out.mp4'), group_mode)
+        frames = snap['frames']
+        cap = cv2.VideoCapture(clip)
+        w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        'video_fps': frames / max(elapsed, 1e-9),
+        'frames': frames,
+        'resolution': f'{w}x{h}',
+        'stages_ms_per_frame': _stage_ms(snap, frames),
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def _run_case(args):
+    case, mode, opts = args
+    group_mode = MODES[mode]
+    if case['kind'] == 'video':
+        return _video_case(case, group_mode, opts['max_frames'], opts['threads'])
+    return _image_case(case, group_mode, opts['repeats'], opts['threads'])
+
+
+def build_cases(quick=False):
+    cases = []
+    for path in sample_images():
+        cases.append({'name': f'image:{os.path.basename(path)}', 'kind': 'sample', 'path': path})
+    resolutions = ['1080p'] if quick else list(SYNTHETIC_RESOLUTIONS)
+    faces = SYNTHETIC_FACES[:2] if quick else SYNTHETIC_FACES
+    for res in resolutions:
+        w, h = SYNTHETIC_RESOLUTIONS[res]
+        for n in faces:
+            cases.append({'name': f'synthetic:{res}:{n}faces', 'kind': 'synthetic',
+                          'width': w, 'height': h, 'faces': n})
+    for path in sample_videos():
+        cases.append({'name': f'video:{os.path.basename(path)}', 'kind': 'video', 'path': path})
+    return cases
+
+
+def _versions():
+    info = {'python': platform.python_version(), 'platform': platform.platform(),
+            'cpu_count': os.cpu_count()}
+    for mod in ('cv2', 'mediapipe', 'numpy'):
+        try:
+            info[mod] = __import__(mod).__version__
+        except Exception:
+            info[mod] = None
+    return info
+
+
+def run_suite(quick=False, repeats=5, max_frames=300, threads=1, modes=tuple(MODES)):
+    opts = {'repeats': repeats, 'max_frames': max_frames, 'threads': threads}
+    results = []
+    ctx = mp.get_context('spawn')
+    for case in build_cases(quick):
+        for mode in modes:
+            # Fresh process per case: isolated peak RSS, no cross-case warm caches
+            with ctx.Pool(1) as pool:
+                try:
+                    metrics = pool.apply(_run_case, ((case, mode, opts),))
+                    status = 'ok'
+                except Exception as e:
+                    metrics, status = {'error': str(e)}, 'error'
+            results.append({'case': case['name'], 'mode': mode, 'status': status, **metrics})
+            print(_format_row(results[-1]), flush=True)
+    return {
+        'meta': {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                 'suite_version': SUITE_VERSION, 'quick': quick, **opts, **_versions()},
+        'results': results,
+    }
+
+
+def _format_row(r):
+    if r['status'] != 'ok':
+        return f"{r['case']:36s} {r['mode']:7s} ERROR {r.get('error', '')}"
+    if 'video_fps' in r:
+        head = f"{r['video_fps']:8.1f} fps"
+    else:
+        head = f"{r['images_per_s']:8.2f} img/s"
+    rss = r.get('peak_rss_mb')
+    return f"{r['case']:36s} {r['mode']:7s} {head}  rss {rss if rss is None else round(rss)} MB"
+
+
+def compare(current, baseline, threshold):
+    """List of regression messages for headline metrics worse than `threshold` (fraction).
+
+    A case that passed in the baseline and fails now is a regression too;
+    new cases and cases that failed in the baseline as well are skipped.
+    """
+    version = baseline.get('meta', {}).get('suite_version', 1)
+    if version != SUITE_VERSION:
+        return [f"baseline is from suite version {version}, this is {SUITE_VERSION}: record a new baseline"]
+    base = {(r['case'], r['mode']): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+    problems = []
+    for r in current['results']:
+        old = base.get((r['case'], r['mode']))
+        if old is None:
+            continue
+        if r.get('status') != 'ok':
+            problems.append(f"{r['case']} [{r['mode']}] now fails: {r.get('error', r.get('status'))}")
+            continue
+        for metric, higher_better in HEADLINE_METRICS.items():
+            new_v, old_v = r.get(metric), old.get(metric)
+            if not new_v or not old_v:
+                continue
+            change = (new_v - old_v) / old_v
+            if (higher_better and change < -threshold) or (not higher_better and change > threshold):
+                problems.append(f"{r['case']} [{r['mode']}] {metric}: {old_v:.2f} -> {new_v:.2f} ({change:+.1%})")
+    return problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Face Blur Studio benchmark suite')
+    ap.add_argument('--out', help='Write results JSON here')
+    ap.add_argument('--baseline', help='Previous results JSON to compare against')
+    ap.add_argument('--threshold', type=float, default=0.10, help='Allowed regression fraction (default 0.10)')
+    ap.add_argument('--quick', action='store_true', help='Fewer synthetic cases')
+    ap.add_argument('--repeats', type=int, default=5)
+    ap.add_argument('--max-frames', type=int, default=300, help='Frames per video case')
+    ap.add_argument('--threads', type=int, default=1, help='cv2.setNumThreads per case (fixed for reproducibility)')
+    ap.add_argument('--mode', choices=list(MODES), action='append', help='Limit to one mode (repeatable)')
+    args = ap.parse_args(argv)
+
+    report = run_suite(args.quick, args.repeats, args.max_frames, args.threads, tuple(args.mode or MODES))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.threshold)
+        if problems:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for p in problems:
+                print("  " + p)
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
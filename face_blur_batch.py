@@ -0,0 +1,283 @@
+"""
+Face Blur Batch - Headless Processing Engine
+- Directory / glob expansion for large image sets
+- Process pool with one long-lived FaceBlurrer per worker
+- Async writer per worker: the next image is detected while the last is encoded
+- Optional near-duplicate gate: burst shots / re-exports reuse earlier boxes
+- Streams per-file results as they finish
+- Overall throughput summary
+"""
+
+import argparse
+import glob
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from collections import namedtuple
+
+import cv2
+
+from face_blur_core import (
+    FaceBlurrer, IMAGE_EXTS, blur_image_array, blur_still_low_memory, output_path_for
+)
+from face_blur_dedup import DEFAULT_DEDUP_THRESHOLD, DuplicateGate
+from face_blur_kernels import BLUR_ENGINES, DEFAULT_BLUR_ENGINE
+from face_blur_writer import FORMAT_EXTS, AsyncImageWriter
+
+
+BatchResult = namedtuple(
+    "BatchResult", "input_path output_path status faces pixels seconds message bytes encode_seconds reused",
+    defaults=(0, 0.0, False),
+)
+
+# Images each worker remembers for near-duplicate matching
+DEDUP_MEMORY = 32
+
+# Per-process detector, writer, duplicate gate and result queue, created once by the pool initializer
+_blurrer = None
+_writer = None
+_gate = None
+_results = None
+
+
+def collect_inputs(patterns, recursive=False, exts=IMAGE_EXTS):
+    """Expand files, directories and glob patterns into a sorted, unique file list."""
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            walker = os.walk(pattern) if recursive else [(pattern, [], os.listdir(pattern))]
+            matches = [os.path.join(root, n) for root, _, names in walker for n in names]
+        elif glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=recursive)
+        else:
+            found.append(pattern)
+            continue
+        # Don't re-blur our own outputs when expanding folders / globs
+        found.extend(f for f in matches if not _is_output(f))
+    seen = set()
+    files = []
+    for f in sorted(found):
+        key = os.path.abspath(f)
+        if key in seen or not os.path.isfile(f):
+            continue
+        if os.path.splitext(f)[1].lower() not in exts:
+            continue
+        seen.add(key)
+        files.append(f)
+    return files
+
+
+def _is_output(path):
+    return os.path.splitext(os.path.basename(path))[0].endswith("_blurred")
+
+
+def _init_worker(blurrer_kwargs, write_opts, dedup_threshold=None, results=None):
+    global _blurrer, _writer, _gate, _results
+    # One process per core already; stop OpenCV from oversubscribing each one
+    cv2.setNumThreads(1)
+    _blurrer = FaceBlurrer(**blurrer_kwargs)
+    _writer = AsyncImageWriter(**write_opts)
+    if dedup_threshold:
+        _gate = DuplicateGate(_blurrer, dedup_threshold, memory=DEDUP_MEMORY)
+    _results = results
+
+
+def _detect_one(job):
+    """Detect + blur one job; returns (partial BatchResult, pending write or None)."""
+    input_path, output_path, low_memory = job
+    start = time.perf_counter()
+    detector = _gate or _blurrer
+    skipped = _gate.skipped if _gate is not None else 0
+    try:
+        if low_memory:
+            boxes, _, _, (h, w) = blur_still_low_memory(detector, input_path, output_path, _blurrer,
+                                                        encode=_writer.encode)
+            reused = _gate is not None and _gate.skipped > skipped
+            return BatchResult(input_path, output_path, "ok", len(boxes), h * w, time.perf_counter() - start,
+                               "", os.path.getsize(output_path), reused=reused), None
+        img = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            return BatchResult(input_path, output_path, "error", 0, 0,
+                               time.perf_counter() - start, "Failed to load image"), None
+        final_img, boxes = blur_image_array(detector, img)
+        pending = _writer.submit(output_path, final_img)
+        pixels = img.shape[0] * img.shape[1]
+        reused = _gate is not None and _gate.skipped > skipped
+        return BatchResult(input_path, output_path, "ok", len(boxes), pixels,
+                           time.perf_counter() - start, "", reused=reused), pending
+    except Exception as e:
+        return BatchResult(input_path, output_path, "error", 0, 0,
+                           time.perf_counter() - start, str(e)), None
+
+
+def _finish_write(r, pending):
+    try:
+        nbytes, encode_s, write_s = pending.result()
+        return r._replace(seconds=r.seconds + encode_s + write_s, bytes=nbytes, encode_seconds=encode_s)
+    except Exception as e:
+        return r._replace(status="error", message=f"Failed to write image: {e}")
+
+
+def _process_chunk(jobs):
+    # Each result is sent the moment its file is written, while encoding
+    # overlaps the next detection; the chunk only waits on its writes at the end
+    pending = []
+    for job in jobs:
+        r, write = _detect_one(job)
+        if write is None:
+            _results.put(r)
+        else:
+            write.add_done_callback(lambda f, r=r: _results.put(_finish_write(r, f)))
+            pending.append(write)
+    for write in pending:
+        write.exception()
+    return len(jobs)
+
+
+def iter_batch(files, out_dir=None, workers=None, skip_existing=False, low_memory=False,
+               encode=None, write_threads=2, dedup_threshold=None, **blurrer_kwargs):
+    """Blur `files` across a process pool, yielding a BatchResult as each one finishes.
+
+    Extra keyword arguments (confidence, model_selection, group_mode, ...)
+    are passed to each worker's FaceBlurrer. low_memory blurs huge stills
+    in place through a memory map where the format allows. `encode` holds
+    face_blur_writer options (format, png_compression, jpeg_quality,
+    webp_quality); each worker writes on `write_threads` threads. With
+    dedup_threshold, near-duplicates of an image the same worker already
+    detected reuse its boxes (inputs are sorted, so bursts share chunks).
+    """
+    encode = encode or {}
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    jobs = []
+    for f in files:
+        out = output_path_for(f, out_dir, encode.get('format'))
+        if skip_existing and os.path.exists(out):
+            yield BatchResult(f, out, "skipped", 0, 0, 0.0, "Output exists")
+            continue
+        jobs.append((f, out, low_memory))
+    if not jobs:
+        return
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    # Results stream back per file, so chunks only amortise task IPC; two
+    # or more per chunk let a worker detect one image while writing the last
+    chunksize = max(1, min(8, len(jobs) // (workers * 4)))
+    if len(jobs) >= 2 * workers:
+        chunksize = max(2, chunksize)
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+    write_opts = dict(encode, threads=write_threads, max_pending=chunksize + 1)
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(blurrer_kwargs, write_opts, dedup_threshold, results)) as pool:
+        chunks_done = pool.map_async(_process_chunk, chunks)
+        received = 0
+        # Read until every job has reported; a finished map may still have results in flight
+        while received < len(jobs):
+            try:
+                r = results.get(timeout=0.5)
+            except queue.Empty:
+                if chunks_done.ready():
+                    chunks_done.get()  # re-raise a worker failure instead of waiting forever
+                continue
+            received += 1
+            yield r
+
+
+def run_batch(files, out=sys.stdout, **kwargs):
+    """Run a batch, printing one status line per file and a throughput summary."""
+    total = len(files)
+    done = ok = failed = faces = reused = 0
+    pixels = written = 0
+    encode_s = 0.0
+    start = time.perf_counter()
+    for r in iter_batch(files, **kwargs):
+        done += 1
+        if r.status == "ok":
+            ok += 1
+            faces += r.faces
+            pixels += r.pixels
+            written += r.bytes
+            encode_s += r.encode_seconds
+            reused += r.reused
+            detail = f"{r.faces} faces, {r.seconds * 1000:.0f} ms, {r.bytes / 1e6:.1f} MB"
+            if r.reused:
+                detail += ", near-duplicate: detection skipped"
+        else:
+            failed += r.status == "error"
+            detail = r.message
+        print(f"[{done}/{total}] {r.status.upper():7s} {r.input_path} ({detail})", file=out, flush=True)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"Done: {ok} ok, {failed} failed, {total - ok - failed} skipped in {elapsed:.1f}s "
+        f"- {ok / elapsed:.2f} img/s, {pixels / 1e6 / elapsed:.1f} MP/s, {faces} faces, "
+        f"{written / 1e6:.1f} MB written ({encode_s:.1f}s encoding), "
+        f"detection skipped on {reused} near-duplicate(s)",
+        file=out, flush=True,
+    )
+    return failed == 0
+
+
+def _detect_size(value):
+    return value if value == 'auto' else int(value)
+
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(description="Blur faces in images without the GUI.")
+    p.add_argument("inputs", nargs="+", help="Files, directories or glob patterns")
+    p.add_argument("-o", "--out-dir", help="Output directory (default: next to each input)")
+    p.add_argument("-r", "--recursive", action="store_true", help="Recurse into directories / ** globs")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("-c", "--confidence", type=float, default=0.5, help="Detection confidence (0-1)")
+    p.add_argument("-m", "--model", type=int, choices=(0, 1), default=0,
+                   help="0 = short range (0-2m), 1 = full range (2-5m)")
+    p.add_argument("-g", "--group", action="store_true", help="Group Photo Mode (dual-pass + Haar)")
+    p.add_argument("-b", "--blur", choices=sorted(BLUR_ENGINES), default=DEFAULT_BLUR_ENGINE,
+                   help="Anonymization engine")
+    p.add_argument("--detect-size", type=_detect_size, default=None,
+                   help="Detection resolution: longest side in px, or 'auto' (default: full)")
+    p.add_argument("--tile-size", type=int, default=None,
+                   help="Tiled detection for huge photos: tile side in px, e.g. 640 (default: off)")
+    p.add_argument("--low-memory", action="store_true",
+                   help="Huge stills: blur in place (memory-mapped for uncompressed TIFF/BMP), "
+                        "detect on a decimated view")
+    p.add_argument("-f", "--format", choices=sorted(FORMAT_EXTS), default=None,
+                   help="Output format (default: same as input)")
+    p.add_argument("--png-compression", type=int, choices=range(10), default=0, metavar="0-9",
+                   help="PNG zlib level: 0 = fastest, largest (default); 9 = smallest")
+    p.add_argument("-q", "--quality", type=int, default=None,
+                   help="JPEG / WebP quality 1-100 (default: 100 JPEG, lossless WebP)")
+    p.add_argument("--write-threads", type=int, default=2, help="Encode/write threads per worker (default: 2)")
+    p.add_argument("--dedup", type=float, nargs="?", const=DEFAULT_DEDUP_THRESHOLD, default=None,
+                   metavar="THRESHOLD",
+                   help="Reuse boxes for near-duplicate images (burst shots, re-exports); optional "
+                        f"threshold = max gray difference per thumbnail cell (default {DEFAULT_DEDUP_THRESHOLD})")
+    p.add_argument("--skip-existing", action="store_true", help="Skip inputs whose output already exists")
+    return p
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    files = collect_inputs(args.inputs, recursive=args.recursive)
+    if not files:
+        print("No supported images found", file=sys.stderr)
+        return 2
+    encode = dict(format=args.format, png_compression=args.png_compression)
+    if args.quality is not None:
+        encode.update(jpeg_quality=args.quality, webp_quality=args.quality)
+    ok = run_batch(
+        files, out_dir=args.out_dir, workers=args.workers, confidence=args.confidence,
+        model_selection=args.model, group_mode=args.group, blur_engine=args.blur,
+        detect_size=args.detect_size, tile_size=args.tile_size, skip_existing=args.skip_existing,
+        low_memory=args.low_memory, encode=encode, write_threads=args.write_threads,
+        dedup_threshold=args.dedup,
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
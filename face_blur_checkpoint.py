@@ -0,0 +1,147 @@
+"""
+Face Blur Checkpoint - Resumable Video Jobs
+- Output encoded as closed segments in <output>.partial/
+- checkpoint.json records completed segments, frames done and the
+  settings they were made with (written atomically after each segment)
+- A restarted job with the same input and settings continues from the
+  last checkpoint; the segments are joined losslessly at the end
+"""
+
+import json
+import os
+import shutil
+
+from face_blur_encoder import FFmpegPipeWriter
+
+
+CHECKPOINT_VERSION = 1
+
+# Seconds of video per closed segment: the most work a crash can lose
+CHECKPOINT_SECONDS = 60
+
+
+def checkpoint_dir_for(output_path):
+    return os.path.splitext(output_path)[0] + '.partial'
+
+
+def input_fingerprint(path):
+    # Size + mtime: hashing a two-hour video would cost minutes on every start
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+class Checkpoint:
+    """Progress of one resumable job, persisted in `work_dir`/checkpoint.json."""
+
+    def __init__(self, work_dir, input_path, settings):
+        self.work_dir = work_dir
+        self.state = {
+            'version': CHECKPOINT_VERSION,
+            'input': input_fingerprint(input_path),
+            'settings': settings,
+            'frames_done': 0,
+            'segments': [],
+        }
+
+    @property
+    def path(self):
+        return os.path.join(self.work_dir, 'checkpoint.json')
+
+    @property
+    def frames_done(self):
+        return self.state['frames_done']
+
+    def segment_paths(self):
+        return [os.path.join(self.work_dir, s['file']) for s in self.state['segments']]
+
+    def next_segment_path(self):
+        return os.path.join(self.work_dir, f"seg_{len(self.state['segments']):05d}.mp4")
+
+    def add_segment(self, path, frames):
+        self.state['segments'].append({'file': os.path.basename(path), 'frames': frames})
+        self.state['frames_done'] += frames
+        self.save()
+
+    def save(self):
+        """Write atomically, so a crash mid-write keeps the previous checkpoint."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def open(cls, work_dir, input_path, settings):
+        """Resume the checkpoint in `work_dir` if it matches, else start a fresh one."""
+        cp = cls(work_dir, input_path, settings)
+        try:
+            with open(cp.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if (state and state.get('version') == CHECKPOINT_VERSION
+                and state.get('input') == cp.state['input']
+                and state.get('settings') == cp.state['settings']
+                and all(os.path.exists(os.path.join(work_dir, s['file'])) for s in state['segments'])):
+            cp.state = state
+            return cp
+        # Different input or settings (or no checkpoint): old segments are useless
+        shutil.rmtree(work_dir, ignore_errors=True)
+        cp.save()
+        return cp
+
+    def discard(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class CheckpointedWriter:
+    """VideoWriter-style writer that closes a segment every `segment_frames` frames.
+
+    Each finished segment is recorded in the checkpoint before the next one
+    opens. abort() drops only the open segment; completed ones stay for
+    the next run.
+    """
+
+    def __init__(self, checkpoint, width, height, fps, segment_frames, **encode_opts):
+        self.checkpoint = checkpoint
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.segment_frames = max(1, int(segment_frames))
+        self.encode_opts = encode_opts
+        self._writer = None
+        self._path = None
+        self._frames = 0
+
+    def _open(self):
+        self._path = self.checkpoint.next_segment_path()
+        self._writer = FFmpegPipeWriter(self._path, self.width, self.height, self.fps, **self.encode_opts)
+        self._frames = 0
+
+    def _close(self):
+        self._writer.release()
+        self.checkpoint.add_segment(self._path, self._frames)
+        self._writer = None
+
+    def write(self, frame):
+        if self._writer is None:
+            self._open()
+        self._writer.write(frame)
+        self._frames += 1
+        if self._frames >= self.segment_frames:
+            self._close()
+
+    def release(self):
+        """Close the last (short) segment."""
+        if self._writer is not None:
+            self._close()
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+
+    def isOpened(self):
+        return True
@@ -0,0 +1,378 @@
+"""
+Face Blur Core - Detection and Blur without Qt
+- Dual-pass MediaPipe detection
+- Haar cascade fallback for small/distant faces
+- Box padding and deduplication
+- Still helpers: in-place blur, low-memory blur, output naming
+- EXE-friendly resource loading
+Shared by the GUI worker, the batch CLI, the job service and the
+segment / detector processes; none of them needs PyQt5 for this part.
+"""
+
+import os
+import sys
+
+import cv2
+
+from face_blur_buffers import ScratchBuffers
+from face_blur_frame import FrameViews
+from face_blur_haar import HaarFallback
+from face_blur_kernels import DEFAULT_BLUR_ENGINE, _ensure_odd, get_blur_engine
+from face_blur_lowmem import (
+    LOW_MEMORY_DETECT_SIDE, TILED_DETECT_SIDE, decimate, decimation_factor, open_still
+)
+from face_blur_nms import dedup_boxes
+from face_blur_pool import DetectorPool
+from face_blur_startup import lazy_import
+from face_blur_stats import NULL_STATS
+from face_blur_tiles import TiledDetector
+from face_blur_writer import path_for_format, write_image
+
+# MediaPipe (the slowest import by far) loads with the first detector, so the
+# GUI, batch CLI and job service start without it
+mp = lazy_import('mediapipe')
+
+
+# Haar has no calibrated confidence; rank it below any MediaPipe hit
+HAAR_SCORE = 0.3
+
+# Smallest face (px, detection resolution) the detectors find reliably
+MIN_DETECT_FACE_PX = 24
+
+# Video: full Haar sweep every N frames, changed regions only in between
+HAAR_VIDEO_INTERVAL = 5
+
+# Longest side of the preview image
+PREVIEW_SIDE = 800
+
+# Near-duplicate skipping in video: detect at least every N frames even in a static shot
+DEDUP_MAX_REUSE = 60
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff', '.tif'}
+VIDEO_EXTS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv'}
+
+
+def _resource_path(relative_path):
+    """Get absolute path to resource, works for dev and PyInstaller EXE."""
+    if hasattr(sys, "_MEIPASS"):
+        # PyInstaller EXE mode
+        return os.path.join(sys._MEIPASS, relative_path)
+    # Normal Python mode
+    return os.path.join(os.path.abspath("."), relative_path)
+
+
+def _pad_box(x, y, w, h, img_w, img_h, pad_x=0.30, pad_y=0.40):
+    px = int(w * pad_x)
+    py = int(h * pad_y)
+    x2 = min(img_w, x + w + px)
+    y2 = min(img_h, y + h + py)
+    x1 = max(0, x - px)
+    y1 = max(0, y - py)
+    return x1, y1, x2 - x1, y2 - y1
+
+
+def detection_scale(img_h, img_w, detect_size=None, min_face=0.02):
+    """Downscale factor for the detection copy of an image (1.0 = full resolution).
+
+    detect_size: None for full resolution, an int for the longest side in
+    pixels, or 'auto' to shrink until the smallest face of interest
+    (min_face, as a fraction of the shorter side) is MIN_DETECT_FACE_PX.
+    """
+    if not detect_size:
+        return 1.0
+    if detect_size == 'auto':
+        smallest = min_face * min(img_h, img_w)
+        return min(1.0, MIN_DETECT_FACE_PX / max(smallest, 1e-6))
+    return min(1.0, float(detect_size) / max(img_h, img_w))
+
+
+def save_image(path, img, **encode):
+    """Write a still synchronously (default: the studio's historical encode settings)."""
+    try:
+        write_image(path, img, **encode)
+    except OSError:
+        return False
+    return True
+
+
+def blur_boxes(image, boxes, blur, stats=NULL_STATS, scratch=None):
+    """Blur the given (x, y, w, h) boxes in place with a blur engine function.
+
+    Engines write straight into the box region; `scratch` (ScratchBuffers)
+    holds their intermediates, so nothing is allocated per box.
+    """
+    # OpenCV writes through top-down, row-strided views only: not a BGRA image's color
+    # channels, nor a bottom-up BMP mapped as img[::-1] (negative row stride)
+    pixel = image.shape[2] * image.itemsize if image.ndim == 3 else image.itemsize
+    direct = (image.strides[0] > 0 and image.strides[1] == pixel
+              and (image.ndim == 2 or image.strides[2] == image.itemsize))
+    with stats.stage('blur'):
+        for (x, y, w, h) in boxes:
+            face = image[y:y + h, x:x + w]
+            if face.size == 0:
+                continue
+            # Strength is defined by the classic kernel; engines match or exceed it
+            k = _ensure_odd(max(3, int(0.4 * max(w, h))))
+            if direct:
+                blur(face, k, dst=face, scratch=scratch)
+            else:
+                face[...] = blur(face, k, scratch=scratch)
+    return image
+
+
+def blur_image_array(blurrer, img):
+    """Blur a loaded still (BGR or BGRA) in place. Returns (img, boxes).
+
+    `blurrer` is anything with detect_and_blur_faces(), e.g. a FaceBlurrer
+    or a ManifestPlayer replaying cached boxes. Alpha is kept by working
+    on the color channels as a view - no copy, no merge.
+    """
+    color = img[:, :, :3] if img.ndim == 3 and img.shape[2] == 4 else img
+    _, boxes = blurrer.detect_and_blur_faces(color)
+    return img, boxes
+
+
+def blur_still_low_memory(detector, input_path, output_path=None, blurrer=None, stats=NULL_STATS, encode=None):
+    """Blur a (huge) still in bounded memory. Returns (boxes, small, factor, (h, w)).
+
+    Uncompressed TIFF / BMP are copied to output_path and blurred through a
+    memory map, so only the box regions are read back and written; other
+    formats are loaded once and blurred in that buffer. Detection runs on
+    a view decimated by `factor`, built band by band. `detector` is a
+    FaceBlurrer or manifest wrapper; `blurrer` (the FaceBlurrer, None when
+    replaying) sets the decimation. With output_path None nothing is
+    written (detect only). `small` comes back blurred, for previews.
+    `encode` holds write_image() options for outputs that aren't mapped.
+    """
+    with stats.stage('decode'):
+        img, rgb_order, mapped = open_still(input_path, output_path)
+    if img is None:
+        raise ValueError("Failed to load image")
+    h, w = img.shape[:2]
+    color = img[:, :, :3] if img.ndim == 3 and img.shape[2] == 4 else img
+    if blurrer is not None:
+        max_side = TILED_DETECT_SIDE if blurrer.tiler is not None else LOW_MEMORY_DETECT_SIDE
+        factor = decimation_factor(h, w, detection_scale(h, w, blurrer.detect_size, blurrer.min_face), max_side)
+    else:
+        # Replaying boxes: the small view is only a preview
+        factor = decimation_factor(h, w, 1.0, PREVIEW_SIDE)
+    with stats.stage('preprocess'):
+        small = decimate(color, factor, rgb_order)
+    if blurrer is not None:
+        boxes = detector.detect_boxes(color, blurrer.prepare(color, small, 1.0 / factor))
+    else:
+        boxes = detector.detect_boxes(color)
+    if output_path is None:
+        return boxes, small, factor, (h, w)
+
+    detector.blur_boxes(color, boxes)
+    with stats.stage('encode'):
+        if mapped:
+            img.flush()
+        elif not save_image(output_path, img, **(encode or {})):
+            raise OSError(f"Failed to write {output_path}")
+    del img, color
+    # Preview: same boxes on the small view, no second pass over the output
+    detector.blur_boxes(small, [(x // factor, y // factor, max(1, bw // factor), max(1, bh // factor))
+                                for (x, y, bw, bh) in boxes])
+    return boxes, small, factor, (h, w)
+
+
+def output_path_for(input_path, out_dir=None, fmt=None):
+    """Default output name: <name>_blurred<ext> (videos always become .mp4).
+
+    fmt ('png', 'jpg', 'webp') overrides the extension of still outputs.
+    """
+    base, ext = os.path.splitext(input_path)
+    if out_dir:
+        base = os.path.join(out_dir, os.path.basename(base))
+    if ext.lower() in VIDEO_EXTS:
+        return f"{base}_blurred.mp4"
+    return path_for_format(f"{base}_blurred{ext}", fmt)
+
+
+class FaceBlurrer:
+    """Core face detection and blur logic with dual-pass + fallback."""
+
+    def __init__(self, confidence=0.5, model_selection=0, group_mode=False, blur_engine=DEFAULT_BLUR_ENGINE,
+                 dedup_method='nms', detect_size=None, min_face=0.02, tile_size=None, tile_workers=None,
+                 haar_interval=1):
+        self.group_mode = group_mode
+        # Instrumentation sink; a job swaps in a JobStats while it runs
+        self.stats = NULL_STATS
+        self.haar_fallback = None
+        self.configure(blur_engine=blur_engine, dedup_method=dedup_method,
+                       detect_size=detect_size, min_face=min_face, haar_interval=haar_interval)
+        # Per-frame derived views, buffers recycled across video frames
+        self._views = FrameViews()
+        # Blur intermediates (downscaled faces), reused across boxes and frames
+        self._scratch = ScratchBuffers()
+        # Tiled mode: MediaPipe over overlapping tiles replaces the Haar sweep
+        self.tiler = None
+        if tile_size:
+            self.tiler = TiledDetector(confidence, model_selection, group_mode,
+                                       tile_size=tile_size, workers=tile_workers)
+        self.mp_face_detection = mp.solutions.face_detection
+        # Primary detector (UI-selected)
+        self.det_primary = self.mp_face_detection.FaceDetection(
+            min_detection_confidence=confidence,
+            model_selection=model_selection
+        )
+        # Secondary (dual-pass) for group mode
+        self.det_secondary = None
+        if group_mode:
+            other_model = 1 - int(model_selection)
+            self.det_secondary = self.mp_face_detection.FaceDetection(
+                min_detection_confidence=max(0.2, confidence - 0.15),
+                model_selection=other_model
+            )
+        # Haar fallback for tiny faces (EXE-safe loading)
+        self.haar = None
+        if group_mode and self.tiler is None:
+            try:
+                # Try loading from bundled resource first
+                haar_path = _resource_path("haarcascade_frontalface_default.xml")
+                self.haar = cv2.CascadeClassifier(haar_path)
+                
+                # Verify it loaded correctly
+                if self.haar.empty():
+                    # Fallback to OpenCV's built-in path
+                    haar_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+                    self.haar = cv2.CascadeClassifier(haar_path)
+                    
+                    # Final check
+                    if self.haar.empty():
+                        self.haar = None
+            except Exception:
+                # If all else fails, disable Haar cascade
+                self.haar = None
+        if self.haar is not None:
+            self.haar_fallback = HaarFallback(self.haar, every=self.haar_interval)
+
+    def configure(self, blur_engine=DEFAULT_BLUR_ENGINE, dedup_method='nms', detect_size=None, min_face=0.02,
+                  haar_interval=1):
+        """Set the cheap per-job options; detectors are left untouched."""
+        self._blur = get_blur_engine(blur_engine)
+        self.blur_engine = blur_engine
+        self.dedup_method = dedup_method
+        self.detect_size = detect_size
+        self.min_face = min_face
+        self.haar_interval = haar_interval
+        # Optional passes; a SpeedGovernor switches them off under load
+        self.secondary_enabled = True
+        self.haar_enabled = True
+        if self.haar_fallback is not None:
+            # New job, new stream: drop the previous frame's Haar state
+            self.haar_fallback.every = haar_interval
+            self.haar_fallback.reset()
+
+    def prepare(self, image, small=None, scale=None):
+        """Attach `image` to the shared per-frame views at detection scale.
+
+        A caller that already holds a detection view (`small`, at `scale`)
+        passes it in and no full-size view is derived from `image`.
+        """
+        if small is not None:
+            return self._views.set_frame(image, scale, small)
+        ih, iw = image.shape[:2]
+        return self._views.set_frame(image, detection_scale(ih, iw, self.detect_size, self.min_face))
+
+    def _collect_mediapipe_boxes(self, views):
+        h, w = views.small.shape[:2]
+        boxes = []
+        secondary = self.det_secondary if self.secondary_enabled else None
+        for name, detector in (('primary', self.det_primary), ('secondary', secondary)):
+            if detector is None:
+                continue
+            # One RGB conversion shared by both detectors
+            results = detector.process(views.small_rgb)
+            if not results.detections:
+                continue
+            self.stats.count(f'hits_{name}', len(results.detections))
+            for d in results.detections:
+                rb = d.location_data.relative_bounding_box
+                x = int(rb.xmin * w)
+                y = int(rb.ymin * h)
+                bw = int(rb.width * w)
+                bh = int(rb.height * h)
+                # Skip invalid
+                if bw <= 0 or bh <= 0:
+                    continue
+                boxes.append((x, y, bw, bh, float(d.score[0]) if d.score else 0.5))
+        return boxes
+
+    def _collect_haar_boxes(self, views, covered=()):
+        """Haar pass over the regions `covered` (MediaPipe boxes) leaves open."""
+        if self.haar_fallback is None or not self.haar_enabled:
+            return []
+        gray = views.small_gray
+        ih, iw = gray.shape[:2]
+        # Dynamic minimum size ~2% of smallest dimension
+        min_side = max(20, int(min(ih, iw) * 0.02))
+        faces = self.haar_fallback.detect(gray, covered, min_side)
+        self.stats.count('hits_haar', len(faces))
+        return [(x, y, w, h, HAAR_SCORE) for (x, y, w, h) in faces]
+
+    def detect_scored_boxes(self, image, views=None):
+        """Return padded, deduplicated face boxes and their detector confidences."""
+        stats = self.stats
+        ih, iw = image.shape[:2]
+        with stats.stage('preprocess'):
+            if views is None:
+                views = self.prepare(image)
+            rgb = views.small_rgb
+        # Detect on the downscaled view (made once), pad and blur at full resolution
+        if self.tiler is not None:
+            with stats.stage('tiles'):
+                boxes = self.tiler.detect(rgb)
+            stats.count('hits_tiles', len(boxes))
+        else:
+            with stats.stage('mediapipe'):
+                boxes = self._collect_mediapipe_boxes(views)
+        if self.group_mode:
+            with stats.stage('haar'):
+                boxes += self._collect_haar_boxes(views, boxes)
+        with stats.stage('dedup'):
+            if views.scale < 1.0:
+                inv = 1.0 / views.scale
+                boxes = [(int(x * inv), int(y * inv), int(w * inv), int(h * inv), sc) for (x, y, w, h, sc) in boxes]
+            # Pad and clip
+            padded = [_pad_box(x, y, w, h, iw, ih) for (x, y, w, h, _) in boxes]
+            scores = [b[4] for b in boxes]
+            # Deduplicate, keeping the most confident box of each overlap group
+            return dedup_boxes(padded, scores, method=self.dedup_method)
+
+    def detect_boxes(self, image, views=None):
+        """Return padded, deduplicated face boxes."""
+        return self.detect_scored_boxes(image, views)[0]
+
+    def detect_and_blur_faces(self, image):
+        """Anonymize every detected box with the selected blur engine."""
+        boxes = self.detect_boxes(image)
+        return self.blur_boxes(image, boxes), boxes
+
+    def blur_boxes(self, image, boxes):
+        """Blur the given (x, y, w, h) boxes in place."""
+        return blur_boxes(image, boxes, self._blur, self.stats, self._scratch)
+
+    def cleanup(self):
+        if self.det_primary:
+            self.det_primary.close()
+        if self.det_secondary:
+            self.det_secondary.close()
+        if self.tiler:
+            self.tiler.cleanup()
+
+
+# Detectors outlive jobs: keyed by the settings that shape the graphs
+DETECTOR_POOL = DetectorPool(FaceBlurrer)
+
+
+def detector_kwargs(confidence, model_selection, group_mode, tile_size=None):
+    return dict(confidence=confidence, model_selection=model_selection,
+                group_mode=group_mode, tile_size=tile_size)
+
+
+def warm_detectors(confidence, model_selection, group_mode, tile_size=None):
+    """Build detectors for these settings in the background."""
+    return DETECTOR_POOL.warm_async(**detector_kwargs(confidence, model_selection, group_mode, tile_size))
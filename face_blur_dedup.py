@@ -0,0 +1,137 @@
+"""
+Face Blur Dedup - Near-Duplicate Detection Skipping
+- 64-bit difference hash per image / frame as a quick reject, then a
+  fine grid of cell means (160 cells along the longer side)
+- A match needs every cell to agree within the threshold; cells are small
+  enough that a face moving anywhere changes some of them by most of its
+  contrast, so a walking face forces detection
+- Matches reuse the earlier boxes, rescaled for re-exports at another size
+- Video: frames are compared with the last *detected* frame, so slow
+  drift can't add up, and detection runs at least every max_reuse frames
+"""
+
+from collections import deque
+
+from face_blur_startup import lazy_import
+
+# The GUI only needs the default threshold at start-up
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+THUMB_SIZE = 64
+
+# Grid cells along the longer side: ~12 px at 1080p, so a face of 2% of the
+# frame height (the smallest detected by default) covers 80%+ of a cell. Coarser
+# cells average a small moving face away (recall); finer ones count noise
+# and compression flicker as change (fewer skips)
+GRID_SIDE = 160
+
+# Largest mean abs gray difference (0-255) of any grid cell that still counts as the same image
+DEFAULT_DEDUP_THRESHOLD = 3.0
+
+# dHash bits that may differ before the thumbnails are even compared
+HASH_BITS = 12
+
+def thumbnail(gray):
+    return cv2.resize(gray, (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def cell_grid(gray):
+    """Mean gray of each cell, GRID_SIDE cells along the longer side."""
+    h, w = gray.shape[:2]
+    scale = GRID_SIDE / max(h, w)
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def dhash(thumb):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 image."""
+    small = cv2.resize(thumb, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).reshape(-1)
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def cell_difference(a, b):
+    """Largest per-cell mean abs difference of two cell grids (b is resized to a if needed)."""
+    if b.shape != a.shape:
+        b = cv2.resize(b, (a.shape[1], a.shape[0]), interpolation=cv2.INTER_AREA)
+    return float(cv2.absdiff(a, b).max())
+
+
+class DuplicateGate:
+    """Skips detection on images nearly identical to one already detected.
+
+    Wraps a FaceBlurrer (anything with prepare() and detect_boxes(image,
+    views)). `memory` is how many earlier images are remembered: 1 for
+    video (the last keyframe), more for batches of burst shots and
+    re-exports. `max_reuse` caps how many images may reuse one result.
+    """
+
+    def __init__(self, blurrer, threshold=DEFAULT_DEDUP_THRESHOLD, memory=1, max_reuse=None):
+        self.blurrer = blurrer
+        self.threshold = float(threshold)
+        self.max_reuse = max_reuse
+        self._seen = deque(maxlen=max(1, memory))
+        self.checked = 0
+        self.skipped = 0
+
+    @property
+    def stats(self):
+        return self.blurrer.stats
+
+    def reset(self):
+        self._seen.clear()
+
+    def _match(self, grid, digest, shape):
+        h, w = shape
+        for entry in self._seen:
+            eh, ew = entry['shape']
+            # Same picture at another size: same aspect ratio, boxes scale
+            if abs(w / h - ew / eh) > 0.01 * (w / h):
+                continue
+            if self.max_reuse is not None and entry['reused'] >= self.max_reuse:
+                continue
+            if bin(digest ^ entry['hash']).count('1') > HASH_BITS:
+                continue
+            if cell_difference(grid, entry['grid']) <= self.threshold:
+                return entry
+        return None
+
+    @staticmethod
+    def _rescale(boxes, src, dst):
+        if src == dst:
+            return list(boxes)
+        sy, sx = dst[0] / src[0], dst[1] / src[1]
+        return [(int(x * sx), int(y * sy), int(w * sx), int(h * sy)) for (x, y, w, h) in boxes]
+
+    def detect_boxes(self, image, views=None):
+        if views is None:
+            views = self.blurrer.prepare(image)
+        shape = image.shape[:2]
+        with self.stats.stage('dedup_gate'):
+            gray = views.small_gray
+            grid = cell_grid(gray)
+            digest = dhash(thumbnail(gray))
+            entry = self._match(grid, digest, shape)
+        self.checked += 1
+        if entry is not None:
+            entry['reused'] += 1
+            self.skipped += 1
+            self.stats.count('dedup_skipped')
+            return self._rescale(entry['boxes'], entry['shape'], shape)
+        boxes = self.blurrer.detect_boxes(image, views)
+        self._seen.appendleft({'grid': grid, 'hash': digest, 'shape': shape, 'boxes': boxes, 'reused': 0})
+        return boxes
+
+    def detect_and_blur_faces(self, image):
+        boxes = self.detect_boxes(image)
+        return self.blurrer.blur_boxes(image, boxes), boxes
+
+    def blur_boxes(self, image, boxes):
+        return self.blurrer.blur_boxes(image, boxes)
+
+    def report(self):
+        return {'checked': self.checked, 'skipped': self.skipped,
+                'skipped_pct': round(100.0 * self.skipped / self.checked, 1) if self.checked else 0.0,
+                'threshold': self.threshold}
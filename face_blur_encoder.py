@@ -0,0 +1,186 @@
+"""
+Face Blur Encoder - Single-Pass FFmpeg Output
+- Raw BGR frames piped straight into one ffmpeg process
+- Source audio muxed in the same run (no _temp.mp4, no remux pass)
+- Configurable codec / CRF / preset
+- Segment helpers: keyframe probing, ranged raw decode, lossless concat
+"""
+
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+
+_ffmpeg_ok = None
+
+
+def ffmpeg_available():
+    """True if an ffmpeg binary is on PATH (checked once per process)."""
+    global _ffmpeg_ok
+    if _ffmpeg_ok is None:
+        try:
+            subprocess.run(['ffmpeg', '-version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+            _ffmpeg_ok = True
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            _ffmpeg_ok = False
+    return _ffmpeg_ok
+
+
+class FFmpegPipeWriter:
+    """cv2.VideoWriter-compatible writer that encodes via an ffmpeg stdin pipe."""
+
+    def __init__(self, output_path, width, height, fps, audio_source=None,
+                 codec='libx264', crf=18, preset='medium', audio_bitrate='192k'):
+        self.output_path = output_path
+        self.frame_bytes = width * height * 3
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', f'{fps:.6g}',
+            '-i', '-',
+        ]
+        if audio_source:
+            cmd += ['-i', audio_source, '-map', '0:v:0', '-map', '1:a:0?',
+                    '-c:a', 'aac', '-b:a', audio_bitrate, '-shortest']
+        cmd += [
+            '-c:v', codec, '-crf', str(crf), '-preset', preset,
+            # yuv420p needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            output_path,
+        ]
+        # stderr goes to a file: an unread PIPE can fill up and stall ffmpeg
+        self._log = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._log)
+
+    def _error_tail(self):
+        self._log.seek(0)
+        return self._log.read().decode(errors='replace').strip()[-500:]
+
+    def isOpened(self):
+        return self.proc.poll() is None
+
+    def write(self, frame):
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError(f"Frame size {frame.nbytes} does not match writer ({self.frame_bytes} bytes)")
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, OSError):
+            self.proc.wait()
+            raise RuntimeError(f"ffmpeg exited early: {self._error_tail()}")
+
+    def release(self):
+        """Finish the file; raises if ffmpeg failed."""
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        code = self.proc.wait()
+        err = self._error_tail() if code != 0 else ''
+        self._log.close()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg failed ({code}): {err}")
+
+    def abort(self):
+        """Kill ffmpeg and remove the partial output."""
+        try:
+            self.proc.kill()
+        except OSError:
+            pass
+        self.proc.wait()
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        self._log.close()
+        if os.path.exists(self.output_path):
+            try:
+                os.remove(self.output_path)
+            except OSError:
+                pass
+
+
+class FFmpegPipeReader:
+    """cv2.VideoCapture-style reader decoding a frame range through ffmpeg."""
+
+    def __init__(self, input_path, width, height, start_time=0.0, max_frames=None):
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height * 3
+        self.remaining = max_frames
+        cmd = ['ffmpeg', '-loglevel', 'error']
+        if start_time > 0:
+            # Input seeking decodes from the prior keyframe and drops frames before start_time
+            cmd += ['-ss', f'{start_time:.6f}']
+        cmd += ['-i', input_path, '-map', '0:v:0', '-an']
+        if max_frames is not None:
+            cmd += ['-frames:v', str(max_frames)]
+        cmd += ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+        self._log = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL, stderr=self._log)
+
+    def read(self, frame=None):
+        """Next frame as (ok, frame); like VideoCapture.read, decodes into `frame` when it fits."""
+        if self.remaining is not None and self.remaining <= 0:
+            return False, None
+        shape = (self.height, self.width, 3)
+        if frame is None or frame.shape != shape or frame.dtype != np.uint8 or not frame.flags.c_contiguous:
+            frame = np.empty(shape, dtype=np.uint8)
+        view = memoryview(frame).cast('B')
+        got = 0
+        while got < self.frame_bytes:
+            n = self.proc.stdout.readinto(view[got:])
+            if not n:
+                return False, None
+            got += n
+        if self.remaining is not None:
+            self.remaining -= 1
+        return True, frame
+
+    def release(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdout.close()
+        self._log.close()
+
+
+def probe_keyframes(input_path):
+    """Presentation times (s) of the video keyframes, from packet flags (no decode)."""
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+           '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', input_path]
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    times = []
+    for line in res.stdout.decode(errors='replace').splitlines():
+        parts = line.strip().split(',')
+        if len(parts) >= 2 and 'K' in parts[1]:
+            try:
+                times.append(float(parts[0]))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def concat_segments(segment_paths, output_path, audio_source=None, audio_bitrate='192k'):
+    """Join same-codec segments losslessly (stream copy), muxing source audio once."""
+    list_fd, list_path = tempfile.mkstemp(suffix='.txt', prefix='segments-')
+    try:
+        with os.fdopen(list_fd, 'w') as f:
+            for seg in segment_paths:
+                # concat demuxer quoting: wrap in single quotes, escape embedded ones
+                escaped = os.path.abspath(seg).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_source:
+            cmd += ['-i', audio_source, '-map', '0:v:0', '-map', '1:a:0?',
+                    '-c:a', 'aac', '-b:a', audio_bitrate, '-shortest']
+        cmd += ['-c:v', 'copy', '-movflags', '+faststart', output_path]
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if res.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {res.stderr.decode(errors='replace').strip()[-500:]}")
+    finally:
+        os.remove(list_path)
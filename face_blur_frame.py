@@ -0,0 +1,90 @@
+"""
+Face Blur Frame - Shared Per-Frame Preprocessing
+- Lazily derived views (RGB, gray, detection-scale copies)
+- Each view computed at most once per frame and shared by all detectors
+- Buffers reused across video frames of the same size
+"""
+
+import cv2
+
+
+class FrameViews:
+    """Derived views of one frame.
+
+    Call set_frame() for every new frame; views are computed on first
+    access and cached until the next set_frame(). With reuse_buffers the
+    underlying arrays are recycled between frames, so a view is only valid
+    until the next set_frame() - copy it if it must outlive the frame.
+    """
+
+    def __init__(self, reuse_buffers=True):
+        self.reuse_buffers = reuse_buffers
+        self._buffers = {}
+        self.frame = None
+        self.scale = 1.0
+        self._small = None
+        self._cache = {}
+
+    def set_frame(self, frame, scale=1.0, small=None):
+        """Attach a new frame. `small` is a ready-made BGR detection view at
+        `scale` (e.g. decimated from a memory-mapped still), used as is."""
+        self.frame = frame
+        self.scale = scale
+        self._small = small
+        self._cache = {}
+        return self
+
+    def _dst(self, name, shape, dtype):
+        if not self.reuse_buffers:
+            return None
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            return None
+        return buf
+
+    def _store(self, name, arr):
+        if self.reuse_buffers:
+            self._buffers[name] = arr
+        self._cache[name] = arr
+        return arr
+
+    def _convert(self, name, src, code, channels):
+        if name in self._cache:
+            return self._cache[name]
+        shape = src.shape[:2] + ((channels,) if channels > 1 else ())
+        dst = self._dst(name, shape, src.dtype)
+        return self._store(name, cv2.cvtColor(src, code, dst=dst))
+
+    @property
+    def rgb(self):
+        return self._convert('rgb', self.frame, cv2.COLOR_BGR2RGB, 3)
+
+    @property
+    def gray(self):
+        return self._convert('gray', self.frame, cv2.COLOR_BGR2GRAY, 1)
+
+    @property
+    def small(self):
+        """Detection-resolution copy (the frame itself when scale is 1)."""
+        if self._small is not None:
+            return self._small
+        if self.scale >= 1.0:
+            return self.frame
+        if 'small' in self._cache:
+            return self._cache['small']
+        ih, iw = self.frame.shape[:2]
+        size = (max(1, round(iw * self.scale)), max(1, round(ih * self.scale)))
+        dst = self._dst('small', (size[1], size[0]) + self.frame.shape[2:], self.frame.dtype)
+        return self._store('small', cv2.resize(self.frame, size, dst=dst, interpolation=cv2.INTER_AREA))
+
+    @property
+    def small_rgb(self):
+        if self.scale >= 1.0 and self._small is None:
+            return self.rgb
+        return self._convert('small_rgb', self.small, cv2.COLOR_BGR2RGB, 3)
+
+    @property
+    def small_gray(self):
+        if self.scale >= 1.0 and self._small is None:
+            return self.gray
+        return self._convert('small_gray', self.small, cv2.COLOR_BGR2GRAY, 1)
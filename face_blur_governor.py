@@ -0,0 +1,162 @@
+"""
+Face Blur Governor - Real-Time Speed Control
+- Per-frame time budget (target fps or max ms per frame)
+- Quality ladder: drop Haar, shrink detection, drop the secondary
+  model, lengthen the detection interval - in that order
+- Steps back up when there is headroom; a step up that fails doubles
+  the wait before the next try, so it settles instead of oscillating
+- Every adjustment is logged and kept for the job report
+"""
+
+import logging
+import time
+
+from face_blur_tracking import KeyframeTracker
+
+
+log = logging.getLogger(__name__)
+
+
+def build_ladder(detect_size=None, group_mode=False, interval=1):
+    """Quality levels from the configured settings down to the fastest.
+
+    Each level is a dict of detect_size, secondary, haar and interval;
+    a step only ever makes one of them cheaper.
+    """
+    level = dict(detect_size=detect_size, secondary=group_mode, haar=group_mode, interval=interval)
+    ladder = [dict(level)]
+
+    def step(**changes):
+        if any(level[k] != v for k, v in changes.items()):
+            level.update(changes)
+            ladder.append(dict(level))
+
+    def size_at_most(px):
+        # 'auto' sizing is already adaptive; give it a fixed ceiling from here on
+        cur = level['detect_size']
+        return px if cur in (None, 'auto') or cur > px else cur
+
+    step(haar=False)
+    step(detect_size=size_at_most(1280))
+    step(secondary=False)
+    step(detect_size=size_at_most(960))
+    step(interval=max(interval, 3))
+    step(detect_size=size_at_most(640))
+    step(interval=max(interval, 5))
+    step(interval=max(interval, 10))
+    return ladder
+
+
+def describe(level):
+    size = level['detect_size'] or 'full'
+    passes = ['primary'] + [p for p in ('secondary', 'haar') if level[p]]
+    return f"detect {size}, {'+'.join(passes)}, every {level['interval']} frame(s)"
+
+
+class SpeedGovernor:
+    """Keeps detect + blur within `budget_ms` per frame by trading recall for speed.
+
+    Drop-in for FaceBlurrer.detect_and_blur_faces / detect_boxes on
+    sequential video frames; either call is one frame against the budget.
+    The frame cost is smoothed (EWMA); after `patience` frames over budget
+    it moves one level down the ladder, and after `recover` frames under
+    `headroom` x budget it tries one level up. If that level falls back
+    within `recover` frames, the next try waits twice as long (up to 16x).
+    """
+
+    def __init__(self, blurrer, budget_ms, interval=1, alpha=0.2, patience=5,
+                 recover=60, headroom=0.7, on_adjust=None):
+        self.blurrer = blurrer
+        self.budget_ms = float(budget_ms)
+        self.alpha = alpha
+        self.patience = patience
+        self.recover = recover
+        self.headroom = headroom
+        self.on_adjust = on_adjust
+        self.ladder = build_ladder(blurrer.detect_size, blurrer.group_mode, interval)
+        self.tracker = KeyframeTracker(blurrer, interval=max(1, interval))
+        self.adjustments = []
+        self.frame = 0
+        self.ewma = None
+        self._over = 0
+        self._under = 0
+        self._wait = recover        # frames of headroom before trying a level up
+        self._last_up = None        # frame of the last step up, until it has held
+        self.level = 0
+        self._apply(0)
+
+    def _apply(self, idx):
+        lv = self.ladder[idx]
+        self.blurrer.detect_size = lv['detect_size']
+        self.blurrer.secondary_enabled = lv['secondary']
+        self.blurrer.haar_enabled = lv['haar']
+        if lv['interval'] != self.tracker.interval:
+            self.tracker.interval = lv['interval']
+        self.level = idx
+
+    def _move(self, idx, reason):
+        old = self.level
+        if idx > old and self._last_up is not None:
+            # The level we tried couldn't hold: back off before the next try
+            self._wait = min(self._wait * 2, self.recover * 16)
+            self._last_up = None
+        elif idx < old:
+            self._last_up = self.frame
+        # Switching in or out of tracking: start again from a fresh detection
+        if (self.ladder[idx]['interval'] > 1) != (self.ladder[old]['interval'] > 1):
+            self.tracker.reset()
+        self._apply(idx)
+        self._over = self._under = 0
+        entry = {
+            'frame': self.frame, 'from': old, 'to': idx, 'reason': reason,
+            'frame_ms': round(self.ewma, 2), 'budget_ms': round(self.budget_ms, 2),
+            'settings': describe(self.ladder[idx]),
+        }
+        self.adjustments.append(entry)
+        self.blurrer.stats.count('governor_steps')
+        log.info("frame %d: %s level %d -> %d (%.1f ms vs %.1f ms budget): %s",
+                 self.frame, reason, old, idx, self.ewma, self.budget_ms, entry['settings'])
+        if self.on_adjust is not None:
+            self.on_adjust(entry)
+
+    def _observe(self, ms):
+        self.ewma = ms if self.ewma is None else self.alpha * ms + (1 - self.alpha) * self.ewma
+        if self._last_up is not None and self.frame - self._last_up >= self.recover:
+            # Step up held: back to the normal wait
+            self._wait = self.recover
+            self._last_up = None
+        if self.ewma > self.budget_ms:
+            self._over += 1
+            self._under = 0
+            if self._over >= self.patience and self.level + 1 < len(self.ladder):
+                self._move(self.level + 1, 'slower than budget')
+        elif self.ewma < self.budget_ms * self.headroom:
+            self._under += 1
+            self._over = 0
+            if self._under >= self._wait and self.level > 0:
+                self._move(self.level - 1, 'headroom')
+        else:
+            self._over = self._under = 0
+
+    def _detect(self, image):
+        if self.ladder[self.level]['interval'] > 1:
+            return self.tracker.detect_boxes(image)
+        return self.blurrer.detect_boxes(image)
+
+    def _frame_done(self, start):
+        self.frame += 1
+        self._observe((time.perf_counter() - start) * 1000)
+
+    def detect_boxes(self, image):
+        """Detect only (e.g. detect-only runs): the budget then holds for detection alone."""
+        start = time.perf_counter()
+        boxes = self._detect(image)
+        self._frame_done(start)
+        return boxes
+
+    def detect_and_blur_faces(self, image):
+        start = time.perf_counter()
+        boxes = self._detect(image)
+        image = self.blurrer.blur_boxes(image, boxes)
+        self._frame_done(start)
+        return image, boxes
@@ -0,0 +1,140 @@
+"""
+Face Blur Haar - ROI-Restricted Haar Fallback
+- MediaPipe boxes are flattened out, so the cascade rejects them at
+  its first stage instead of re-finding the same faces
+- Runs on the pyramid level where the smallest face of interest just
+  fills the cascade window (no small-face recall lost)
+- Video: full sweep every Nth frame, in between only cells that changed
+  or hold a face found earlier (faces move within unchanged cells too)
+"""
+
+import cv2
+import numpy as np
+
+
+# Native window of haarcascade_frontalface_default.xml
+HAAR_WINDOW = 24
+
+
+class HaarFallback:
+    """Haar cascade pass for the small faces MediaPipe misses.
+
+    detect() takes the gray detection view, the boxes MediaPipe already
+    found and the smallest face size wanted, and returns (x, y, w, h) boxes
+    in gray-view coordinates. Faces above `max_face` of the short side are
+    left to MediaPipe. With every > 1 the object keeps state between
+    frames: call reset() when a new stream starts.
+    """
+
+    def __init__(self, cascade, every=1, max_face=0.15, change_thresh=12.0, full_sweep=0.6):
+        self.cascade = cascade
+        self.every = every
+        self.max_face = max_face
+        self.change_thresh = change_thresh
+        self.full_sweep = full_sweep
+        self.reset()
+
+    def reset(self):
+        self._prev = None
+        self._boxes = []
+        self._since = 0
+
+    def _level(self, gray, min_side):
+        # Shrink until min_side maps onto the cascade window
+        scale = min(1.0, HAAR_WINDOW / max(min_side, 1))
+        if scale >= 0.95:
+            return gray, 1.0
+        h, w = gray.shape[:2]
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA), scale
+
+    @staticmethod
+    def _cell_grid(h, w, cell):
+        return (h + cell - 1) // cell, (w + cell - 1) // cell
+
+    @staticmethod
+    def _mask_covered(level, covered, scale):
+        """Copy of `level` with every covered box filled with its mean."""
+        if not len(covered):
+            return level
+        masked = level.copy()
+        h, w = level.shape[:2]
+        for b in covered:
+            x1, y1 = max(0, int(b[0] * scale)), max(0, int(b[1] * scale))
+            x2, y2 = min(w, int((b[0] + b[2]) * scale)), min(h, int((b[1] + b[3]) * scale))
+            if x2 > x1 and y2 > y1:
+                roi = masked[y1:y2, x1:x2]
+                # Zero-variance windows fail the cascade's first stage
+                roi[...] = int(roi.mean())
+        return masked
+
+    def _changed_cells(self, level, cell):
+        diff = cv2.absdiff(level, self._prev)
+        h, w = level.shape[:2]
+        rows, cols = self._cell_grid(h, w, cell)
+        # Mean change over face-sized windows, so a small face entering a large
+        # cell is not averaged away; then the largest per cell
+        local = cv2.blur(diff, (HAAR_WINDOW, HAAR_WINDOW))
+        padded = np.zeros((rows * cell, cols * cell), dtype=np.uint8)
+        padded[:h, :w] = local
+        return padded.reshape(rows, cell, cols, cell).max(axis=(1, 3)) > self.change_thresh
+
+    def _search(self, level, search, cell, max_px):
+        h, w = level.shape[:2]
+        kwargs = dict(scaleFactor=1.1, minNeighbors=5,
+                      minSize=(HAAR_WINDOW, HAAR_WINDOW), maxSize=(max_px, max_px))
+        if search is None or search.mean() >= self.full_sweep:
+            return [tuple(int(v) for v in f) for f in self.cascade.detectMultiScale(level, **kwargs)]
+        faces = []
+        for r in range(search.shape[0]):
+            cols = np.flatnonzero(search[r])
+            if not len(cols):
+                continue
+            # Contiguous runs of cells in this row become one ROI
+            breaks = np.flatnonzero(np.diff(cols) > 1)
+            for run in np.split(cols, breaks + 1):
+                # Extend right/down by the largest face, so every face whose
+                # top-left lies in the run fits inside the ROI
+                x1, y1 = run[0] * cell, r * cell
+                x2 = min(w, (run[-1] + 1) * cell + max_px)
+                y2 = min(h, (r + 1) * cell + max_px)
+                if x2 - x1 < HAAR_WINDOW or y2 - y1 < HAAR_WINDOW:
+                    continue
+                for (fx, fy, fw, fh) in self.cascade.detectMultiScale(level[y1:y2, x1:x2], **kwargs):
+                    faces.append((int(fx) + x1, int(fy) + y1, int(fw), int(fh)))
+        return faces
+
+    def detect(self, gray, covered=(), min_side=20):
+        level, scale = self._level(gray, min_side)
+        h, w = level.shape[:2]
+        max_px = max(2 * HAAR_WINDOW, int(min(h, w) * self.max_face))
+        cell = max(64, 2 * max_px)
+        masked = self._mask_covered(level, covered, scale)
+
+        partial = (self.every > 1 and self._since < self.every
+                   and self._prev is not None and self._prev.shape == level.shape)
+        if partial:
+            changed = self._changed_cells(level, cell)
+            self._since += 1
+            # A small face can move without changing its cell's mean: no box is
+            # kept as is, the cells around each one are searched again
+            search = changed.copy()
+            for (x, y, fw, fh) in self._boxes:
+                search[max(0, (y - fh // 2) // cell):(y + fh + fh // 2) // cell + 1,
+                       max(0, (x - fw // 2) // cell):(x + fw + fw // 2) // cell + 1] = True
+            faces = self._search(masked, search, cell, max_px) if search.any() else []
+            # Refresh the reference only where we looked again, so slow drift still adds up
+            ys, xs = np.nonzero(changed)
+            for r, c in zip(ys, xs):
+                sl = np.s_[r * cell:(r + 1) * cell, c * cell:(c + 1) * cell]
+                self._prev[sl] = level[sl]
+            self._boxes = faces
+        else:
+            self._since = 1
+            self._boxes = self._search(masked, None, cell, max_px)
+            if self.every > 1:
+                # Unmasked reference: changes under MediaPipe boxes still count
+                self._prev = level.copy()
+
+        inv = 1.0 / scale
+        return [(int(x * inv), int(y * inv), int(fw * inv), int(fh * inv)) for (x, y, fw, fh) in self._boxes]
@@ -0,0 +1,158 @@
+"""
+Face Blur Kernels - Pluggable Anonymization Engines
+- Classic triple Gaussian (original look)
+- Fast Gaussian on a downscaled ROI, upscaled back
+- Triple box filter (constant cost regardless of kernel size)
+- Pixelation (downscale / nearest upscale)
+- Solid fill
+Every engine is tuned to remove at least as much detail as the classic blur.
+Engines take (roi, k) and optionally dst= (may be the roi itself: blur in
+place) and scratch= (ScratchBuffers for intermediates), and return the result.
+Run this module directly to print cost per megapixel and detail retained.
+"""
+
+import math
+import time
+
+from face_blur_startup import lazy_import
+
+# The GUI reads the engine labels at start-up; OpenCV loads with the first blur
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+def _ensure_odd(n: int) -> int:
+    return n + 1 if n % 2 == 0 else n
+
+
+def _kernel_sigma(k):
+    # OpenCV's default sigma for a k x k GaussianBlur with sigma=0
+    return 0.3 * ((k - 1) * 0.5 - 1) + 0.8
+
+
+def _classic_sigma(k):
+    # Three passes of the same Gaussian compose to sigma * sqrt(3)
+    return _kernel_sigma(k) * math.sqrt(3)
+
+
+def _scratch(scratch, name, shape):
+    return scratch.get(name, shape) if scratch is not None else None
+
+
+def blur_gaussian(roi, k, dst=None, scratch=None):
+    """Original triple Gaussian with a k x k kernel."""
+    out = cv2.GaussianBlur(roi, (k, k), 0, dst=dst)
+    # Later passes run in place: one buffer instead of three
+    out = cv2.GaussianBlur(out, (k, k), 0, dst=out)
+    return cv2.GaussianBlur(out, (k, k), 0, dst=out)
+
+
+def blur_fast_gaussian(roi, k, dst=None, scratch=None):
+    """Single Gaussian on a downscaled copy, then linear upscale."""
+    h, w = roi.shape[:2]
+    sigma = _classic_sigma(k)
+    # Shrink until the blur is ~3px wide in the small image
+    f = max(1.0, sigma / 3.0)
+    sw, sh = max(1, int(round(w / f))), max(1, int(round(h / f)))
+    small = cv2.resize(roi, (sw, sh), dst=_scratch(scratch, 'small', (sh, sw) + roi.shape[2:]),
+                       interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (0, 0), sigma / f, dst=small)
+    return cv2.resize(small, (w, h), dst=dst, interpolation=cv2.INTER_LINEAR)
+
+
+def blur_box(roi, k, dst=None, scratch=None):
+    """Three box-filter passes, matching the classic variance at O(1) cost per pixel."""
+    sigma = _classic_sigma(k)
+    # Three boxes of width b have variance 3 * (b^2 - 1) / 12
+    b = max(3, _ensure_odd(int(round(math.sqrt(4 * sigma * sigma + 1)))))
+    out = cv2.blur(roi, (b, b), dst=dst)
+    out = cv2.blur(out, (b, b), dst=out)
+    return cv2.blur(out, (b, b), dst=out)
+
+
+def blur_pixelate(roi, k, dst=None, scratch=None):
+    """Mosaic with blocks about three classic sigmas wide."""
+    h, w = roi.shape[:2]
+    block = max(2, int(round(3 * _classic_sigma(k))))
+    sw, sh = max(1, w // block), max(1, h // block)
+    small = cv2.resize(roi, (sw, sh), dst=_scratch(scratch, 'small', (sh, sw) + roi.shape[2:]),
+                       interpolation=cv2.INTER_AREA)
+    return cv2.resize(small, (w, h), dst=dst, interpolation=cv2.INTER_NEAREST)
+
+
+def blur_fill(roi, k, dst=None, scratch=None):
+    """Solid fill with the region's mean colour."""
+    out = np.empty_like(roi) if dst is None else dst
+    out[:] = cv2.mean(roi)[:roi.shape[2] if roi.ndim == 3 else 1]
+    return out
+
+
+BLUR_ENGINES = {
+    'gaussian': blur_gaussian,
+    'fast_gaussian': blur_fast_gaussian,
+    'box': blur_box,
+    'pixelate': blur_pixelate,
+    'fill': blur_fill,
+}
+
+# UI labels, in display order (the default first)
+BLUR_ENGINE_LABELS = [
+    ('gaussian', "Classic Triple Gaussian"),
+    ('fast_gaussian', "Fast Blur"),
+    ('box', "Box Blur"),
+    ('pixelate', "Pixelate"),
+    ('fill', "Solid Fill"),
+]
+
+# The original look; faster engines are opt-in
+DEFAULT_BLUR_ENGINE = 'gaussian'
+
+
+def get_blur_engine(name):
+    try:
+        return BLUR_ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown blur engine: {name!r} (choose from {', '.join(BLUR_ENGINES)})")
+
+
+def detail_retained(original, blurred):
+    """Share of the original's fine detail that survives blurring; lower = stronger.
+
+    Projects the blurred high-pass band onto the original's, so blocky or
+    faceted artifacts that were never in the face don't count as detail.
+    """
+    def high_pass(img):
+        g = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        return g - cv2.GaussianBlur(g, (0, 0), 2.0)
+
+    ho = high_pass(original)
+    hb = high_pass(blurred)
+    return float(abs((ho * hb).sum()) / max((ho * ho).sum(), 1e-6))
+
+
+def measure_engines(face_sizes=(64, 256, 1024), repeats=5, seed=0):
+    """Time every engine on synthetic textured faces. Returns {(engine, size): (ms_per_mp, detail)}."""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for size in face_sizes:
+        noise = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+        # Mix fine noise with coarse structure so both bands are present
+        coarse = cv2.resize(noise[::8, ::8], (size, size), interpolation=cv2.INTER_CUBIC)
+        roi = cv2.addWeighted(noise, 0.5, coarse, 0.5, 0)
+        k = _ensure_odd(max(3, int(0.4 * size)))
+        mp = size * size / 1e6
+        for name, engine in BLUR_ENGINES.items():
+            engine(roi, k)  # warm-up
+            start = time.perf_counter()
+            for _ in range(repeats):
+                out = engine(roi, k)
+            ms = (time.perf_counter() - start) * 1000 / repeats
+            results[(name, size)] = (ms / mp, detail_retained(roi, out))
+    return results
+
+
+if __name__ == '__main__':
+    res = measure_engines()
+    print(f"{'engine':15s} {'face px':>8s} {'ms/MP':>10s} {'detail':>8s}")
+    for (name, size), (ms_mp, detail) in res.items():
+        print(f"{name:15s} {size:8d} {ms_mp:10.2f} {detail:8.4f}")
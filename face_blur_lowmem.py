@@ -0,0 +1,185 @@
+"""
+Face Blur Low-Memory Stills - Huge Images in Bounded Memory
+- Uncompressed TIFF / BigTIFF / BMP pixel data memory-mapped: the output
+  is a file copy blurred in place, so only box regions are ever written
+- Detection view decimated band by band (one band + the small view
+  resident, never a full-size copy)
+- Anything else is loaded once and blurred in that buffer
+"""
+
+import math
+import os
+import shutil
+import struct
+
+import cv2
+import numpy as np
+
+
+# Longest side of the decimated detection view (tiled detection can use more)
+LOW_MEMORY_DETECT_SIDE = 4096
+TILED_DETECT_SIDE = 8192
+
+# Source rows per decimation band (rounded to a multiple of the factor)
+BAND_ROWS = 256
+
+# TIFF field type -> (struct code, size): SHORT, LONG, LONG8
+_TIFF_TYPES = {3: ('H', 2), 4: ('I', 4), 16: ('Q', 8)}
+
+
+def _read_tiff_tags(f, endian, big):
+    head_fmt = endian + ('Q' if big else 'I')
+    f.seek(4 if not big else 8)
+    ifd = struct.unpack(head_fmt, f.read(8 if big else 4))[0]
+    f.seek(ifd)
+    n = struct.unpack(endian + ('Q' if big else 'H'), f.read(8 if big else 2))[0]
+    entry = 20 if big else 12
+    raw = f.read(n * entry)
+    tags = {}
+    for i in range(n):
+        ent = raw[i * entry:(i + 1) * entry]
+        tag, typ = struct.unpack(endian + 'HH', ent[:4])
+        if typ not in _TIFF_TYPES:
+            continue
+        code, size = _TIFF_TYPES[typ]
+        if big:
+            count, value = struct.unpack(endian + 'Q', ent[4:12])[0], ent[12:20]
+        else:
+            count, value = struct.unpack(endian + 'I', ent[4:8])[0], ent[8:12]
+        nbytes = count * size
+        if nbytes <= len(value):
+            data = value[:nbytes]
+        else:
+            pos = f.tell()
+            f.seek(struct.unpack(head_fmt, value)[0])
+            data = f.read(nbytes)
+            f.seek(pos)
+        tags[tag] = struct.unpack(endian + code * count, data)
+    return tags
+
+
+def _tiff_layout(f):
+    sig = f.read(4)
+    endian = {b'II': '<', b'MM': '>'}.get(sig[:2])
+    if endian is None:
+        return None
+    version = struct.unpack(endian + 'H', sig[2:4])[0]
+    if version not in (42, 43):
+        return None
+    tags = _read_tiff_tags(f, endian, big=(version == 43))
+    width, height = tags.get(256, (0,))[0], tags.get(257, (0,))[0]
+    spp = tags.get(277, (1,))[0]
+    offsets, counts = tags.get(273), tags.get(279)
+    # Baseline only: uncompressed, chunky 8-bit RGB(A), striped (not tiled)
+    if (tags.get(259, (1,))[0] != 1 or tags.get(284, (1,))[0] != 1 or tags.get(262, (0,))[0] != 2
+            or spp not in (3, 4) or any(b != 8 for b in tags.get(258, (1,)))
+            or 322 in tags or not offsets or not counts or not width or not height):
+        return None
+    # One memmap needs the strips back to back
+    if any(offsets[i] + counts[i] != offsets[i + 1] for i in range(len(offsets) - 1)):
+        return None
+    if sum(counts) < width * height * spp:
+        return None
+    return offsets[0], height, width, spp, width * spp, True, True
+
+
+def _bmp_layout(f):
+    head = f.read(66)
+    if len(head) < 34 or head[:2] != b'BM':
+        return None
+    offset = struct.unpack('<I', head[10:14])[0]
+    width, height = struct.unpack('<ii', head[18:26])
+    bpp, compression = struct.unpack('<H', head[28:30])[0], struct.unpack('<I', head[30:34])[0]
+    if compression == 3 and bpp == 32 and len(head) == 66:
+        # BI_BITFIELDS with the plain BGRA masks is laid out like BI_RGB
+        if struct.unpack('<III', head[54:66]) != (0xFF0000, 0xFF00, 0xFF):
+            return None
+    elif compression != 0:
+        return None
+    if bpp not in (24, 32) or width <= 0 or height == 0:
+        return None
+    channels = bpp // 8
+    row_bytes = ((bpp * width + 31) // 32) * 4
+    # Positive height means rows are stored bottom-up
+    return offset, abs(height), width, channels, row_bytes, height < 0, False
+
+
+def map_raw_image(path, writable=False):
+    """Memory-map an uncompressed still as an (H, W, C) array.
+
+    Returns (array, rgb_order) or None when the file isn't a layout we
+    can map (compressed, tiled, planar, palette, 16-bit ...).
+    """
+    try:
+        with open(path, 'rb') as f:
+            layout = _tiff_layout(f)
+            if layout is None:
+                f.seek(0)
+                layout = _bmp_layout(f)
+    except (OSError, struct.error):
+        return None
+    if layout is None:
+        return None
+    offset, h, w, c, row_bytes, top_down, rgb_order = layout
+    try:
+        mm = np.memmap(path, dtype=np.uint8, mode='r+' if writable else 'r',
+                       offset=offset, shape=(h, row_bytes))
+    except (OSError, ValueError):
+        return None
+    img = mm[:, :w * c].reshape(h, w, c)
+    if not top_down:
+        img = img[::-1]
+    return img, rgb_order
+
+
+def open_still(input_path, output_path=None):
+    """Open a still for in-place blurring. Returns (img, rgb_order, mapped).
+
+    Mappable files with an output of the same type are copied and the copy
+    is mapped read-write, so blurring the array writes the output (call
+    img.flush() when done). Detect-only (output_path None) maps the input
+    read-only. Anything else is cv2.imread once (BGR, alpha kept); img is
+    None if that fails.
+    """
+    same_type = (output_path is not None and
+                 os.path.splitext(input_path)[1].lower() == os.path.splitext(output_path)[1].lower())
+    if output_path is None or same_type:
+        mapped = map_raw_image(input_path)
+        if mapped is not None and output_path is None:
+            return mapped[0], mapped[1], True
+        if mapped is not None:
+            del mapped
+            shutil.copyfile(input_path, output_path)
+            mapped = map_raw_image(output_path, writable=True)
+            if mapped is not None:
+                return mapped[0], mapped[1], True
+    return cv2.imread(input_path, cv2.IMREAD_UNCHANGED), False, False
+
+
+def decimation_factor(img_h, img_w, scale=1.0, max_side=LOW_MEMORY_DETECT_SIDE):
+    """Integer shrink factor: at least 1/scale, and enough to fit max_side."""
+    return max(1, math.ceil(1.0 / max(scale, 1e-6) - 1e-9), math.ceil(max(img_h, img_w) / max_side))
+
+
+def decimate(img, factor, rgb_order=False, band_rows=BAND_ROWS):
+    """BGR copy of `img` shrunk by an integer `factor`, built one row band at a time.
+
+    Area averaging over whole factor x factor blocks, so bands join
+    without seams and only one band is resident at a time.
+    """
+    h, w = img.shape[:2]
+    sh, sw = h // factor, w // factor
+    if sh == 0 or sw == 0:
+        raise ValueError(f"Image {w}x{h} is too small to shrink by {factor}")
+    small = np.empty((sh, sw, 3), dtype=np.uint8)
+    band = max(factor, (band_rows // factor) * factor)
+    for y0 in range(0, sh * factor, band):
+        y1 = min(y0 + band, sh * factor)
+        src = np.ascontiguousarray(img[y0:y1, :sw * factor])
+        out = cv2.resize(src, (sw, (y1 - y0) // factor), interpolation=cv2.INTER_AREA)
+        if out.ndim == 2:
+            out = cv2.cvtColor(out, cv2.COLOR_GRAY2BGR)
+        small[y0 // factor:y1 // factor] = out[:, :, :3]
+    if rgb_order:
+        cv2.cvtColor(small, cv2.COLOR_RGB2BGR, dst=small)
+    return small
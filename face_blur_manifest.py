@@ -0,0 +1,163 @@
+"""
+Face Blur Manifest - Detection Cache
+- Compact per-frame box manifest (.npz) for an input file
+- Keyed by a content hash of the input plus the detector settings
+- Re-runs that only change blur/render options replay boxes from it
+  and skip detection entirely
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+MANIFEST_VERSION = 1
+
+# Settings that change which boxes come out; anything else is render-only
+DETECTION_SETTINGS = (
+    'confidence', 'model_selection', 'group_mode', 'detect_size', 'min_face',
+    'tile_size', 'dedup_method', 'detect_interval', 'frame_budget_ms', 'low_memory',
+    'dedup_threshold',
+)
+
+
+def default_cache_dir():
+    return os.environ.get(
+        'FACE_BLUR_CACHE',
+        os.path.join(os.path.expanduser('~'), '.face_blur_studio', 'manifests')
+    )
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """BLAKE2b of the file contents (streams, constant memory)."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def manifest_key(digest, settings):
+    picked = {k: settings.get(k) for k in DETECTION_SETTINGS}
+    blob = json.dumps({'v': MANIFEST_VERSION, 'input': digest, 'settings': picked}, sort_keys=True)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+
+def manifest_path_for(input_path, settings, cache_dir=None):
+    """Cache location of the manifest for this input content + detector settings."""
+    key = manifest_key(file_digest(input_path), settings)
+    return os.path.join(cache_dir or default_cache_dir(), f"{key}.npz")
+
+
+class BoxManifest:
+    """Per-frame (x, y, w, h) boxes, stored as a flat array plus per-frame counts."""
+
+    def __init__(self, meta=None):
+        self.meta = dict(meta or {})
+        self.counts = []
+        self.flat = []
+        self._offsets = None
+        self._boxes = None
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, boxes):
+        """Append the boxes of the next frame."""
+        self.counts.append(len(boxes))
+        for b in boxes:
+            self.flat.extend(int(v) for v in b[:4])
+
+    def boxes_for(self, idx):
+        if self._offsets is None:
+            self._boxes = np.asarray(self.flat, dtype=np.int32).reshape(-1, 4)
+            self._offsets = np.concatenate([[0], np.cumsum(self.counts, dtype=np.int64)])
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return [tuple(int(v) for v in b) for b in self._boxes[start:end]]
+
+    def save(self, path):
+        """Write atomically, so a crash never leaves a truncated manifest behind."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = dict(self.meta, version=MANIFEST_VERSION, frames=len(self.counts))
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(
+                f,
+                counts=np.asarray(self.counts, dtype=np.uint32),
+                boxes=np.asarray(self.flat, dtype=np.int32).reshape(-1, 4),
+                meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(bytes(data['meta']).decode())
+            if meta.get('version') != MANIFEST_VERSION:
+                raise ValueError(f"Unsupported manifest version: {meta.get('version')}")
+            m = cls(meta)
+            m.counts = data['counts'].tolist()
+            m._boxes = data['boxes']
+            m.flat = m._boxes.reshape(-1).tolist()
+        m._offsets = np.concatenate([[0], np.cumsum(m.counts, dtype=np.int64)])
+        return m
+
+    @classmethod
+    def try_load(cls, path):
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            # Corrupt or stale cache entry: just detect again
+            return None
+
+
+class ManifestPlayer:
+    """Replays manifest boxes frame by frame in place of a detector."""
+
+    def __init__(self, manifest, blur_boxes):
+        self.manifest = manifest
+        self.blur_boxes = blur_boxes
+        self.idx = 0
+
+    def seek(self, idx):
+        """Continue from frame `idx`, e.g. when decoding resumes mid-video."""
+        if idx > len(self.manifest):
+            raise RuntimeError("Manifest has fewer frames than the input")
+        self.idx = idx
+
+    def detect_boxes(self, image, views=None):
+        if self.idx >= len(self.manifest):
+            raise RuntimeError("Manifest has fewer frames than the input")
+        boxes = self.manifest.boxes_for(self.idx)
+        self.idx += 1
+        return boxes
+
+    def detect_and_blur_faces(self, image):
+        boxes = self.detect_boxes(image)
+        return self.blur_boxes(image, boxes), boxes
+
+
+class ManifestRecorder:
+    """Wraps a detector and records every frame's boxes into a manifest."""
+
+    def __init__(self, detector, manifest):
+        self.detector = detector
+        self.manifest = manifest
+
+    def detect_and_blur_faces(self, image):
+        image, boxes = self.detector.detect_and_blur_faces(image)
+        self.manifest.add(boxes)
+        return image, boxes
+
+    def detect_boxes(self, image, views=None):
+        boxes = self.detector.detect_boxes(image) if views is None else self.detector.detect_boxes(image, views)
+        self.manifest.add(boxes)
+        return boxes
+
+    def blur_boxes(self, image, boxes):
+        return self.detector.blur_boxes(image, boxes)
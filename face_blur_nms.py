@@ -0,0 +1,83 @@
+"""
+Face Blur NMS - Vectorized Box Deduplication
+- NumPy IoU matrix (no per-pair Python loop)
+- Score-aware greedy NMS: the most confident detector wins
+- Weighted box fusion: overlapping boxes merge, weighted by confidence
+"""
+
+import numpy as np
+
+
+def _as_arrays(boxes, scores):
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if scores is None:
+        s = np.ones(len(b), dtype=np.float64)
+    else:
+        s = np.asarray(scores, dtype=np.float64).reshape(-1)
+    return b, s
+
+
+def iou_matrix(a, b=None):
+    """Pairwise IoU between (N, 4) and (M, 4) arrays of (x, y, w, h) boxes."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = a if b is None else np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = iw * ih
+    union = (a[:, 2:3] * a[:, 3:4]) + (b[:, 2] * b[:, 3]) - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def _clusters(b, s, iou_thresh):
+    """Greedy clustering in descending score order. Yields (leader, members) index arrays."""
+    order = np.argsort(-s, kind='stable')
+    iou = iou_matrix(b)
+    alive = np.ones(len(b), dtype=bool)
+    for i in order:
+        if not alive[i]:
+            continue
+        hit = alive & (iou[i] >= iou_thresh)
+        hit[i] = True
+        alive &= ~hit
+        yield i, np.flatnonzero(hit)
+
+
+def nms(boxes, scores=None, iou_thresh=0.35):
+    """Indices of boxes kept by score-ordered NMS."""
+    b, s = _as_arrays(boxes, scores)
+    if len(b) == 0:
+        return []
+    return [int(i) for i, _ in _clusters(b, s, iou_thresh)]
+
+
+def weighted_box_fusion(boxes, scores=None, iou_thresh=0.35):
+    """Merge overlapping boxes by confidence-weighted averaging. Returns (boxes, scores)."""
+    b, s = _as_arrays(boxes, scores)
+    fused, fused_scores = [], []
+    for _, members in _clusters(b, s, iou_thresh):
+        w = s[members] + 1e-6
+        x1 = (b[members, 0] * w).sum() / w.sum()
+        y1 = (b[members, 1] * w).sum() / w.sum()
+        x2 = ((b[members, 0] + b[members, 2]) * w).sum() / w.sum()
+        y2 = ((b[members, 1] + b[members, 3]) * w).sum() / w.sum()
+        fused.append((int(round(x1)), int(round(y1)), int(round(x2 - x1)), int(round(y2 - y1))))
+        fused_scores.append(float(s[members].max()))
+    return fused, fused_scores
+
+
+def dedup_boxes(boxes, scores=None, iou_thresh=0.35, method='nms'):
+    """Deduplicate (x, y, w, h) boxes. Returns (boxes, scores) with confidences kept."""
+    if len(boxes) == 0:
+        return [], []
+    if method == 'wbf':
+        return weighted_box_fusion(boxes, scores, iou_thresh)
+    if method != 'nms':
+        raise ValueError(f"Unknown dedup method: {method!r}")
+    keep = nms(boxes, scores, iou_thresh)
+    if scores is None:
+        scores = [1.0] * len(boxes)
+    return [tuple(int(v) for v in boxes[i]) for i in keep], [float(scores[i]) for i in keep]
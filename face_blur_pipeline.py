@@ -0,0 +1,125 @@
+"""
+Face Blur Pipeline - Staged Video Engine
+- Decoder thread -> detect/blur stage -> encoder thread
+- Bounded queues give backpressure in both directions
+- Frame order preserved, cancellation and errors stop every stage
+"""
+
+import queue
+import threading
+
+
+_EOS = object()  # end-of-stream marker passed down the queues
+
+
+class FramePipeline:
+    """Run read -> process -> write with each stage on its own thread.
+
+    read_frame()        -> (ok, frame), e.g. cv2.VideoCapture.read
+    process_frame(f)    -> (frame, boxes), e.g. FaceBlurrer.detect_and_blur_faces
+    write_frame(f)      -> None, e.g. cv2.VideoWriter.write
+    on_frame(i, f, b)   -> optional callback from the processing stage (progress/preview)
+    is_cancelled()      -> optional poll, checked between frames in every stage
+    """
+
+    def __init__(self, read_frame, process_frame, write_frame, on_frame=None,
+                 is_cancelled=None, queue_size=8):
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.write_frame = write_frame
+        self.on_frame = on_frame
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.decoded = queue.Queue(maxsize=queue_size)
+        self.processed = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._errors = []
+        self.frames_written = 0
+
+    def _should_stop(self):
+        return self._stop.is_set() or self.is_cancelled()
+
+    def _put(self, q, item):
+        # Blocking put that still notices cancellation while the queue is full
+        while True:
+            if self._should_stop():
+                return False
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while True:
+            if self._should_stop():
+                return _EOS
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _fail(self, exc):
+        self._errors.append(exc)
+        self._stop.set()
+
+    def _decode_loop(self):
+        try:
+            idx = 0
+            while not self._should_stop():
+                ok, frame = self.read_frame()
+                if not ok:
+                    break
+                if not self._put(self.decoded, (idx, frame)):
+                    return
+                idx += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(self.decoded, _EOS)
+
+    def _encode_loop(self):
+        try:
+            expected = 0
+            while True:
+                item = self._get(self.processed)
+                if item is _EOS:
+                    return
+                idx, frame = item
+                # Single processing stage keeps order; this guards future fan-out
+                if idx != expected:
+                    raise RuntimeError(f"Frame {idx} arrived out of order (expected {expected})")
+                self.write_frame(frame)
+                expected += 1
+                self.frames_written = expected
+        except Exception as e:
+            self._fail(e)
+
+    def run(self):
+        """Process the stream. Returns frames written (partial if cancelled); re-raises stage errors."""
+        decoder = threading.Thread(target=self._decode_loop, name="pipeline-decode", daemon=True)
+        encoder = threading.Thread(target=self._encode_loop, name="pipeline-encode", daemon=True)
+        decoder.start()
+        encoder.start()
+        try:
+            while True:
+                item = self._get(self.decoded)
+                if item is _EOS:
+                    break
+                idx, frame = item
+                frame, boxes = self.process_frame(frame)
+                if self.on_frame is not None:
+                    self.on_frame(idx, frame, boxes)
+                if not self._put(self.processed, (idx, frame)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            # Encoder drains what's queued unless we're stopping
+            if not self._put(self.processed, _EOS):
+                self._stop.set()
+            decoder.join()
+            encoder.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.frames_written
@@ -0,0 +1,133 @@
+"""
+Face Blur Pool - Persistent Detector Pool
+- Keeps initialized detectors alive between jobs
+- Keyed by the settings that define the detector graphs
+- LRU eviction of idle instances, background warm-up
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class DetectorPool:
+    """Reusable pool of expensive-to-build detector objects.
+
+    `factory(**key_kwargs)` builds an instance; instances must provide
+    cleanup(). An instance is handed to one job at a time: acquire() takes
+    an idle one (or builds it), release() returns it, and once more than
+    `max_idle` instances are idle the least recently used one is closed.
+    """
+
+    def __init__(self, factory, max_idle=3):
+        self.factory = factory
+        self.max_idle = max_idle
+        self._idle = OrderedDict()  # key -> [instances], most recently used last
+        self._pending = {}          # key -> Event for warm-ups in flight
+        self._lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+
+    @staticmethod
+    def make_key(**kwargs):
+        # Round floats so 0.5 from the slider and 0.50000001 share an entry
+        return tuple(sorted((k, round(v, 3) if isinstance(v, float) else v) for k, v in kwargs.items()))
+
+    def _take_idle(self, key):
+        items = self._idle.get(key)
+        if not items:
+            return None
+        inst = items.pop()
+        if not items:
+            del self._idle[key]
+        return inst
+
+    def acquire(self, **kwargs):
+        """Check out an instance for these settings, building one only if none is idle."""
+        key = self.make_key(**kwargs)
+        while True:
+            with self._lock:
+                inst = self._take_idle(key)
+                if inst is not None:
+                    self.hits += 1
+                    inst._pool_key = key
+                    return inst
+                pending = self._pending.get(key)
+            if pending is None:
+                break
+            # A warm-up for this key is already building one; wait for it
+            pending.wait()
+        inst = self.factory(**kwargs)
+        inst._pool_key = key
+        with self._lock:
+            self.created += 1
+        return inst
+
+    def release(self, inst):
+        """Return an instance to the pool (evicting the LRU idle one if full)."""
+        key = getattr(inst, '_pool_key', None)
+        evicted = []
+        with self._lock:
+            if key is None:
+                evicted.append(inst)
+            else:
+                self._idle.setdefault(key, []).append(inst)
+                self._idle.move_to_end(key)
+                evicted = self._evict_locked()
+        for old in evicted:
+            old.cleanup()
+
+    def _evict_locked(self):
+        evicted = []
+        while sum(len(v) for v in self._idle.values()) > self.max_idle:
+            key, items = next(iter(self._idle.items()))
+            evicted.append(items.pop(0))
+            if not items:
+                del self._idle[key]
+        return evicted
+
+    def warm(self, **kwargs):
+        """Build an idle instance for these settings unless one exists already."""
+        key = self.make_key(**kwargs)
+        with self._lock:
+            if self._idle.get(key) or key in self._pending:
+                return
+            event = self._pending[key] = threading.Event()
+        try:
+            inst = self.factory(**kwargs)
+            inst._pool_key = key
+            with self._lock:
+                self.created += 1
+            self.release(inst)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+
+    def warm_async(self, **kwargs):
+        """warm() on a daemon thread; returns the thread."""
+        t = threading.Thread(target=self._warm_quietly, kwargs=kwargs, name="detector-warmup", daemon=True)
+        t.start()
+        return t
+
+    def _warm_quietly(self, **kwargs):
+        try:
+            self.warm(**kwargs)
+        except Exception:
+            # A failed warm-up just means the job builds its own instance
+            pass
+
+    @contextmanager
+    def checkout(self, **kwargs):
+        inst = self.acquire(**kwargs)
+        try:
+            yield inst
+        finally:
+            self.release(inst)
+
+    def clear(self):
+        with self._lock:
+            items = [i for v in self._idle.values() for i in v]
+            self._idle.clear()
+        for inst in items:
+            inst.cleanup()
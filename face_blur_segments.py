@@ -0,0 +1,216 @@
+"""
+Face Blur Segments - Segment-Parallel Video Processing
+- Splits a long video at keyframes into N segments
+- One process per segment: own decoder, detector and encoder
+- Segments joined by stream copy (no re-encode), audio muxed once
+- Live progress from every process, cancel stops them all
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import cv2
+
+from face_blur_buffers import FramePool
+from face_blur_encoder import (
+    FFmpegPipeReader, FFmpegPipeWriter, concat_segments, probe_keyframes
+)
+from face_blur_pipeline import FramePipeline
+
+
+Segment = namedtuple("Segment", "index start_time start_frame frames")
+
+# Per-process state, set up by the pool initializer
+_state = {}
+
+# Frames between progress messages from a worker
+PROGRESS_EVERY = 10
+
+# Seconds between live preview frames from all workers together: with N workers
+# each sends one every N seconds (the parent coalesces them further)
+PREVIEW_EVERY_S = 1.0
+
+
+def plan_segments(keyframes, total_frames, fps, n_segments):
+    """Split at the keyframes nearest to equal-length cut points.
+
+    Cutting only at keyframes means each segment decodes on its own
+    without frames from its neighbour. Returns a list of Segment; the last
+    one has frames=None (read to the end, whatever the container claims).
+    """
+    if not keyframes or n_segments <= 1 or total_frames <= 1:
+        return [Segment(0, 0.0, 0, None)]
+    t0 = keyframes[0]
+    # (frame index, seek time relative to the start of the stream)
+    candidates = [(round((t - t0) * fps), t - t0) for t in keyframes]
+    cuts = []
+    for k in range(1, n_segments):
+        target = total_frames * k / n_segments
+        frame, t = min(candidates, key=lambda c: abs(c[0] - target))
+        if 0 < frame < total_frames and (not cuts or frame > cuts[-1][0]):
+            cuts.append((frame, t))
+    starts = [(0, 0.0)] + cuts
+    segments = []
+    for i, (frame, t) in enumerate(starts):
+        frames = starts[i + 1][0] - frame if i + 1 < len(starts) else None
+        segments.append(Segment(i, t, frame, frames))
+    return segments
+
+
+def _init_worker(blurrer_kwargs, detect_interval, dedup_threshold, encode_opts, preview, messages, cancel):
+    # One process per segment already; stop OpenCV from oversubscribing each one
+    cv2.setNumThreads(1)
+    from face_blur_core import FaceBlurrer
+    _state.update(
+        blurrer=FaceBlurrer(**blurrer_kwargs), detect_interval=detect_interval,
+        dedup_threshold=dedup_threshold, encode_opts=encode_opts, messages=messages, cancel=cancel,
+        preview_size=preview[0], preview_every=preview[1],
+    )
+
+
+def _preview_frame(frame, boxes, size):
+    # Shrunk to the GUI's preview area here: the frame goes through a pipe
+    h, w = frame.shape[:2]
+    scale = min(1.0, size[0] / w, size[1] / h)
+    if scale == 1.0:
+        return frame.copy(), [tuple(b[:4]) for b in boxes]
+    small = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return small, [tuple(int(v * scale) for v in b[:4]) for b in boxes]
+
+
+def _run_segment(job):
+    """Detect/blur/encode one segment; returns (index, boxes per frame, detections skipped).
+
+    Its last message, sent however it ends, is ('done', index, None).
+    """
+    seg, input_path, out_path, width, height, fps = job
+    try:
+        return _blur_segment(seg, input_path, out_path, width, height, fps)
+    finally:
+        _state['messages'].put(('done', seg.index, None))
+
+
+def _blur_segment(seg, input_path, out_path, width, height, fps):
+    messages, cancel = _state['messages'], _state['cancel']
+    detector = _state['blurrer']
+    gate = None
+    if _state['detect_interval'] > 1:
+        from face_blur_tracking import KeyframeTracker
+        # Fresh tracker per segment: every segment starts on a keyframe
+        detector = KeyframeTracker(detector, interval=_state['detect_interval'])
+    elif _state['dedup_threshold']:
+        from face_blur_dedup import DuplicateGate
+        from face_blur_core import DEDUP_MAX_REUSE
+        detector = gate = DuplicateGate(detector, _state['dedup_threshold'], max_reuse=DEDUP_MAX_REUSE)
+
+    reader = FFmpegPipeReader(input_path, width, height, seg.start_time, seg.frames)
+    writer = FFmpegPipeWriter(out_path, width, height, fps, **_state['encode_opts'])
+    all_boxes = []
+    last_preview = [time.perf_counter()]
+
+    def on_frame(idx, blurred, boxes):
+        all_boxes.append([tuple(int(v) for v in b[:4]) for b in boxes])
+        now = time.perf_counter()
+        # First frame of the video, then a live frame from every segment now and then
+        if (idx == 0 and seg.index == 0) or now - last_preview[0] >= _state['preview_every']:
+            last_preview[0] = now
+            messages.put(('preview', seg.index, _preview_frame(blurred, boxes, _state['preview_size'])))
+        if (idx + 1) % PROGRESS_EVERY == 0:
+            messages.put(('progress', seg.index, idx + 1))
+
+    # Decode into recycled frames, returned to the pool once piped to the encoder
+    pool = FramePool((height, width, 3))
+    pipeline = FramePipeline(pool.reader(reader.read), detector.detect_and_blur_faces, pool.writer(writer.write),
+                             on_frame=on_frame, is_cancelled=cancel.is_set)
+    try:
+        pipeline.run()
+    except Exception:
+        writer.abort()
+        raise
+    finally:
+        reader.release()
+    if cancel.is_set():
+        writer.abort()
+        return seg.index, None, 0
+    writer.release()
+    messages.put(('progress', seg.index, len(all_boxes)))
+    return seg.index, all_boxes, gate.skipped if gate is not None else 0
+
+
+def run_segmented(input_path, output_path, width, height, fps, total_frames, n_segments,
+                  blurrer_kwargs, detect_interval=1, encode_opts=None,
+                  on_progress=None, on_preview=None, is_cancelled=None, workers=None,
+                  dedup_threshold=None, on_skipped=None, preview_size=(800, 800)):
+    """Blur a video as `n_segments` keyframe-aligned segments in parallel processes.
+
+    on_progress(done, total)   -> frames finished across all segments
+    on_preview(frame, boxes)   -> blurred frames fitted into preview_size (w, h) with
+                                  their boxes: the first one, then about one a second
+    is_cancelled()             -> polled while the segments run
+    on_skipped(n)              -> near-duplicate frames whose detection was
+                                  skipped (dedup_threshold set, no tracking)
+
+    Returns the per-frame boxes in order, or None if cancelled. Raises if
+    any segment or the final concat fails; partial output is removed.
+    """
+    is_cancelled = is_cancelled or (lambda: False)
+    segments = plan_segments(probe_keyframes(input_path), total_frames, fps, n_segments)
+    tmp_dir = tempfile.mkdtemp(prefix="face-blur-seg-",
+                               dir=os.path.dirname(os.path.abspath(output_path)))
+    seg_paths = [os.path.join(tmp_dir, f"seg_{s.index:03d}.mp4") for s in segments]
+    jobs = [(s, input_path, p, width, height, fps) for s, p in zip(segments, seg_paths)]
+
+    ctx = mp.get_context("spawn")
+    messages = ctx.Queue()
+    cancel = ctx.Event()
+    done = [0] * len(segments)
+    results = {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(segments)))
+    pool = ctx.Pool(workers, initializer=_init_worker,
+                    initargs=(blurrer_kwargs, detect_interval, dedup_threshold, encode_opts or {},
+                              (preview_size, PREVIEW_EVERY_S * workers), messages, cancel))
+    finished = set()
+    try:
+        pending = pool.map_async(_run_segment, jobs, chunksize=1)
+        while True:
+            if is_cancelled() and not cancel.is_set():
+                cancel.set()
+            try:
+                kind, idx, payload = messages.get(timeout=0.1)
+            except queue.Empty:
+                # Read until every segment's 'done': a worker whose queue still holds
+                # messages blocks on exit, and pool.join() with it
+                if pending.ready() and (len(finished) == len(segments) or not pending.successful()):
+                    break
+                continue
+            if kind == 'done':
+                finished.add(idx)
+            elif kind == 'progress':
+                done[idx] = payload
+                if on_progress:
+                    on_progress(min(sum(done), total_frames), total_frames)
+            elif kind == 'preview' and on_preview:
+                on_preview(*payload)
+        results = {idx: (boxes, skipped) for idx, boxes, skipped in pending.get()}
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        pool.join()
+
+    try:
+        if cancel.is_set() or any(r[0] is None for r in results.values()):
+            return None
+        concat_segments(seg_paths, output_path, audio_source=input_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if on_skipped and dedup_threshold and detect_interval == 1:
+        on_skipped(sum(r[1] for r in results.values()))
+    return [boxes for i in range(len(segments)) for boxes in results[i][0]]
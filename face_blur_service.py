@@ -0,0 +1,593 @@
+"""
+Face Blur Service - Watch-Folder Job Daemon
+- SQLite job queue that survives restarts (interrupted jobs are re-queued;
+  videos run resumable, so they continue from their last checkpoint)
+- Watch folders: new files are queued once they stop changing
+- Local HTTP API: submit, list, inspect and cancel jobs, read metrics
+- Worker process pool with priorities and per-kind concurrency limits
+- Metrics: queue depth, throughput, queue wait and run latency
+
+    python face_blur_service.py --watch inbox/ -o outbox/ -j 4 --max-video 1
+    curl -X POST localhost:8765/jobs -d '{"input": "/data/a.jpg", "priority": 5}'
+    curl localhost:8765/metrics
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from face_blur_batch import collect_inputs
+from face_blur_core import IMAGE_EXTS, VIDEO_EXTS, output_path_for
+from face_blur_kernels import BLUR_ENGINES
+
+
+log = logging.getLogger(__name__)
+
+# Job settings a client may set; everything else is a BlurWorker default
+JOB_SETTINGS = (
+    'confidence', 'model_selection', 'group_mode', 'detect_interval', 'blur_engine', 'detect_size',
+    'tile_size', 'use_manifest', 'low_memory', 'still_encode', 'video_codec', 'crf', 'preset', 'resumable',
+    'dedup_threshold',
+)
+
+# A job interrupted this many times (crash, kill) is failed instead of retried
+MAX_ATTEMPTS = 3
+
+# Finished jobs the latency percentiles are computed over
+LATENCY_WINDOW = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    settings TEXT NOT NULL DEFAULT '{}',
+    source TEXT NOT NULL DEFAULT 'api',
+    input_mtime_ns INTEGER,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, id);
+CREATE INDEX IF NOT EXISTS jobs_input ON jobs (input_path);
+"""
+
+
+def job_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTS:
+        return 'image'
+    if ext in VIDEO_EXTS:
+        return 'video'
+    raise ValueError(f"Unsupported file format: {ext}")
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class JobQueue:
+    """Persistent job queue. Statuses: queued, running, done, failed, cancelled.
+
+    One connection shared by the API, watcher and scheduler threads,
+    serialized by a lock; WAL keeps each commit cheap.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def recover(self):
+        """Re-queue jobs that were running when the service stopped."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status = 'failed', finished = ?, "
+                             "error = 'interrupted too many times' "
+                             "WHERE status = 'running' AND attempts >= ?", (time.time(), MAX_ATTEMPTS))
+            n = self._db.execute("UPDATE jobs SET status = 'queued', started = NULL "
+                                 "WHERE status = 'running'").rowcount
+        return n
+
+    def add(self, input_path, output_path, priority=0, settings=None, source='api', input_mtime_ns=None):
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "INSERT INTO jobs (input_path, output_path, kind, priority, settings, source, "
+                "input_mtime_ns, submitted) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (input_path, output_path, job_kind(input_path), int(priority),
+                 json.dumps(settings or {}), source, input_mtime_ns, time.time()))
+        return cur.lastrowid
+
+    def claim(self, kinds):
+        """Mark the most urgent queued job of one of `kinds` running and return it."""
+        if not kinds:
+            return None
+        marks = ','.join('?' * len(kinds))
+        with self._lock, self._db:
+            row = self._db.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' AND kind IN ({marks}) "
+                "ORDER BY priority DESC, id LIMIT 1", tuple(kinds)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE jobs SET status = 'running', started = ?, attempts = attempts + 1 "
+                             "WHERE id = ?", (time.time(), row['id']))
+        return dict(row)
+
+    def requeue(self, job_id, error):
+        """Put a running job back in the queue, or fail it once it has run MAX_ATTEMPTS times."""
+        with self._lock, self._db:
+            row = self._db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row['attempts'] >= MAX_ATTEMPTS:
+                self._db.execute("UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE id = ?",
+                                 (time.time(), error, job_id))
+                return False
+            self._db.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE id = ?", (job_id,))
+        return True
+
+    def finish(self, job_id, ok, error=None):
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ?",
+                             ('done' if ok else 'failed', time.time(), error, job_id))
+
+    def cancel(self, job_id):
+        """Cancel a queued job; running jobs are left to finish. Returns True if cancelled."""
+        with self._lock, self._db:
+            return self._db.execute("UPDATE jobs SET status = 'cancelled', finished = ? "
+                                    "WHERE id = ? AND status = 'queued'", (time.time(), job_id)).rowcount == 1
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, status=None, limit=100):
+        query, args = "SELECT * FROM jobs", ()
+        if status:
+            query, args = query + " WHERE status = ?", (status,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id DESC LIMIT ?", args + (int(limit),)).fetchall()
+        return [dict(r) for r in rows]
+
+    def known(self, input_path, mtime_ns):
+        """True if this version of the file was already queued (by anyone)."""
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM jobs WHERE input_path = ? AND input_mtime_ns = ? LIMIT 1",
+                                    (input_path, mtime_ns)).fetchone() is not None
+
+    def metrics(self, window=60.0):
+        now = time.time()
+        with self._lock:
+            depth = {r[0]: r[1] for r in self._db.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status")}
+            queued = {r[0]: r[1] for r in self._db.execute(
+                "SELECT kind, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY kind")}
+            recent = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'done' AND finished >= ?",
+                                      (now - window,)).fetchone()[0]
+            rows = self._db.execute(
+                "SELECT submitted, started, finished FROM jobs WHERE status = 'done' "
+                "ORDER BY finished DESC LIMIT ?", (LATENCY_WINDOW,)).fetchall()
+        wait = [r['started'] - r['submitted'] for r in rows]
+        run = [r['finished'] - r['started'] for r in rows]
+        total = [r['finished'] - r['submitted'] for r in rows]
+        latency = {name: {'p50_s': _percentile(v, 0.5), 'p95_s': _percentile(v, 0.95),
+                          'max_s': max(v) if v else None}
+                   for name, v in (('wait', wait), ('run', run), ('total', total))}
+        return {'depth': depth, 'queued_by_kind': queued,
+                'throughput_per_min': recent * 60.0 / window, 'latency': latency,
+                'latency_sample': len(rows)}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _init_process(threads):
+    import cv2
+    # Ctrl-C reaches the whole process group: let the parent decide, jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Pool processes share the cores: stop OpenCV from oversubscribing each one
+    cv2.setNumThreads(threads)
+
+
+def _run_job(input_path, output_path, settings):
+    """Run one job in a pool process; returns (ok, error)."""
+    from face_blur_worker import BlurWorker
+    result = {}
+    settings = dict(settings)
+    confidence = settings.pop('confidence', 0.5)
+    model_selection = settings.pop('model_selection', 0)
+    worker = BlurWorker(input_path, output_path, confidence, model_selection, **settings)
+    # Direct connections: slots run inline, no event loop needed
+    worker.finished.connect(lambda path: result.update(output=path))
+    worker.error.connect(lambda msg: result.update(error=msg))
+    worker.run()
+    if 'error' in result:
+        return False, result['error']
+    if 'output' not in result:
+        return False, "Job ended without output"
+    return True, None
+
+
+class Scheduler:
+    """Feeds queued jobs to a process pool.
+
+    At most `workers` jobs run at once and at most `max_video` of them are
+    videos (a video holds a process far longer than a photo). Higher
+    priority first, then submission order.
+    """
+
+    def __init__(self, queue, workers=2, max_video=1, defaults=None):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.max_video = max(0, min(max_video, self.workers))
+        self.defaults = defaults or {}
+        self.running = {'image': 0, 'video': 0}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pool = self._new_pool()
+        self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _new_pool(self):
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        return ProcessPoolExecutor(self.workers, mp_context=mp.get_context('spawn'),
+                                   initializer=_init_process, initargs=(threads,))
+
+    def _replace_pool(self, broken):
+        """Swap a pool broken by a dead process for a fresh one (once, however many jobs noticed)."""
+        with self._lock:
+            if self._pool is not broken or self._stop.is_set():
+                return
+            self._pool = self._new_pool()
+        log.warning("a worker process died; restarted the process pool")
+        broken.shutdown(wait=False)
+
+    def _free_kinds(self):
+        with self._lock:
+            if sum(self.running.values()) >= self.workers:
+                return []
+            kinds = ['image']
+            if self.running['video'] < self.max_video:
+                kinds.append('video')
+            return kinds
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self._free_kinds())
+                if job is not None:
+                    self._submit(job)
+                    continue
+            except Exception:
+                # One bad job or a database hiccup must not end the scheduler
+                log.exception("scheduler error")
+            # New jobs and finished ones wake us; the timeout catches anything else
+            self._wake.wait(1.0)
+            self._wake.clear()
+
+    def _submit(self, job):
+        settings = dict(self.defaults)
+        if job['kind'] == 'video':
+            # A restart continues the video from its last checkpoint
+            settings['resumable'] = True
+        settings.update(json.loads(job['settings']))
+        with self._lock:
+            self.running[job['kind']] += 1
+            pool = self._pool
+        try:
+            fut = pool.submit(_run_job, job['input_path'], job['output_path'], settings)
+        except Exception as e:
+            with self._lock:
+                self.running[job['kind']] -= 1
+            self.queue.requeue(job['id'], f"could not start: {e}")
+            if not isinstance(e, BrokenProcessPool):
+                raise
+            # Broken by a death the done-callbacks have not handled yet
+            self._replace_pool(pool)
+            return
+        log.info("job %d started: %s", job['id'], job['input_path'])
+        fut.add_done_callback(lambda f, job=job, pool=pool: self._done(job, f, pool))
+
+    def _done(self, job, fut, pool):
+        with self._lock:
+            self.running[job['kind']] -= 1
+        try:
+            ok, error = fut.result()
+        except Exception as e:
+            if self._stop.is_set():
+                # Killed while shutting down: leave it 'running' so the next start re-queues it
+                return
+            if not isinstance(e, BrokenProcessPool):
+                ok, error = False, f"worker process failed: {e}"
+            else:
+                # A process died (crash, OOM kill) and took the pool and every job in it
+                # down: retry them in a new pool; a job that keeps killing it is failed
+                self._replace_pool(pool)
+                retried = self.queue.requeue(job['id'], f"worker process died: {e}")
+                log.info("job %d %s after its worker process died", job['id'],
+                         'queued again' if retried else 'failed')
+                self.wake()
+                return
+        self.queue.finish(job['id'], ok, error)
+        log.info("job %d %s%s", job['id'], 'done' if ok else 'failed', f": {error}" if error else '')
+        self.wake()
+
+    def stop(self, wait=True):
+        """Stop claiming jobs; with wait, let the running ones finish."""
+        self._stop.set()
+        self.wake()
+        self._thread.join()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class FolderWatcher:
+    """Polls folders and queues each new or changed media file once it is stable.
+
+    A file counts as stable when its size and mtime are unchanged between
+    two polls, so half-copied files are not picked up.
+    """
+
+    def __init__(self, queue, folders, out_dir=None, interval=2.0, recursive=False, priority=0,
+                 settings=None, on_queued=None):
+        self.queue = queue
+        self.folders = folders
+        self.out_dir = out_dir
+        self.interval = interval
+        self.recursive = recursive
+        self.priority = priority
+        self.settings = settings or {}
+        self.on_queued = on_queued
+        self._last = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                log.exception("watch poll failed")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        fmt = (self.settings.get('still_encode') or {}).get('format')
+        files = collect_inputs(self.folders, recursive=self.recursive, exts=IMAGE_EXTS | VIDEO_EXTS)
+        seen = {}
+        for path in files:
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            seen[path] = sig
+            if self._last.get(path) != sig or self.queue.known(path, st.st_mtime_ns):
+                continue
+            out = output_path_for(path, self.out_dir, fmt)
+            if os.path.exists(out) and os.path.getmtime(out) >= st.st_mtime:
+                continue
+            job_id = self.queue.add(path, out, self.priority, self.settings, 'watch', st.st_mtime_ns)
+            log.info("job %d queued from watch folder: %s", job_id, path)
+            if self.on_queued is not None:
+                self.on_queued()
+        self._last = seen
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FaceBlurService/1.0'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, fmt, *args):
+        log.debug("%s - %s", self.address_string(), fmt % args)
+
+    def _send(self, code, body):
+        data = json.dumps(body, indent=2).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_id(self, path):
+        parts = path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'jobs' and parts[1].isdigit():
+            return int(parts[1])
+        return None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/metrics':
+            return self._send(200, self.service.metrics())
+        if url.path.rstrip('/') == '/jobs':
+            q = parse_qs(url.query)
+            try:
+                limit = int(q.get('limit', ['100'])[0])
+            except ValueError:
+                return self._send(400, {'error': 'limit must be an integer'})
+            return self._send(200, self.service.queue.list(q.get('status', [None])[0], limit))
+        job_id = self._job_id(url.path)
+        job = self.service.queue.get(job_id) if job_id is not None else None
+        if job is None:
+            return self._send(404, {'error': 'not found'})
+        return self._send(200, job)
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/jobs':
+            return self._send(404, {'error': 'not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            job_id = self.service.submit(body.get('input'), body.get('output'),
+                                         body.get('priority', 0), body.get('settings'))
+        except (ValueError, TypeError) as e:
+            return self._send(400, {'error': str(e)})
+        return self._send(201, {'id': job_id})
+
+    def do_DELETE(self):
+        job_id = self._job_id(urlparse(self.path).path)
+        if job_id is None or self.service.queue.get(job_id) is None:
+            return self._send(404, {'error': 'not found'})
+        if not self.service.queue.cancel(job_id):
+            return self._send(409, {'error': 'job is not queued'})
+        return self._send(200, {'id': job_id, 'status': 'cancelled'})
+
+
+class FaceBlurService:
+    """Queue + scheduler + optional watcher + HTTP API, started and stopped together."""
+
+    def __init__(self, db_path, watch=(), out_dir=None, workers=2, max_video=1, host='127.0.0.1',
+                 port=8765, poll_interval=2.0, recursive=False, defaults=None):
+        self.queue = JobQueue(db_path)
+        self.out_dir = out_dir
+        self.defaults = defaults or {}
+        self.started = time.time()
+        self.scheduler = Scheduler(self.queue, workers, max_video, self.defaults)
+        self.watcher = None
+        if watch:
+            self.watcher = FolderWatcher(self.queue, list(watch), out_dir, poll_interval, recursive,
+                                         on_queued=self.scheduler.wake)
+        self.httpd = None
+        if port is not None:
+            self.httpd = ThreadingHTTPServer((host, port), _Handler)
+            self.httpd.service = self
+
+    def submit(self, input_path, output_path=None, priority=0, settings=None):
+        if not input_path or not os.path.isfile(input_path):
+            raise ValueError(f"input not found: {input_path}")
+        settings = settings or {}
+        if not isinstance(settings, dict):
+            raise TypeError("settings must be an object")
+        unknown = set(settings) - set(JOB_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown settings: {', '.join(sorted(unknown))}")
+        if 'blur_engine' in settings and settings['blur_engine'] not in BLUR_ENGINES:
+            raise ValueError(f"unknown blur_engine: {settings['blur_engine']}")
+        input_path = os.path.abspath(input_path)
+        fmt = (settings.get('still_encode') or {}).get('format')
+        output_path = output_path or output_path_for(input_path, self.out_dir, fmt)
+        priority = int(priority)
+        job_id = self.queue.add(input_path, output_path, priority, settings, 'api',
+                                os.stat(input_path).st_mtime_ns)
+        log.info("job %d queued from API: %s (priority %d)", job_id, input_path, priority)
+        self.scheduler.wake()
+        return job_id
+
+    def metrics(self):
+        m = self.queue.metrics()
+        with self.scheduler._lock:
+            running = dict(self.scheduler.running)
+        m.update(uptime_s=time.time() - self.started, running=running,
+                 limits={'workers': self.scheduler.workers, 'max_video': self.scheduler.max_video})
+        return m
+
+    def start(self):
+        n = self.queue.recover()
+        if n:
+            log.info("re-queued %d job(s) interrupted by the last shutdown", n)
+        self.scheduler.start()
+        if self.watcher is not None:
+            self.watcher.start()
+        if self.httpd is not None:
+            threading.Thread(target=self.httpd.serve_forever, name='http', daemon=True).start()
+            log.info("API on http://%s:%d", *self.httpd.server_address[:2])
+
+    def stop(self):
+        log.info("stopping: waiting for running jobs")
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.scheduler.stop(wait=True)
+        self.queue.close()
+
+
+def _detect_size(value):
+    return value if value == 'auto' else int(value)
+
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(description="Face blur job service: watch folders + local HTTP API.")
+    p.add_argument("-w", "--watch", action="append", default=[], help="Folder to watch (repeatable)")
+    p.add_argument("-o", "--out-dir", help="Output directory (default: next to each input)")
+    p.add_argument("-r", "--recursive", action="store_true", help="Watch subfolders too")
+    p.add_argument("--db", default="face_blur_jobs.db", help="SQLite queue file (default: face_blur_jobs.db)")
+    p.add_argument("--host", default="127.0.0.1", help="API address (default: localhost only)")
+    p.add_argument("--port", type=int, default=8765, help="API port; 0 disables the API (default: 8765)")
+    p.add_argument("-j", "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                   help="Jobs running at once (default: half the cores)")
+    p.add_argument("--max-video", type=int, default=1, help="Videos running at once (default: 1)")
+    p.add_argument("--poll", type=float, default=2.0, help="Watch-folder poll interval in seconds")
+    p.add_argument("-c", "--confidence", type=float, default=0.5, help="Detection confidence (0-1)")
+    p.add_argument("-m", "--model", type=int, choices=(0, 1), default=0,
+                   help="0 = short range (0-2m), 1 = full range (2-5m)")
+    p.add_argument("-g", "--group", action="store_true", help="Group Photo Mode (dual-pass + Haar)")
+    p.add_argument("-b", "--blur", choices=sorted(BLUR_ENGINES), default=None, help="Anonymization engine")
+    p.add_argument("--detect-size", type=_detect_size, default=None,
+                   help="Detection resolution: longest side in px, or 'auto' (default: full)")
+    p.add_argument("-v", "--verbose", action="store_true", help="Log every HTTP request")
+    return p
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    defaults = dict(confidence=args.confidence, model_selection=args.model, group_mode=args.group,
+                    detect_size=args.detect_size)
+    if args.blur:
+        defaults['blur_engine'] = args.blur
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    service = FaceBlurService(args.db, args.watch, args.out_dir, args.workers, args.max_video, args.host,
+                              args.port or None, args.poll, args.recursive, defaults)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    service.start()
+    stop.wait()
+    service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Face Blur Shared-Memory Detection - Frame-Level Multiprocess Detection
+- Frames decoded straight into a shared-memory ring of frame slots
+- A pool of detector processes reads the slots in place
+- Only (seq, slot) tasks and box lists cross the process boundary
+- Results reassembled in frame order before blur/encode
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# In-flight frames per detector process: enough to keep each one busy
+SLOTS_PER_WORKER = 2
+
+
+def _detect_loop(shm_name, shape, blurrer_kwargs, tasks, results):
+    import cv2
+    # One process per core already; stop OpenCV from oversubscribing each one
+    cv2.setNumThreads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        from face_blur_core import FaceBlurrer
+        blurrer = FaceBlurrer(**blurrer_kwargs)
+        try:
+            while True:
+                task = tasks.get()
+                if task is None:
+                    return
+                seq, slot = task
+                start = time.perf_counter()
+                try:
+                    boxes = [tuple(int(v) for v in b[:4]) for b in blurrer.detect_boxes(frames[slot])]
+                except Exception as e:
+                    results.put((seq, slot, None, f"{type(e).__name__}: {e}"))
+                    continue
+                results.put((seq, slot, boxes, time.perf_counter() - start))
+        finally:
+            blurrer.cleanup()
+            del frames
+    finally:
+        shm.close()
+
+
+class SharedFrameDetector:
+    """Ordered multiprocess detection over a shared-memory frame ring.
+
+    Use read() as a FramePipeline read_frame: it keeps every detector
+    process fed from `read_frame` and returns (ok, (frame, boxes)) in
+    decode order. read_frame(buf) is offered the slot to decode into
+    (the ffmpeg pipe reader fills it; VideoCapture allocates, and that
+    frame is copied in) and the result is copied out once, into a
+    FramePool frame when a pool is given; the pixels are never pickled.
+    """
+
+    def __init__(self, width, height, blurrer_kwargs, workers=None, stats=None,
+                 is_cancelled=None):
+        self.workers = max(1, workers or (os.cpu_count() or 2) - 1)
+        self.n_slots = self.workers * SLOTS_PER_WORKER
+        self.shape = (self.n_slots, height, width, 3)
+        self.stats = stats
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)))
+        self.frames = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.procs = []
+        try:
+            ctx = mp.get_context("spawn")
+            self.tasks = ctx.Queue()
+            self.results = ctx.Queue()
+            for i in range(self.workers):
+                p = ctx.Process(target=_detect_loop, name=f"face-detect-{i}", daemon=True,
+                                args=(self.shm.name, self.shape, blurrer_kwargs, self.tasks, self.results))
+                p.start()
+                self.procs.append(p)
+        except BaseException:
+            # close() never runs for a half-built detector: stop the workers
+            # already started and release the segment, or it outlives the app
+            for p in self.procs:
+                p.terminate()
+                p.join()
+            del self.frames
+            self.shm.close()
+            self.shm.unlink()
+            raise
+        self.free = list(range(self.n_slots))
+        self.done = {}       # seq -> (slot, boxes) finished out of order
+        self.next_seq = 0    # next frame to hand out
+        self.sent = 0        # frames dispatched
+        self.eof = False
+
+    def _fill(self, read_frame):
+        while self.free and not self.eof:
+            slot = self.free.pop()
+            buf = self.frames[slot]
+            ok, frame = read_frame(buf)
+            if not ok:
+                self.free.append(slot)
+                self.eof = True
+                return
+            if frame is not buf:
+                if frame.shape != self.shape[1:]:
+                    raise RuntimeError(f"Frame size changed mid-stream: {frame.shape[:2]}")
+                np.copyto(buf, frame)
+            self.tasks.put((self.sent, slot))
+            self.sent += 1
+
+    def _collect(self):
+        while self.next_seq not in self.done:
+            if self.is_cancelled():
+                return False
+            try:
+                seq, slot, boxes, info = self.results.get(timeout=0.1)
+            except queue.Empty:
+                if not all(p.is_alive() for p in self.procs):
+                    raise RuntimeError("A detector process exited unexpectedly")
+                continue
+            if boxes is None:
+                raise RuntimeError(f"Detection failed on frame {seq}: {info}")
+            if self.stats is not None:
+                self.stats.add('detect', info)
+            self.done[seq] = (slot, boxes)
+        return True
+
+    def reader(self, read_frame, pool=None):
+        """Wrap `read_frame` into an ordered read() -> (ok, (frame, boxes))."""
+        def read():
+            self._fill(read_frame)
+            if self.next_seq >= self.sent or not self._collect():
+                return False, None
+            slot, boxes = self.done.pop(self.next_seq)
+            frame = pool.acquire() if pool is not None else np.empty(self.shape[1:], dtype=np.uint8)
+            np.copyto(frame, self.frames[slot])
+            self.free.append(slot)
+            self.next_seq += 1
+            return True, (frame, boxes)
+        return read
+
+    def close(self):
+        for _ in self.procs:
+            self.tasks.put(None)
+        for p in self.procs:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
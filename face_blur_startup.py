@@ -0,0 +1,207 @@
+"""
+Face Blur Startup - Lazy Imports and Start-up Profiling
+- lazy_import(): a module stand-in that imports on first attribute use,
+  so MediaPipe / OpenCV load when a detector or blur is first needed
+- StartupProfile: import + initialization time of every module (self and
+  cumulative, like python -X importtime, but also inside the frozen EXE)
+  plus named start-up phases, as a report comparable against a baseline
+"""
+
+import importlib
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager, nullcontext
+
+
+class _LazyModule(types.ModuleType):
+    """Placeholder that imports the real module on first attribute access.
+
+    The import goes through importlib, so it is thread-safe: a detector
+    warming up in the background and the GUI thread share one import.
+    """
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self.__name__), attr)
+        # Cache on the placeholder so later lookups skip __getattr__
+        setattr(self, attr, value)
+        return value
+
+
+def lazy_import(name):
+    """The module if already imported, else a placeholder that imports it when used."""
+    module = sys.modules.get(name)
+    return module if module is not None else _LazyModule(name)
+
+
+class _ImportTimer:
+    """sys.meta_path hook timing each module's load and execution (its import cost).
+
+    Extension modules (cv2, PyQt5) do their work in create_module, Python
+    modules in exec_module; both are timed and added up.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self._local = threading.local()
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Loaders may be shared (PyInstaller's FrozenImporter): wrap each once.
+            # Class loaders (builtin / frozen stdlib modules) are left alone
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module') \
+                    and not getattr(loader, '_startup_timed', False):
+                try:
+                    if hasattr(loader, 'create_module'):
+                        loader.create_module = self._timed(loader.create_module)
+                    loader.exec_module = self._timed(loader.exec_module)
+                    loader._startup_timed = True
+                except (AttributeError, TypeError):
+                    pass
+            return spec
+        return None
+
+    def _timed(self, step):
+        # step(spec) or step(module); nested imports count towards the parent's cumulative time only
+        def timed(target):
+            stack = getattr(self._local, 'stack', None)
+            if stack is None:
+                stack = self._local.stack = []
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return step(target)
+            finally:
+                total = time.perf_counter() - start
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += total
+                name = getattr(target, '__name__', None) or target.name
+                self.profile.record_import(name, total - nested, total)
+        return timed
+
+
+class StartupProfile:
+    """Start-up timings: per-module import cost and named phases.
+
+    Disabled profiles cost nothing (no import hook, no-op phases), so
+    callers can hold one unconditionally.
+    """
+
+    # Milestones compared against a baseline (ms since the profile started)
+    HEADLINE = ('window_visible', 'engine_ready', 'detector_ready')
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.modules = {}     # name -> (self_s, cumulative_s)
+        self.phases = {}      # name -> seconds
+        self.milestones = {}  # name -> seconds since start
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        if enabled:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+
+    def record_import(self, name, self_s, cumulative_s):
+        with self._lock:
+            prev_self, prev_cum = self.modules.get(name, (0.0, 0.0))
+            self.modules[name] = (prev_self + self_s, prev_cum + cumulative_s)
+
+    def phase(self, name):
+        """Context manager timing one start-up step under `name`."""
+        if not self.enabled:
+            return nullcontext()
+        return self._phase(name)
+
+    @contextmanager
+    def _phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def mark(self, name):
+        if self.enabled:
+            self.milestones[name] = time.perf_counter() - self.started
+
+    def stop(self):
+        if self._timer is not None and self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+    def report(self, top=15):
+        with self._lock:
+            modules = dict(self.modules)
+        # Self time summed per top-level package: "what does importing cv2 cost"
+        packages = {}
+        for name, (self_s, _) in modules.items():
+            root = name.split('.')[0]
+            packages[root] = packages.get(root, 0.0) + self_s
+        ms = lambda s: round(s * 1000, 1)
+        return {
+            'milestones_ms': {k: ms(v) for k, v in self.milestones.items()},
+            'phases_ms': {k: ms(v) for k, v in self.phases.items()},
+            'packages_ms': {k: ms(v) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])[:top]},
+            'modules_ms': [{'module': n, 'self': ms(s), 'cumulative': ms(c)}
+                           for n, (s, c) in sorted(modules.items(), key=lambda kv: -kv[1][0])[:top]],
+            'modules_imported': len(modules),
+            'errors': dict(self.errors),
+        }
+
+    @classmethod
+    def compare(cls, report, baseline, threshold=0.2, floor_ms=20.0):
+        """Headline milestones slower than baseline by > threshold (and > floor_ms)."""
+        regressions = []
+        for key in cls.HEADLINE:
+            now = report['milestones_ms'].get(key)
+            base = baseline.get('milestones_ms', {}).get(key)
+            if now is None or base is None:
+                continue
+            if now > base * (1 + threshold) and now - base > floor_ms:
+                regressions.append(f"{key}: {base:.0f} ms -> {now:.0f} ms (+{(now / base - 1) * 100:.0f}%)")
+        return regressions
+
+
+def median_report(reports):
+    """Combine reports of several cold starts: median milestones and phases, the median run's modules."""
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+    merged = dict(reports[0])
+    for key in ('milestones_ms', 'phases_ms'):
+        # Keep the order the steps ran in
+        names = dict.fromkeys(n for r in reports for n in r[key])
+        merged[key] = {n: median([r[key][n] for r in reports if n in r[key]]) for n in names}
+    last = StartupProfile.HEADLINE[-1]
+    timed = [r for r in reports if last in r['milestones_ms']] or reports
+    middle = median([(r['milestones_ms'].get(last, 0.0), i) for i, r in enumerate(timed)])[1]
+    merged.update({k: timed[middle][k] for k in ('packages_ms', 'modules_ms', 'modules_imported')})
+    merged['runs'] = len(reports)
+    return merged
+
+
+def format_report(report):
+    runs = report.get('runs', 1)
+    lines = [f"Start-up milestones (ms since launch{f', median of {runs} runs' if runs > 1 else ''}):"]
+    lines += [f"  {k:16s} {v:9.1f}" for k, v in report['milestones_ms'].items()]
+    lines.append("Phases (ms):")
+    lines += [f"  {k:16s} {v:9.1f}" for k, v in report['phases_ms'].items()]
+    lines.append(f"Import cost by package (ms, {report['modules_imported']} modules):")
+    lines += [f"  {k:24s} {v:9.1f}" for k, v in report['packages_ms'].items()]
+    lines.append("Slowest modules (self / cumulative ms):")
+    lines += [f"  {m['module'][:40]:40s} {m['self']:9.1f} {m['cumulative']:9.1f}" for m in report['modules_ms']]
+    for k, v in report['errors'].items():
+        lines.append(f"{k} failed: {v}")
+    return "\n".join(lines)
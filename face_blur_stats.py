@@ -0,0 +1,186 @@
+"""
+Face Blur Stats - Per-Stage Timing Instrumentation
+- Stage timers (decode, MediaPipe, Haar, dedup, blur, encode, remux ...)
+- Counters: frames, boxes per frame, detector hits
+- JSON / CSV report per job
+- NULL_STATS keeps the disabled path to a no-op method call
+- RateMeter: current frames/s and ETA for progress displays
+"""
+
+import csv
+import json
+import time
+from collections import Counter, deque
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullStats:
+    """Disabled instrumentation: every call is a no-op."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def add(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def frame(self, n_boxes):
+        pass
+
+    def wrap(self, name, fn):
+        return fn
+
+
+NULL_STATS = NullStats()
+
+
+class _Stage:
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class JobStats(NullStats):
+    """Collects stage timings and counters for one job.
+
+    Each stage name is only ever recorded from one thread (decode on the
+    decoder, encode on the encoder, the rest on the worker), so the
+    per-key updates need no lock.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = {}
+        self.calls = {}
+        self.maxes = {}
+        self.counters = Counter()
+        self.frames = 0
+        self.boxes_total = 0
+        self.boxes_max = 0
+        self.box_hist = Counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if seconds > self.maxes.get(name, 0.0):
+            self.maxes[name] = seconds
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def frame(self, n_boxes):
+        self.frames += 1
+        self.boxes_total += n_boxes
+        self.box_hist[n_boxes] += 1
+        if n_boxes > self.boxes_max:
+            self.boxes_max = n_boxes
+
+    def wrap(self, name, fn):
+        """Return fn timed under `name`."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+        return timed
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        stages = {}
+        for name, total in list(self.totals.items()):
+            calls = self.calls.get(name, 1)
+            stages[name] = {
+                'total_ms': total * 1000,
+                'calls': calls,
+                'mean_ms': total * 1000 / max(calls, 1),
+                'max_ms': self.maxes.get(name, 0.0) * 1000,
+            }
+        return {
+            'elapsed_s': elapsed,
+            'frames': self.frames,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'boxes_total': self.boxes_total,
+            'boxes_per_frame': self.boxes_total / self.frames if self.frames else 0.0,
+            'boxes_max': self.boxes_max,
+            'boxes_histogram': {str(k): v for k, v in sorted(self.box_hist.items())},
+            'counters': dict(self.counters),
+            'stages': stages,
+        }
+
+    def write_report(self, base_path, extra=None):
+        """Write <base>_stats.json and <base>_stats.csv; returns both paths."""
+        snap = self.snapshot()
+        if extra:
+            snap.update(extra)
+        json_path = base_path + '_stats.json'
+        csv_path = base_path + '_stats.csv'
+        with open(json_path, 'w') as f:
+            json.dump(snap, f, indent=2)
+        with open(csv_path, 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['kind', 'name', 'total_ms', 'calls', 'mean_ms', 'max_ms'])
+            for name, s in sorted(snap['stages'].items(), key=lambda kv: -kv[1]['total_ms']):
+                w.writerow(['stage', name, f"{s['total_ms']:.3f}", s['calls'], f"{s['mean_ms']:.3f}", f"{s['max_ms']:.3f}"])
+            for name, value in sorted(snap['counters'].items()):
+                w.writerow(['counter', name, '', value, '', ''])
+            w.writerow(['counter', 'frames', '', snap['frames'], '', ''])
+            w.writerow(['counter', 'boxes_total', '', snap['boxes_total'], '', ''])
+        return json_path, csv_path
+
+
+class RateMeter:
+    """Frames/s over the last `window` seconds, and the ETA at that rate.
+
+    Fed with the running frame count; a resumed job starts from its
+    checkpoint, so only frames done in this run count towards the rate.
+    """
+
+    def __init__(self, window=3.0):
+        self.window = window
+        self._samples = deque()
+
+    def update(self, done, total, now=None):
+        """Returns (fps, eta_s); eta_s is -1 until a rate is known."""
+        now = time.perf_counter() if now is None else now
+        samples = self._samples
+        samples.append((now, done))
+        # Keep one sample older than the window so the span always covers it
+        while len(samples) > 2 and now - samples[1][0] >= self.window:
+            samples.popleft()
+        t0, d0 = samples[0]
+        if now <= t0 or done <= d0:
+            return 0.0, -1.0
+        fps = (done - d0) / (now - t0)
+        return fps, max(0.0, total - done) / fps
@@ -0,0 +1,131 @@
+"""
+Face Blur Tiles - Tiled Parallel Detection for Huge Photos
+- Overlapping tiles on a small image pyramid, so every face size lands
+  in a tile at a resolution MediaPipe can see
+- Tiles run on a thread pool with one MediaPipe graph per thread
+- Boxes cut by an interior tile seam are dropped (the overlap guarantees
+  a neighbouring tile or coarser level holds the whole face)
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from face_blur_startup import lazy_import
+
+# Loaded with the first tile detector, not at import
+mp = lazy_import('mediapipe')
+
+
+def _starts(n, tile, step):
+    if n <= tile:
+        return [0]
+    starts = list(range(0, n - tile, step))
+    starts.append(n - tile)
+    return starts
+
+
+def tile_grid(img_h, img_w, tile, overlap=0.25):
+    """Overlapping (x1, y1, x2, y2) tiles covering the image."""
+    step = max(1, int(tile * (1 - overlap)))
+    return [(x, y, min(img_w, x + tile), min(img_h, y + tile))
+            for y in _starts(img_h, tile, step)
+            for x in _starts(img_w, tile, step)]
+
+
+class TiledDetector:
+    """Detect faces in overlapping tiles across a pyramid, in parallel.
+
+    Level 0 tiles the full detection image; each further level shrinks it
+    by `level_ratio` until the whole image fits in one tile. With 25%
+    overlap a tile holds whole faces up to a quarter of its size, and
+    MediaPipe finds faces down to roughly a twelfth of it, so ratios up to
+    ~3 leave no gap between levels; 2.5 keeps a margin.
+    """
+
+    def __init__(self, confidence=0.5, model_selection=1, group_mode=False,
+                 tile_size=640, overlap=0.25, workers=None, level_ratio=2.5):
+        self.confidence = confidence
+        self.model_selection = model_selection
+        self.group_mode = group_mode
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.level_ratio = level_ratio
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="face-tile")
+        self._local = threading.local()
+        self._all_detectors = []
+        self._lock = threading.Lock()
+
+    def _detectors(self):
+        # MediaPipe graphs are not thread-safe; each pool thread gets its own
+        dets = getattr(self._local, 'detectors', None)
+        if dets is None:
+            fd = mp.solutions.face_detection
+            dets = [fd.FaceDetection(min_detection_confidence=self.confidence,
+                                     model_selection=self.model_selection)]
+            if self.group_mode:
+                dets.append(fd.FaceDetection(min_detection_confidence=max(0.2, self.confidence - 0.15),
+                                             model_selection=1 - int(self.model_selection)))
+            self._local.detectors = dets
+            with self._lock:
+                self._all_detectors.extend(dets)
+        return dets
+
+    def _levels(self, rgb):
+        h, w = rgb.shape[:2]
+        scale = 1.0
+        level = rgb
+        while True:
+            yield level, scale
+            if max(level.shape[:2]) <= self.tile_size:
+                return
+            scale /= self.level_ratio
+            level = cv2.resize(rgb, (max(1, round(w * scale)), max(1, round(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+
+    def _detect_tile(self, level, scale, tile):
+        x1, y1, x2, y2 = tile
+        lh, lw = level.shape[:2]
+        crop = np.ascontiguousarray(level[y1:y2, x1:x2])
+        th, tw = crop.shape[:2]
+        inv = 1.0 / scale
+        boxes = []
+        for det in self._detectors():
+            results = det.process(crop)
+            if not results.detections:
+                continue
+            for d in results.detections:
+                rb = d.location_data.relative_bounding_box
+                bx, by = rb.xmin * tw, rb.ymin * th
+                bw, bh = rb.width * tw, rb.height * th
+                if bw <= 0 or bh <= 0:
+                    continue
+                # Cut by an interior seam: a neighbour / coarser level has the whole face
+                if ((bx <= 1 and x1 > 0) or (by <= 1 and y1 > 0)
+                        or (bx + bw >= tw - 1 and x2 < lw) or (by + bh >= th - 1 and y2 < lh)):
+                    continue
+                boxes.append((int((x1 + bx) * inv), int((y1 + by) * inv),
+                              int(bw * inv), int(bh * inv),
+                              float(d.score[0]) if d.score else 0.5))
+        return boxes
+
+    def detect(self, rgb):
+        """Return (x, y, w, h, score) boxes in `rgb` coordinates."""
+        futures = []
+        for level, scale in self._levels(rgb):
+            lh, lw = level.shape[:2]
+            for tile in tile_grid(lh, lw, self.tile_size, self.overlap):
+                futures.append(self.pool.submit(self._detect_tile, level, scale, tile))
+        boxes = []
+        for f in futures:
+            boxes.extend(f.result())
+        return boxes
+
+    def cleanup(self):
+        self.pool.shutdown(wait=True)
+        with self._lock:
+            for det in self._all_detectors:
+                det.close()
+            self._all_detectors = []
@@ -0,0 +1,144 @@
+"""
+Face Blur Tracking - Keyframe Detection for Video
+- Full detection every N frames or on a scene cut
+- Sparse optical flow carries boxes between keyframes
+- Boxes grow slightly per tracked frame to absorb drift
+"""
+
+import cv2
+import numpy as np
+
+
+def _grow_box(box, amount, img_w, img_h):
+    x, y, w, h = box
+    dx = int(round(w * amount / 2))
+    dy = int(round(h * amount / 2))
+    x1 = max(0, x - dx)
+    y1 = max(0, y - dy)
+    x2 = min(img_w, x + w + dx)
+    y2 = min(img_h, y + h + dy)
+    return x1, y1, x2 - x1, y2 - y1
+
+
+class KeyframeTracker:
+    """Detect on keyframes, track in between.
+
+    Drop-in for FaceBlurrer.detect_and_blur_faces on sequential video frames:
+    full detection runs every `interval` frames, on a scene change, or when a
+    box loses its track; other frames move the previous boxes with
+    Lucas-Kanade flow on the detection-scale gray view and grow them by
+    `drift_grow` per tracked frame.
+    """
+
+    def __init__(self, blurrer, interval=5, scene_threshold=30.0, drift_grow=0.02,
+                 max_grow=0.25, thumb_size=64):
+        self.blurrer = blurrer
+        self.interval = max(1, int(interval))
+        self.scene_threshold = scene_threshold
+        self.drift_grow = drift_grow
+        self.max_grow = max_grow
+        self.thumb_size = thumb_size
+        self.reset()
+
+    def reset(self):
+        self.prev_gray = None
+        self.prev_thumb = None
+        self.boxes = []       # tracked boxes, before drift growth
+        self.since_key = 0
+        self.force_detect = True
+        self.detections = 0
+        self.tracked = 0
+
+    def _scene_changed(self, thumb):
+        if self.prev_thumb is None:
+            return True
+        return float(cv2.absdiff(thumb, self.prev_thumb).mean()) > self.scene_threshold
+
+    def _track(self, gray, scale, img_w, img_h):
+        """Shift/scale each box by the median flow of corners inside it.
+
+        Flow runs on the detection-scale gray; boxes stay in frame coordinates.
+        """
+        ih, iw = gray.shape[:2]
+        moved = []
+        for box in self.boxes:
+            x, y, w, h = (int(round(v * scale)) for v in box)
+            x, y = min(x, iw - 1), min(y, ih - 1)
+            w, h = max(1, min(w, iw - x)), max(1, min(h, ih - y))
+            # Corners from the box ROI only, then shifted back to frame coordinates
+            pts = cv2.goodFeaturesToTrack(self.prev_gray[y:y + h, x:x + w], maxCorners=30,
+                                          qualityLevel=0.01, minDistance=3)
+            if pts is None or len(pts) < 3:
+                return None
+            pts = pts + np.array([x, y], dtype=np.float32)
+            nxt, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, pts, None,
+                                                      winSize=(21, 21), maxLevel=3)
+            good = status.reshape(-1) == 1
+            if good.sum() < 3:
+                return None
+            p0 = pts.reshape(-1, 2)[good]
+            p1 = nxt.reshape(-1, 2)[good]
+            dx, dy = np.median(p1 - p0, axis=0) / scale
+            # Scale from the spread of the tracked points around their centre
+            s0 = np.linalg.norm(p0 - p0.mean(axis=0), axis=1).mean()
+            s1 = np.linalg.norm(p1 - p1.mean(axis=0), axis=1).mean()
+            grow = float(np.clip(s1 / s0, 0.8, 1.25)) if s0 > 1e-3 else 1.0
+            bx, by, bw, bh = box
+            cx = bx + bw / 2 + dx
+            cy = by + bh / 2 + dy
+            nw, nh = bw * grow, bh * grow
+            x1 = int(max(0, cx - nw / 2))
+            y1 = int(max(0, cy - nh / 2))
+            x2 = int(min(img_w, cx + nw / 2))
+            y2 = int(min(img_h, cy + nh / 2))
+            if x2 <= x1 or y2 <= y1:
+                return None
+            moved.append((x1, y1, x2 - x1, y2 - y1))
+        return moved
+
+    def detect_boxes(self, image):
+        """Return boxes for the next frame, detecting or tracking as needed."""
+        ih, iw = image.shape[:2]
+        # Share gray / detection views with the blurrer's detectors
+        views = self.blurrer.prepare(image)
+        # Track on the detection-scale gray the detectors already derived
+        gray = views.small_gray
+        thumb = cv2.resize(gray, (self.thumb_size, self.thumb_size), interpolation=cv2.INTER_AREA)
+
+        stats = self.blurrer.stats
+        boxes = None
+        keyframe = (self.force_detect or self.since_key + 1 >= self.interval
+                    or self.prev_gray.shape != gray.shape or self._scene_changed(thumb))
+        if not keyframe and self.boxes:
+            with stats.stage('track'):
+                boxes = self._track(gray, views.scale, iw, ih)
+        elif not keyframe:
+            boxes = []
+
+        if boxes is None:
+            boxes = self.blurrer.detect_boxes(image, views)
+            self.since_key = 0
+            self.detections += 1
+            stats.count('keyframes')
+        else:
+            self.since_key += 1
+            self.tracked += 1
+            stats.count('tracked_frames')
+
+        self.boxes = boxes
+        # views.small_gray is recycled next frame; keep our own copy for the flow
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.prev_gray = gray.copy()
+        else:
+            np.copyto(self.prev_gray, gray)
+        self.prev_thumb = thumb
+        self.force_detect = False
+
+        grow = min(self.max_grow, self.drift_grow * self.since_key)
+        if grow <= 0:
+            return list(boxes)
+        return [_grow_box(b, grow, iw, ih) for b in boxes]
+
+    def detect_and_blur_faces(self, image):
+        boxes = self.detect_boxes(image)
+        return self.blurrer.blur_boxes(image, boxes), boxes
@@ -1,166 +1,36 @@
 """
 Face Blur Worker - Enhanced Processing Engine
-- Dual-pass MediaPipe detection
-- Haar cascade fallback for small/distant faces
-- Box padding and deduplication
-- EXE-friendly resource loading
+- BlurWorker: the Qt job thread behind the GUI and the job service
+- Stills, videos, segments, detector processes and resumable jobs
+- Progress, previews, stats and status for the GUI
+Detection and blur themselves live in face_blur_core (no Qt).
 """
 
 import cv2
-import mediapipe as mp
 import numpy as np
 import os
-import sys
 import subprocess
+import time
 from PyQt5.QtCore import QThread, pyqtSignal
-
-
-def _resource_path(relative_path):
-    """Get absolute path to resource, works for dev and PyInstaller EXE."""
-    if hasattr(sys, "_MEIPASS"):
-        # PyInstaller EXE mode
-        return os.path.join(sys._MEIPASS, relative_path)
-    # Normal Python mode
-    return os.path.join(os.path.abspath("."), relative_path)
-
-
-def _ensure_odd(n: int) -> int:
-    return n + 1 if n % 2 == 0 else n
-
-
-def _pad_box(x, y, w, h, img_w, img_h, pad_x=0.30, pad_y=0.40):
-    px = int(w * pad_x)
-    py = int(h * pad_y)
-    x2 = min(img_w, x + w + px)
-    y2 = min(img_h, y + h + py)
-    x1 = max(0, x - px)
-    y1 = max(0, y - py)
-    return x1, y1, x2 - x1, y2 - y1
-
-
-def _iou(a, b):
-    ax, ay, aw, ah = a
-    bx, by, bw, bh = b
-    ax2, ay2 = ax + aw, ay + ah
-    bx2, by2 = bx + bw, by + bh
-    inter_w = max(0, min(ax2, bx2) - max(ax, bx))
-    inter_h = max(0, min(ay2, by2) - max(ay, by))
-    inter = inter_w * inter_h
-    union = aw * ah + bw * bh - inter
-    return inter / union if union > 0 else 0.0
-
-
-def _dedup_boxes(boxes, iou_thresh=0.35):
-    kept = []
-    for b in boxes:
-        if all(_iou(b, k) < iou_thresh for k in kept):
-            kept.append(b)
-    return kept
-
-
-class FaceBlurrer:
-    """Core face detection and blur logic with dual-pass + fallback."""
-
-    def __init__(self, confidence=0.5, model_selection=0, group_mode=False):
-        self.group_mode = group_mode
-        self.mp_face_detection = mp.solutions.face_detection
-        # Primary detector (UI-selected)
-        self.det_primary = self.mp_face_detection.FaceDetection(
-            min_detection_confidence=confidence,
-            model_selection=model_selection
-        )
-        # Secondary (dual-pass) for group mode
-        self.det_secondary = None
-        if group_mode:
-            other_model = 1 - int(model_selection)
-            self.det_secondary = self.mp_face_detection.FaceDetection(
-                min_detection_confidence=max(0.2, confidence - 0.15),
-                model_selection=other_model
-            )
-        # Haar fallback for tiny faces (EXE-safe loading)
-        self.haar = None
-        if group_mode:
-            try:
-                # Try loading from bundled resource first
-                haar_path = _resource_path("haarcascade_frontalface_default.xml")
-                self.haar = cv2.CascadeClassifier(haar_path)
-                
-                # Verify it loaded correctly
-                if self.haar.empty():
-                    # Fallback to OpenCV's built-in path
-                    haar_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-                    self.haar = cv2.CascadeClassifier(haar_path)
-                    
-                    # Final check
-                    if self.haar.empty():
-                        self.haar = None
-            except Exception:
-                # If all else fails, disable Haar cascade
-                self.haar = None
-
-    def _collect_mediapipe_boxes(self, image):
-        h, w = image.shape[:2]
-        boxes = []
-        for detector in [self.det_primary, self.det_secondary]:
-            if detector is None:
-                continue
-            results = detector.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            if not results.detections:
-                continue
-            for d in results.detections:
-                rb = d.location_data.relative_bounding_box
-                x = int(rb.xmin * w)
-                y = int(rb.ymin * h)
-                bw = int(rb.width * w)
-                bh = int(rb.height * h)
-                # Skip invalid
-                if bw <= 0 or bh <= 0:
-                    continue
-                boxes.append((x, y, bw, bh))
-        return boxes
-
-    def _collect_haar_boxes(self, image):
-        if self.haar is None:
-            return []
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        ih, iw = gray.shape[:2]
-        # Dynamic minimum size ~2% of smallest dimension
-        min_side = max(20, int(min(ih, iw) * 0.02))
-        faces = self.haar.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side)
-        )
-        return [(int(x), int(y), int(w), int(h)) for (x, y, w, h) in faces]
-
-    def detect_boxes(self, image):
-        """Return padded, deduplicated face boxes."""
-        ih, iw = image.shape[:2]
-        boxes = self._collect_mediapipe_boxes(image)
-        if self.group_mode:
-            boxes += self._collect_haar_boxes(image)
-        # Pad and clip
-        padded = [_pad_box(x, y, w, h, iw, ih) for (x, y, w, h) in boxes]
-        # Deduplicate
-        return _dedup_boxes(padded)
-
-    def detect_and_blur_faces(self, image):
-        """Apply triple Gaussian blur to every detected box."""
-        boxes = self.detect_boxes(image)
-        for (x, y, w, h) in boxes:
-            face = image[y:y + h, x:x + w]
-            if face.size == 0:
-                continue
-            k = _ensure_odd(max(3, int(0.4 * max(w, h))))
-            blurred = cv2.GaussianBlur(face, (k, k), 0)
-            blurred = cv2.GaussianBlur(blurred, (k, k), 0)
-            blurred = cv2.GaussianBlur(blurred, (k, k), 0)
-            image[y:y + h, x:x + w] = blurred
-        return image, boxes
-
-    def cleanup(self):
-        if self.det_primary:
-            self.det_primary.close()
-        if self.det_secondary:
-            self.det_secondary.close()
+from face_blur_buffers import FramePool, ScratchBuffers
+from face_blur_checkpoint import CHECKPOINT_SECONDS, Checkpoint, CheckpointedWriter, checkpoint_dir_for
+from face_blur_core import (  # noqa: F401 - output_path_for, warm_detectors: used by the GUI
+    DEDUP_MAX_REUSE, DETECTOR_POOL, HAAR_VIDEO_INTERVAL, IMAGE_EXTS, PREVIEW_SIDE, VIDEO_EXTS, FaceBlurrer,
+    blur_boxes, blur_image_array, blur_still_low_memory, detector_kwargs, output_path_for, warm_detectors
+)
+from face_blur_dedup import DuplicateGate
+from face_blur_encoder import FFmpegPipeReader, FFmpegPipeWriter, concat_segments, ffmpeg_available
+from face_blur_governor import SpeedGovernor
+from face_blur_kernels import DEFAULT_BLUR_ENGINE, get_blur_engine
+from face_blur_manifest import (
+    BoxManifest, ManifestPlayer, ManifestRecorder, manifest_path_for
+)
+from face_blur_stats import NULL_STATS, JobStats, RateMeter
+from face_blur_pipeline import FramePipeline
+from face_blur_segments import run_segmented
+from face_blur_shm import SharedFrameDetector
+from face_blur_tracking import KeyframeTracker
+from face_blur_writer import AsyncImageWriter
 
 
 class BlurWorker(QThread):
@@ -169,9 +39,25 @@ class BlurWorker(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    # RGB / RGBA / gray, already shrunk to fit preview_size: display as is
     preview = pyqtSignal(np.ndarray)
-
-    def __init__(self, input_path, output_path, confidence, model_selection, group_mode=False, debug=False):
+    stats_updated = pyqtSignal(dict)
+    status = pyqtSignal(str)
+    # Video: frames/s over the last few seconds, ETA in seconds (-1 unknown)
+    throughput = pyqtSignal(float, float)
+
+    # Seconds between live stats emits
+    STATS_INTERVAL = 1.0
+    # Video progress / throughput and live preview rates; per-frame signals flood the GUI thread
+    PROGRESS_INTERVAL = 0.1
+    PREVIEW_INTERVAL = 0.5
+
+    def __init__(self, input_path, output_path, confidence, model_selection, group_mode=False, debug=False,
+                 detect_interval=1, video_codec='libx264', crf=18, preset='medium',
+                 blur_engine=DEFAULT_BLUR_ENGINE, detect_size=None, tile_size=None, instrument=False,
+                 use_manifest=False, detect_only=False, manifest_dir=None, segments=1,
+                 detect_procs=0, frame_budget_ms=None, resumable=False, low_memory=False, still_encode=None,
+                 dedup_threshold=None, buffer_pool=True):
         super().__init__()
         self.input_path = input_path
         self.output_path = output_path
@@ -179,19 +65,204 @@ class BlurWorker(QThread):
         self.model_selection = model_selection
         self.group_mode = group_mode
         self.debug = debug
+        self.detect_interval = detect_interval
+        self.video_codec = video_codec
+        self.crf = crf
+        self.preset = preset
+        self.blur_engine = blur_engine
+        self.detect_size = detect_size
+        self.tile_size = tile_size
+        # Detection manifest cache: replay boxes when only render options changed
+        self.use_manifest = use_manifest
+        self.detect_only = detect_only
+        self.manifest_dir = manifest_dir
+        # >1: long videos split at keyframes and processed in parallel processes
+        self.segments = segments
+        # >1: frames fanned out to detector processes over shared memory
+        self.detect_procs = detect_procs
+        # Per-frame detect + blur budget (ms); a SpeedGovernor trades recall to meet it
+        self.frame_budget_ms = frame_budget_ms
+        self.governor = None
+        # Write closed segments + checkpoint.json; a restart continues where this stopped
+        self.resumable = resumable
+        # Stills: memory-mapped in-place blur and a decimated detection view
+        self.low_memory = low_memory
+        # Still output format / compression (face_blur_writer options); None = historical defaults
+        self.still_encode = still_encode or {}
+        self.output_report = None
+        # Video: reuse the last detection while frames stay this similar (face_blur_dedup)
+        self.dedup_threshold = dedup_threshold
+        self.dedup = None
+        self.dedup_report = None
+        # Video: decode into recycled frame buffers (face_blur_buffers); False allocates per frame
+        self.buffer_pool = buffer_pool
+        # Per-stage timings/counters; NULL_STATS makes every hook a no-op
+        self.job_stats = JobStats() if instrument else NULL_STATS
+        self._last_stats_emit = 0.0
+        # (width, height) previews are fitted to; the GUI sets its preview area
+        self.preview_size = (PREVIEW_SIDE, PREVIEW_SIDE)
+        self._rate = RateMeter()
+        self._last_progress_emit = 0.0
+        self._last_preview_emit = 0.0
         self.is_cancelled = False
 
     def cancel(self):
         self.is_cancelled = True
 
+    def haar_interval(self, video):
+        # With keyframe tracking detection is already sparse; sweep fully on each keyframe
+        return HAAR_VIDEO_INTERVAL if video and self.detect_interval == 1 else 1
+
+    def create_blurrer(self, video=False):
+        # Pooled: initialized detectors are reused, only render options change per job
+        blurrer = DETECTOR_POOL.acquire(
+            **detector_kwargs(self.confidence, self.model_selection, self.group_mode, self.tile_size)
+        )
+        blurrer.configure(blur_engine=self.blur_engine, detect_size=self.detect_size,
+                          haar_interval=self.haar_interval(video))
+        blurrer.stats = self.job_stats
+        return blurrer
+
+    def blurrer_kwargs(self):
+        """FaceBlurrer arguments for video detectors built in other processes."""
+        return dict(
+            detector_kwargs(self.confidence, self.model_selection, self.group_mode, self.tile_size),
+            blur_engine=self.blur_engine, detect_size=self.detect_size,
+            haar_interval=self.haar_interval(video=True)
+        )
+
+    def detection_settings(self):
+        return dict(confidence=self.confidence, model_selection=self.model_selection,
+                    group_mode=self.group_mode, detect_size=self.detect_size, min_face=0.02,
+                    tile_size=self.tile_size, dedup_method='nms', detect_interval=self.detect_interval,
+                    frame_budget_ms=self.frame_budget_ms, low_memory=self.low_memory,
+                    dedup_threshold=self.dedup_threshold)
+
+    def checkpoint_settings(self, width, height, fps):
+        """Everything the finished segments depend on; a resume needs all of it unchanged."""
+        return dict(self.detection_settings(), blur_engine=self.blur_engine, codec=self.video_codec,
+                    crf=self.crf, preset=self.preset, width=width, height=height, fps=fps)
+
+    def manifest_path(self):
+        if not (self.use_manifest or self.detect_only):
+            return None
+        return manifest_path_for(self.input_path, self.detection_settings(), self.manifest_dir)
+
+    def open_detector(self, manifest_path, video=False):
+        """Return (detector, blurrer, recorder).
+
+        With a cached manifest the detector replays its boxes and no
+        blurrer (and no model) is needed; otherwise detection runs and,
+        if a manifest path is given, is recorded for next time.
+        """
+        manifest = None if self.detect_only else BoxManifest.try_load(manifest_path)
+        if manifest is not None:
+            blur, scratch = get_blur_engine(self.blur_engine), ScratchBuffers()
+            render = lambda image, boxes: blur_boxes(image, boxes, blur, self.job_stats, scratch)
+            self.job_stats.count('manifest_hits')
+            return ManifestPlayer(manifest, render), None, None
+
+        blurrer = self.create_blurrer(video)
+        detector = blurrer
+        if video and self.frame_budget_ms:
+            # Governed: passes, detection size and interval adapt to the budget
+            if self.dedup_threshold:
+                self.status.emit("speed budget on - static-shot reuse off")
+            self.governor = SpeedGovernor(blurrer, self.frame_budget_ms, interval=self.detect_interval,
+                                          on_adjust=self.on_governor_adjust)
+            detector = self.governor
+        elif video and self.detect_interval > 1:
+            # Keyframe mode: full detection every N frames, optical-flow tracking in between
+            detector = KeyframeTracker(blurrer, interval=self.detect_interval)
+        elif video and self.dedup_threshold:
+            # Static shots: reuse the last detection while frames stay near-identical
+            self.dedup = DuplicateGate(blurrer, self.dedup_threshold, max_reuse=DEDUP_MAX_REUSE)
+            detector = self.dedup
+        recorder = None
+        if manifest_path:
+            recorder = ManifestRecorder(detector, self.new_manifest())
+            detector = recorder
+        return detector, blurrer, recorder
+
+    def report_dedup(self, checked, skipped):
+        self.dedup_report = {'checked': checked, 'skipped': skipped, 'threshold': self.dedup_threshold}
+        if checked:
+            self.status.emit(f"detection skipped on {skipped} of {checked} frames "
+                             f"({100.0 * skipped / checked:.0f}%, near-duplicates)")
+
+    def on_governor_adjust(self, entry):
+        direction = "lowered" if entry['to'] > entry['from'] else "raised"
+        self.status.emit(f"quality {direction} at frame {entry['frame']}: {entry['settings']}")
+
+    def new_manifest(self):
+        return BoxManifest({'input': os.path.basename(self.input_path),
+                            'settings': self.detection_settings()})
+
+    def report_write(self, report):
+        self.output_report = report
+        if 'write_ms' in report:
+            timing = f"encode {report['encode_ms']:.0f} ms, write {report['write_ms']:.0f} ms"
+        else:
+            timing = f"encode + write {report['encode_ms']:.0f} ms"
+        self.status.emit(f"wrote {report['bytes_written'] / 1e6:.1f} MB ({timing})")
+
+    def release_blurrer(self, blurrer):
+        if blurrer is None:
+            return
+        blurrer.stats = NULL_STATS
+        DETECTOR_POOL.release(blurrer)
+
+    def emit_stats(self, force=False):
+        if not self.job_stats.enabled:
+            return
+        now = time.perf_counter()
+        if force or now - self._last_stats_emit >= self.STATS_INTERVAL:
+            self._last_stats_emit = now
+            self.stats_updated.emit(self.job_stats.snapshot())
+
+    def emit_progress(self, done, total, scale=80, force=False):
+        """Frame progress (as 0-scale %), frames/s and ETA, at most every PROGRESS_INTERVAL."""
+        now = time.perf_counter()
+        if not force and now - self._last_progress_emit < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress_emit = now
+        fps, eta = self._rate.update(done, total, now)
+        self.progress.emit(int(min(1.0, done / max(1, total)) * scale))
+        self.throughput.emit(fps, eta)
+
+    def emit_preview(self, image, boxes=(), force=False):
+        """Preview of `image` at most every PREVIEW_INTERVAL; built right away, so `image` may be reused after."""
+        now = time.perf_counter()
+        if not force and now - self._last_preview_emit < self.PREVIEW_INTERVAL:
+            return
+        self._last_preview_emit = now
+        self.preview.emit(self.create_preview(image, boxes if self.debug else []))
+
+    def finish_stats(self):
+        """Emit the final stats and write the JSON/CSV report next to the output."""
+        if not self.job_stats.enabled:
+            return
+        self.emit_stats(force=True)
+        try:
+            extra = {'input': self.input_path, 'output': self.output_path}
+            if self.governor is not None:
+                extra['governor'] = {'budget_ms': self.frame_budget_ms, 'final_level': self.governor.level,
+                                     'adjustments': self.governor.adjustments}
+            if self.output_report is not None:
+                extra['write'] = self.output_report
+            if self.dedup_report is not None:
+                extra['dedup'] = self.dedup_report
+            self.job_stats.write_report(os.path.splitext(self.output_path)[0], extra=extra)
+        except OSError:
+            # A report we can't write must not fail the job
+            pass
+
     def run(self):
         try:
             ext = os.path.splitext(self.input_path)[1].lower()
-            image_exts = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff', '.tif'}
-            video_exts = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv'}
-            if ext in image_exts:
+            if ext in IMAGE_EXTS:
                 self.process_image()
-            elif ext in video_exts:
+            elif ext in VIDEO_EXTS:
                 self.process_video()
             else:
                 self.error.emit(f"Unsupported file format: {ext}")
@@ -199,41 +270,80 @@ class BlurWorker(QThread):
             self.error.emit(f"Processing error: {str(e)}")
 
     def process_image(self):
-        img = cv2.imread(self.input_path, cv2.IMREAD_UNCHANGED)
+        if self.low_memory:
+            return self.process_image_low_memory()
+        stats = self.job_stats
+        with stats.stage('decode'):
+            img = cv2.imread(self.input_path, cv2.IMREAD_UNCHANGED)
         if img is None:
             self.error.emit("Failed to load image")
             return
 
         self.progress.emit(15)
-        blurrer = FaceBlurrer(self.confidence, self.model_selection, self.group_mode)
-
-        has_alpha = (img.ndim == 3 and img.shape[2] == 4)
-        if has_alpha:
-            alpha = img[:, :, 3]
-            bgr = img[:, :, :3]
-        else:
-            bgr = img
+        manifest_path = self.manifest_path()
+        detector, blurrer, recorder = self.open_detector(manifest_path)
+        try:
+            self.progress.emit(40)
+            if self.detect_only:
+                bgr = img[:, :, :3] if img.ndim == 3 and img.shape[2] == 4 else img
+                boxes = detector.detect_boxes(bgr)
+                final_img = img
+            else:
+                final_img, boxes = blur_image_array(detector, img)
+            stats.frame(len(boxes))
+            self.progress.emit(75)
+        finally:
+            self.release_blurrer(blurrer)
+        if recorder is not None:
+            recorder.manifest.save(manifest_path)
+
+        if self.detect_only:
+            self.finish_stats()
+            self.progress.emit(100)
+            self.finished.emit(manifest_path)
+            return
 
-        self.progress.emit(40)
-        blurred_bgr, boxes = blurrer.detect_and_blur_faces(bgr.copy())
-        self.progress.emit(75)
+        # Encode + write in the background while the preview is built
+        writer = AsyncImageWriter(threads=1, stats=stats, **self.still_encode)
+        try:
+            pending = writer.submit(self.output_path, final_img)
+            # Preview (with optional debug boxes)
+            preview = self.create_preview(final_img, boxes if self.debug else [])
+            pending.result()
+        finally:
+            writer.close()
+        self.report_write(writer.report())
+        self.preview.emit(preview)
 
-        if has_alpha:
-            final_img = cv2.merge([blurred_bgr, alpha])
-        else:
-            final_img = blurred_bgr
+        self.finish_stats()
+        self.progress.emit(100)
+        self.finished.emit(self.output_path)
 
-        # Save
-        if self.output_path.lower().endswith('.png'):
-            cv2.imwrite(self.output_path, final_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
-        else:
-            cv2.imwrite(self.output_path, final_img, [cv2.IMWRITE_JPEG_QUALITY, 100])
+    def process_image_low_memory(self):
+        manifest_path = self.manifest_path()
+        detector, blurrer, recorder = self.open_detector(manifest_path)
+        self.progress.emit(15)
+        try:
+            output_path = None if self.detect_only else self.output_path
+            boxes, small, factor, _ = blur_still_low_memory(detector, self.input_path, output_path,
+                                                            blurrer, self.job_stats, self.still_encode)
+            self.job_stats.frame(len(boxes))
+            self.progress.emit(75)
+        finally:
+            self.release_blurrer(blurrer)
+        if recorder is not None:
+            recorder.manifest.save(manifest_path)
+
+        if self.detect_only:
+            self.finish_stats()
+            self.progress.emit(100)
+            self.finished.emit(manifest_path)
+            return
 
-        # Preview (with optional debug boxes)
-        preview = self.create_preview(final_img, boxes if self.debug else [])
-        self.preview.emit(preview)
+        debug = [tuple(v // factor for v in b) for b in boxes] if self.debug else []
+        self.preview.emit(self.create_preview(small, debug))
 
-        blurrer.cleanup()
+        self.finish_stats()
         self.progress.emit(100)
         self.finished.emit(self.output_path)
 
@@ -248,45 +358,207 @@ class BlurWorker(QThread):
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         total = int(max(1, cap.get(cv2.CAP_PROP_FRAME_COUNT)))
 
-        temp_video = os.path.splitext(self.output_path)[0] + "_temp.mp4"
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_video, fourcc, fps, (width, height))
+        manifest_path = self.manifest_path()
+        cached = bool(manifest_path and os.path.exists(manifest_path))
+        # A cached manifest replays faster in one process than segments could run;
+        # a speed budget is per frame of one stream, so it stays in-process too
+        parallel_ok = not (self.detect_only or cached or self.frame_budget_ms or self.resumable)
+        if self.segments > 1 and parallel_ok and ffmpeg_available():
+            src_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+            cap.release()
+            self.process_video_segments(width, height, src_fps, total, manifest_path)
+            return
 
-        blurrer = FaceBlurrer(self.confidence, self.model_selection, self.group_mode)
+        # Frame-level fan-out needs every frame detected independently (no tracking, no dedup)
+        use_shared = (self.detect_procs > 1 and self.detect_interval == 1
+                      and not (cached or self.frame_budget_ms or self.dedup_threshold))
+        if use_shared:
+            detector, blurrer = None, None
+            manifest = self.new_manifest() if manifest_path else None
+        else:
+            if self.detect_procs > 1:
+                reason = ("keyframe tracking" if self.detect_interval != 1 else "cached manifest" if cached
+                          else "speed budget" if self.frame_budget_ms else "static-shot reuse")
+                self.status.emit(f"{reason} on - detection processes off, detecting in-process")
+            detector, blurrer, recorder = self.open_detector(manifest_path, video=True)
+            manifest = recorder.manifest if recorder is not None else None
+
+        # Single pass through an ffmpeg pipe when available, else VideoWriter + remux
+        use_pipe = ffmpeg_available()
+        temp_video = None
+        out = None
+        checkpoint = None
+        reader = None
+        start_frame = 0
+        if self.detect_only:
+            pass
+        elif use_pipe and self.resumable:
+            src_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+            checkpoint = Checkpoint.open(checkpoint_dir_for(self.output_path), self.input_path,
+                                         self.checkpoint_settings(width, height, src_fps))
+            start_frame = checkpoint.frames_done
+            if start_frame:
+                if isinstance(detector, ManifestPlayer):
+                    # A cached manifest replays from the first frame decoded, not frame 0
+                    detector.seek(start_frame)
+                # Half a frame early so rounding never skips the first missing frame
+                cap.release()
+                reader = FFmpegPipeReader(self.input_path, width, height, (start_frame - 0.5) / src_fps)
+                # The manifest would only cover the frames decoded in this run
+                manifest = None
+                self.status.emit(f"resumed at frame {start_frame}")
+            out = CheckpointedWriter(
+                checkpoint, width, height, src_fps, round(src_fps * CHECKPOINT_SECONDS),
+                codec=self.video_codec, crf=self.crf, preset=self.preset
+            )
+        elif use_pipe:
+            src_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+            out = FFmpegPipeWriter(
+                self.output_path, width, height, src_fps, audio_source=self.input_path,
+                codec=self.video_codec, crf=self.crf, preset=self.preset
+            )
+        else:
+            temp_video = os.path.splitext(self.output_path)[0] + "_temp.mp4"
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(temp_video, fourcc, fps, (width, height))
+
+        stats = self.job_stats
+
+        def on_frame(idx, blurred, boxes):
+            # Live preview: the pooled frame is shrunk into a new array before it is recycled
+            if not self.detect_only:
+                self.emit_preview(blurred, boxes, force=idx == 0)
+            stats.frame(len(boxes))
+            self.emit_stats()
+            self.emit_progress(start_frame + idx + 1, total, force=idx == 0)
+
+        # The detector processes and their shared-memory ring start last and are
+        # released with everything else, whatever fails from here on
+        shared = None
+        try:
+            if use_shared:
+                shared = SharedFrameDetector(width, height, self.blurrer_kwargs(), workers=self.detect_procs,
+                                             stats=stats, is_cancelled=lambda: self.is_cancelled)
+            # Frames are decoded into recycled buffers and handed back once encoded
+            pool = FramePool((height, width, 3)) if self.buffer_pool else None
+            read_frame = stats.wrap('decode', reader.read if reader is not None else cap.read)
+            if pool is not None and shared is None:
+                read_frame = pool.reader(read_frame)
+            if shared is not None:
+                # Detector processes return boxes in order; only blur runs here
+                read_frame = shared.reader(read_frame, pool)
+                blur, scratch = get_blur_engine(self.blur_engine), ScratchBuffers()
+
+                def process_frame(item):
+                    frame, boxes = item
+                    if manifest is not None:
+                        manifest.add(boxes)
+                    if not self.detect_only:
+                        blur_boxes(frame, boxes, blur, stats, scratch)
+                    return frame, boxes
+            elif self.detect_only:
+                # Decode + detect only; nothing is encoded
+                process_frame = lambda frame: (frame, detector.detect_boxes(frame))
+            else:
+                process_frame = detector.detect_and_blur_faces
+            if self.detect_only:
+                write_frame = lambda frame: None
+            else:
+                write_frame = stats.wrap('encode', out.write)
+            if pool is not None:
+                write_frame = pool.writer(write_frame)
+
+            # Decode, detect/blur and encode overlap on separate threads
+            pipeline = FramePipeline(
+                read_frame, process_frame, write_frame,
+                on_frame=on_frame, is_cancelled=lambda: self.is_cancelled
+            )
+            pipeline.run()
+        except Exception:
+            self.discard_output(out, temp_video)
+            raise
+        finally:
+            cap.release()
+            if reader is not None:
+                reader.release()
+            if shared is not None:
+                shared.close()
+            self.release_blurrer(blurrer)
 
-        sent_preview = False
-        frame_idx = 0
+        if self.is_cancelled:
+            self.discard_output(out, temp_video)
+            if checkpoint is not None:
+                self.status.emit(f"Cancelled - {checkpoint.frames_done} frames checkpointed, "
+                                 f"start again with the same settings to resume")
+            return
 
-        while True:
-            if self.is_cancelled:
-                break
-            ret, frame = cap.read()
-            if not ret:
-                break
-            blurred, boxes = blurrer.detect_and_blur_faces(frame)
-            out.write(blurred)
+        if self.dedup is not None:
+            self.report_dedup(self.dedup.checked, self.dedup.skipped)
+        # Only complete runs are cached
+        if manifest is not None:
+            manifest.save(manifest_path)
+        if self.detect_only:
+            self.finish_stats()
+            self.progress.emit(100)
+            self.finished.emit(manifest_path)
+            return
 
-            if not sent_preview:
-                preview = self.create_preview(blurred, boxes if self.debug else [])
-                self.preview.emit(preview)
-                sent_preview = True
+        self.progress.emit(90)
+        with stats.stage('encode_flush'):
+            out.release()
+        if checkpoint is not None:
+            with stats.stage('concat'):
+                concat_segments(checkpoint.segment_paths(), self.output_path, audio_source=self.input_path)
+            checkpoint.discard()
+        elif not use_pipe:
+            with stats.stage('remux'):
+                self.merge_audio(temp_video)
+        self.finish_stats()
+        self.progress.emit(100)
+        self.finished.emit(self.output_path)
 
-            frame_idx += 1
-            self.progress.emit(int((frame_idx / total) * 80))
+    def process_video_segments(self, width, height, fps, total, manifest_path):
+        stats = self.job_stats
 
-        cap.release()
-        out.release()
-        blurrer.cleanup()
+        def on_progress(done, total_frames):
+            self.emit_progress(done, total_frames, scale=90)
 
-        if self.is_cancelled:
-            self.cleanup_temp_files(temp_video)
+        def on_preview(frame, boxes):
+            self.emit_preview(frame, boxes)
+
+        with stats.stage('segments'):
+            boxes = run_segmented(
+                self.input_path, self.output_path, width, height, fps, total, self.segments,
+                self.blurrer_kwargs(), detect_interval=self.detect_interval,
+                encode_opts=dict(codec=self.video_codec, crf=self.crf, preset=self.preset),
+                on_progress=on_progress, on_preview=on_preview,
+                is_cancelled=lambda: self.is_cancelled, dedup_threshold=self.dedup_threshold,
+                on_skipped=lambda n: self.report_dedup(total, n), preview_size=self.preview_size
+            )
+        if boxes is None:
             return
 
-        self.progress.emit(90)
-        self.merge_audio(temp_video)
+        for frame_boxes in boxes:
+            stats.frame(len(frame_boxes))
+        if manifest_path:
+            manifest = self.new_manifest()
+            for frame_boxes in boxes:
+                manifest.add(frame_boxes)
+            manifest.save(manifest_path)
+        self.finish_stats()
         self.progress.emit(100)
         self.finished.emit(self.output_path)
 
+    def discard_output(self, out, temp_video):
+        if out is None:
+            return
+        # A CheckpointedWriter only drops its open segment; finished ones stay for a resume
+        if isinstance(out, (FFmpegPipeWriter, CheckpointedWriter)):
+            out.abort()
+        else:
+            out.release()
+            self.cleanup_temp_files(temp_video)
+
     def merge_audio(self, temp_video):
         try:
             subprocess.run(['ffmpeg', '-version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
@@ -310,16 +582,29 @@ class BlurWorker(QThread):
                 except: pass
             os.rename(temp_video, self.output_path)
 
-    def create_preview(self, image, boxes=None, max_w=800):
+    def create_preview(self, image, boxes=None):
+        """Display-ready copy: fitted into preview_size, RGB(A) order, debug boxes drawn."""
         h, w = image.shape[:2]
-        vis = image.copy()
-        # Draw debug boxes on preview only
+        max_w, max_h = self.preview_size
+        channels = image.shape[2] if image.ndim == 3 else 1
+        # Qt's channel order is swapped here, on the small copy, so the GUI thread only wraps it
+        to_rgb = {3: cv2.COLOR_BGR2RGB, 4: cv2.COLOR_BGRA2RGBA}.get(channels)
+        # Shrink first so we never copy the full-size frame
+        scale = min(1.0, max_w / w, max_h / h)
+        if scale < 1.0:
+            size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+            vis = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            if to_rgb is not None:
+                cv2.cvtColor(vis, to_rgb, dst=vis)
+        else:
+            vis = cv2.cvtColor(image, to_rgb) if to_rgb is not None else image.copy()
+        # Draw debug boxes on preview only (opaque yellow)
         if boxes:
+            color = (255, 255, 0, 255)[:channels]
             for (x, y, bw, bh) in boxes:
-                cv2.rectangle(vis, (x, y), (x + bw, y + bh), (0, 255, 255), 2)
-        if w > max_w:
-            scale = max_w / w
-            vis = cv2.resize(vis, (max_w, int(h * scale)))
+                p1 = (int(x * scale), int(y * scale))
+                p2 = (int((x + bw) * scale), int((y + bh) * scale))
+                cv2.rectangle(vis, p1, p2, color, 2)
         return vis
 
     def cleanup_temp_files(self, *files):
@@ -0,0 +1,136 @@
+"""
+Face Blur Writer - Asynchronous Still Output
+- Encode + write on a small thread pool (OpenCV releases the GIL),
+  so detection moves on while earlier results are flushed
+- Streams to the file by default (cv2.imwrite); encoding to memory first
+  (cv2.imencode) splits encode and write time, at one more copy of the output
+- Bounded queue: submit() blocks while too many images are in flight
+- Configurable format (same as input / PNG / JPEG / WebP), PNG
+  compression level and JPEG / WebP quality
+- Reports bytes written, encode and write time
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from face_blur_stats import NULL_STATS
+
+
+# Output format override -> extension (None keeps the input's)
+FORMAT_EXTS = {'png': '.png', 'jpg': '.jpg', 'webp': '.webp'}
+
+# The studio's historical settings: fastest PNG, maximum JPEG, lossless WebP
+DEFAULT_ENCODE = dict(format=None, png_compression=0, jpeg_quality=100, webp_quality=101)
+
+
+def path_for_format(path, fmt=None):
+    if not fmt:
+        return path
+    return os.path.splitext(path)[0] + FORMAT_EXTS[fmt]
+
+
+def encode_params(path, png_compression=0, jpeg_quality=100, webp_quality=101, **_):
+    """cv2 encode flags for the extension of `path` (WebP quality > 100 = lossless)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.png':
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    if ext in ('.jpg', '.jpeg'):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+    if ext == '.webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, int(webp_quality)]
+    return []
+
+
+def write_image(path, img, in_memory=False, **encode):
+    """Encode and write one still. Returns (bytes, encode_s, write_s); raises OSError.
+
+    Streamed (the default), the whole time is encode_s: the encoded file
+    never sits in RAM. in_memory encodes to a buffer first, so the write
+    to slow storage is timed on its own.
+    """
+    start = time.perf_counter()
+    params = encode_params(path, **encode)
+    if not in_memory:
+        try:
+            ok = cv2.imwrite(path, img, params)
+        except cv2.error as e:
+            raise OSError(f"Failed to write {os.path.basename(path)}: {e}") from e
+        if not ok:
+            raise OSError(f"Failed to write {os.path.basename(path)}")
+        return os.path.getsize(path), time.perf_counter() - start, 0.0
+    ok, buf = cv2.imencode(os.path.splitext(path)[1], img, params)
+    encoded = time.perf_counter()
+    if not ok:
+        raise OSError(f"Failed to encode {os.path.basename(path)}")
+    with open(path, 'wb') as f:
+        f.write(buf)
+    return buf.nbytes, encoded - start, time.perf_counter() - encoded
+
+
+class AsyncImageWriter:
+    """Writes stills on `threads` background threads.
+
+    submit() returns a Future of write_image()'s result and blocks while
+    `max_pending` images are queued or being written, which bounds the
+    memory held by finished-but-unwritten images. The writer owns a
+    submitted image until its future completes: don't modify it.
+    in_memory is passed on to write_image().
+    """
+
+    def __init__(self, threads=2, max_pending=4, stats=NULL_STATS, in_memory=False, **encode):
+        self.encode = dict(DEFAULT_ENCODE, **encode)
+        self.in_memory = in_memory
+        self.stats = stats
+        self._pool = ThreadPoolExecutor(max(1, threads), thread_name_prefix='image-writer')
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self.images = 0
+        self.bytes_written = 0
+        self.encode_s = 0.0
+        self.write_s = 0.0
+
+    def submit(self, path, img):
+        self._slots.acquire()
+        try:
+            fut = self._pool.submit(self._write, path, img)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def _write(self, path, img):
+        nbytes, encode_s, write_s = write_image(path, img, self.in_memory, **self.encode)
+        with self._lock:
+            self.images += 1
+            self.bytes_written += nbytes
+            self.encode_s += encode_s
+            self.write_s += write_s
+            # Several writer threads share these stage names
+            self.stats.add('encode', encode_s)
+            if self.in_memory:
+                self.stats.add('write', write_s)
+            self.stats.count('bytes_written', nbytes)
+        return nbytes, encode_s, write_s
+
+    def report(self):
+        with self._lock:
+            report = {'images': self.images, 'bytes_written': self.bytes_written,
+                      'encode_ms': round(self.encode_s * 1000, 1)}
+            if self.in_memory:
+                report['write_ms'] = round(self.write_s * 1000, 1)
+            return report
+
+    def close(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,121 @@
+"""Static shots: which frames count as duplicates of the last detected one."""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_dedup import DEFAULT_DEDUP_THRESHOLD, DuplicateGate  # noqa: E402
+from face_blur_frame import FrameViews  # noqa: E402
+from face_blur_stats import NULL_STATS  # noqa: E402
+
+
+class CountingDetector:
+    """FaceBlurrer stand-in: counts detections, finds nothing."""
+
+    stats = NULL_STATS
+
+    def __init__(self):
+        self.calls = 0
+
+    def prepare(self, image):
+        return FrameViews(reuse_buffers=False).set_frame(image)
+
+    def detect_boxes(self, image, views=None):
+        self.calls += 1
+        return [(self.calls, 0, 10, 10)]
+
+
+def _scene(seed=0, shape=(1080, 1920)):
+    # Smooth, textured background, like a static camera view
+    rng = np.random.default_rng(seed)
+    small = rng.integers(60, 200, (shape[0] // 40, shape[1] // 40), dtype=np.uint8)
+    gray = cv2.resize(small, shape[::-1], interpolation=cv2.INTER_CUBIC)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def _with_blob(scene, x, y, side=40, contrast=20):
+    frame = scene.copy()
+    patch = frame[y:y + side, x:x + side].astype(np.int16) + contrast
+    frame[y:y + side, x:x + side] = np.clip(patch, 0, 255).astype(np.uint8)
+    return frame
+
+
+def _gate():
+    detector = CountingDetector()
+    return DuplicateGate(detector, DEFAULT_DEDUP_THRESHOLD, max_reuse=60), detector
+
+
+def test_unchanged_frames_reuse_boxes():
+    gate, detector = _gate()
+    scene = _scene()
+    noise = np.random.default_rng(1)
+    first = gate.detect_boxes(scene)
+    for _ in range(5):
+        # Sensor noise on a static shot is not a change
+        jitter = noise.integers(-3, 4, scene.shape)
+        frame = np.clip(scene.astype(np.int16) + jitter, 0, 255).astype(np.uint8)
+        assert gate.detect_boxes(frame) == first
+    assert detector.calls == 1 and gate.skipped == 5
+
+
+@pytest.mark.parametrize('contrast', [20, -15])
+def test_small_low_contrast_face_moving_forces_detection(contrast):
+    # A 40 px face at 1080p, moving within a static scene
+    gate, detector = _gate()
+    scene = _scene()
+    gate.detect_boxes(_with_blob(scene, 700, 400, contrast=contrast))
+    for step in range(1, 6):
+        gate.detect_boxes(_with_blob(scene, 700 + 12 * step, 400, contrast=contrast))
+    assert detector.calls == 6 and gate.skipped == 0
+
+
+def test_reuse_is_capped():
+    gate, detector = _gate()
+    gate.max_reuse = 3
+    scene = _scene()
+    for _ in range(9):
+        gate.detect_boxes(scene)
+    # Detect, reuse 3 times, detect again...
+    assert detector.calls == 3 and gate.skipped == 6
+
+
+def test_rescaled_copy_reuses_scaled_boxes():
+    gate, detector = _gate()
+    scene = _scene(shape=(540, 960))
+    gate.detect_boxes(scene)
+    half = cv2.resize(scene, (480, 270), interpolation=cv2.INTER_AREA)
+    assert gate.detect_boxes(half) == [(0, 0, 5, 5)]
+    assert detector.calls == 1
+
+
+def test_slow_drift_is_measured_against_the_detected_frame():
+    # Each step is under the threshold, but the drift since the last detection is not
+    gate, detector = _gate()
+    scene = _scene(shape=(540, 960))
+    for step in range(6):
+        gate.detect_boxes(np.clip(scene.astype(np.int16) + 2 * step, 0, 255).astype(np.uint8))
+    assert detector.calls == 3 and gate.skipped == 3
+
+
+def test_scene_cut_and_other_aspect_ratio_are_not_duplicates():
+    gate, detector = _gate()
+    gate.detect_boxes(_scene(seed=0, shape=(540, 960)))
+    gate.detect_boxes(_scene(seed=2, shape=(540, 960)))
+    gate.detect_boxes(_scene(seed=2, shape=(540, 960))[:, :720].copy())
+    assert detector.calls == 3 and gate.skipped == 0
+
+
+def test_batch_memory_matches_an_earlier_image():
+    # Burst shots interleaved: with memory each one matches its own earlier frame
+    detector = CountingDetector()
+    gate = DuplicateGate(detector, DEFAULT_DEDUP_THRESHOLD, memory=4)
+    a, b = _scene(seed=0, shape=(540, 960)), _scene(seed=5, shape=(540, 960))
+    assert gate.detect_boxes(a) == [(1, 0, 10, 10)]
+    assert gate.detect_boxes(b) == [(2, 0, 10, 10)]
+    assert gate.detect_boxes(a) == [(1, 0, 10, 10)]
+    assert detector.calls == 2 and gate.report()['skipped_pct'] == 33.3
@@ -0,0 +1,116 @@
+"""Speed governor: stepping through the quality ladder against a frame budget."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import face_blur_governor  # noqa: E402
+from face_blur_frame import FrameViews  # noqa: E402
+from face_blur_governor import SpeedGovernor, build_ladder  # noqa: E402
+from face_blur_stats import NULL_STATS  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+
+class CostedBlurrer:
+    """FaceBlurrer stand-in whose detection cost (ms) follows its settings."""
+
+    stats = NULL_STATS
+
+    def __init__(self, clock, costs):
+        self.clock = clock
+        self.costs = costs
+        self.detect_size = None
+        self.group_mode = True
+        self.secondary_enabled = self.haar_enabled = True
+
+    def cost_ms(self):
+        ms = self.costs['base'] * (1.0 if self.detect_size is None else self.detect_size / 1920)
+        return ms + self.costs['secondary'] * self.secondary_enabled + self.costs['haar'] * self.haar_enabled
+
+    def prepare(self, image):
+        return FrameViews(reuse_buffers=False).set_frame(image)
+
+    def detect_boxes(self, image, views=None):
+        self.clock.now += self.cost_ms() / 1000
+        return []
+
+    def blur_boxes(self, image, boxes):
+        return image
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(face_blur_governor, 'time', clock)
+    return clock
+
+
+FRAME = np.zeros((36, 64, 3), np.uint8)
+
+
+def test_detect_only_frames_are_governed(clock):
+    blurrer = CostedBlurrer(clock, dict(base=20.0, secondary=10.0, haar=20.0))
+    governor = SpeedGovernor(blurrer, budget_ms=30, patience=3)
+    for _ in range(10):
+        governor.detect_boxes(FRAME)
+    assert governor.frame == 10
+    assert governor.level > 0 and not blurrer.haar_enabled
+
+
+def _run(governor, frames):
+    for _ in range(frames):
+        governor.detect_and_blur_faces(FRAME)
+    return governor.level
+
+
+def test_ladder_makes_one_setting_cheaper_per_step():
+    ladder = build_ladder(detect_size=None, group_mode=True, interval=1)
+    assert ladder[0] == dict(detect_size=None, secondary=True, haar=True, interval=1)
+    assert ladder[-1] == dict(detect_size=640, secondary=False, haar=False, interval=10)
+    for upper, lower in zip(ladder, ladder[1:]):
+        changed = [k for k in upper if upper[k] != lower[k]]
+        assert len(changed) == 1
+
+
+def test_steps_down_after_patience_and_holds_inside_the_band(clock):
+    # Full size costs 40 ms; the 1280 px level costs ~27 ms, inside [0.7, 1] x 30 ms
+    blurrer = CostedBlurrer(clock, dict(base=40.0, secondary=0.0, haar=0.0))
+    governor = SpeedGovernor(blurrer, budget_ms=30, alpha=1.0, patience=3, recover=5)
+    assert _run(governor, 2) == 0
+    assert _run(governor, 1) == 1 and not blurrer.haar_enabled
+    assert _run(governor, 3) == 2 and blurrer.detect_size == 1280
+    assert _run(governor, 50) == 2
+    assert [(a['from'], a['to'], a['frame']) for a in governor.adjustments] == [(0, 1, 3), (1, 2, 6)]
+
+
+def test_failed_step_up_doubles_the_wait_and_a_held_one_resets_it(clock):
+    costs = dict(base=40.0, secondary=0.0, haar=0.0)
+    blurrer = CostedBlurrer(clock, costs)
+    governor = SpeedGovernor(blurrer, budget_ms=30, alpha=1.0, patience=2, recover=5)
+    assert _run(governor, 4) == 2
+    # Level 2 now has headroom (~20.7 ms) but level 1 (31 ms) is over budget
+    costs['base'] = 31.0
+    assert _run(governor, 4) == 2
+    assert _run(governor, 1) == 1
+    assert _run(governor, 2) == 2
+    # Tried and failed: the next try waits 10 frames instead of 5
+    assert _run(governor, 9) == 2
+    assert _run(governor, 1) == 1
+    assert _run(governor, 2) == 2 and governor._wait == 20
+    # Cheaper content: the step up holds for `recover` frames and the wait resets
+    costs['base'] = 20.0
+    assert _run(governor, 20) == 1
+    assert _run(governor, 5) == 0 and governor._wait == 5
+    reasons = [a['reason'] for a in governor.adjustments]
+    assert reasons.count('headroom') == 4
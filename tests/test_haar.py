@@ -0,0 +1,45 @@
+"""Haar fallback on video: partial sweeps between full ones."""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_haar import HaarFallback  # noqa: E402
+
+
+class BlobCascade:
+    """Cascade stand-in: every white square is a face."""
+
+    def detectMultiScale(self, img, minSize=(0, 0), maxSize=(0, 0), **_):
+        n, _, rects, _ = cv2.connectedComponentsWithStats((img == 255).astype(np.uint8))
+        return [tuple(r[:4]) for r in rects[1:n]
+                if minSize[0] <= r[2] <= (maxSize[0] or r[2]) and r[2] == r[3]]
+
+
+def _frame(x, y, side=30, shape=(480, 640), background=100):
+    gray = np.full(shape, background, np.uint8)
+    gray[y:y + side, x:x + side] = 255
+    return gray
+
+
+@pytest.mark.parametrize('background', [100, 250])
+def test_moving_face_is_found_again_between_full_sweeps(background):
+    haar = HaarFallback(BlobCascade(), every=5)
+    assert haar.detect(_frame(200, 150, background=background), min_side=24) == [(200, 150, 30, 30)]
+    # On the bright background the move is below change_thresh everywhere
+    for step in range(1, 4):
+        x = 200 + 6 * step
+        # Overlapping search regions may report a face twice; NMS merges them later
+        assert set(haar.detect(_frame(x, 150, background=background), min_side=24)) == {(x, 150, 30, 30)}
+
+
+def test_face_walking_in_is_found_before_the_next_full_sweep():
+    haar = HaarFallback(BlobCascade(), every=5)
+    empty = np.full((480, 640), 100, np.uint8)
+    assert haar.detect(empty, min_side=24) == []
+    assert set(haar.detect(_frame(400, 300), min_side=24)) == {(400, 300, 30, 30)}
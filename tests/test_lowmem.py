@@ -0,0 +1,52 @@
+"""Low-memory stills: blurring memory-mapped files in place."""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_kernels import BLUR_ENGINES, get_blur_engine  # noqa: E402
+from face_blur_lowmem import map_raw_image  # noqa: E402
+from face_blur_core import blur_boxes, blur_still_low_memory  # noqa: E402
+
+BOX = (40, 30, 64, 48)
+
+
+class FixedBoxes:
+    """Detector replaying one box, as a ManifestPlayer would."""
+
+    def __init__(self, engine):
+        self.blur = get_blur_engine(engine)
+
+    def detect_boxes(self, image, views=None):
+        return [BOX]
+
+    def blur_boxes(self, image, boxes):
+        return blur_boxes(image, boxes, self.blur)
+
+
+@pytest.mark.parametrize('engine', sorted(BLUR_ENGINES))
+def test_bottom_up_bmp_blurs_in_place(tmp_path, engine):
+    rng = np.random.default_rng(0)
+    src = rng.integers(0, 256, (120, 170, 3), dtype=np.uint8)
+    in_path, out_path = str(tmp_path / 'in.bmp'), str(tmp_path / 'out.bmp')
+    # cv2 writes ordinary 24-bit BMPs bottom-up (positive height)
+    assert cv2.imwrite(in_path, src)
+    mapped, _ = map_raw_image(in_path)
+    assert mapped.strides[0] < 0
+    del mapped
+
+    boxes, _, _, _ = blur_still_low_memory(FixedBoxes(engine), in_path, out_path)
+
+    assert boxes == [BOX]
+    out = cv2.imread(out_path)
+    x, y, w, h = BOX
+    inside = (slice(y, y + h), slice(x, x + w))
+    assert not np.array_equal(out[inside], src[inside])
+    outside = out.copy()
+    outside[inside] = src[inside]
+    assert np.array_equal(outside, src)
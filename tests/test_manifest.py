@@ -0,0 +1,81 @@
+"""Detection manifests: replaying cached boxes."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import face_blur_manifest  # noqa: E402
+from face_blur_manifest import (  # noqa: E402
+    DETECTION_SETTINGS, BoxManifest, ManifestPlayer, manifest_key, manifest_path_for
+)
+
+SETTINGS = dict(confidence=0.5, model_selection=0, group_mode=False, detect_size=None, min_face=None,
+                tile_size=None, dedup_method='nms', detect_interval=1, frame_budget_ms=None,
+                low_memory=False, dedup_threshold=None, blur_engine='gaussian', crf=18)
+
+
+def _manifest(frames):
+    m = BoxManifest()
+    for i in range(frames):
+        m.add([(i, i, 10, 10)])
+    return m
+
+
+def test_seek_replays_from_resumed_frame():
+    # A resumed video decodes from start_frame; its boxes must be that frame's
+    player = ManifestPlayer(_manifest(5), lambda image, boxes: image)
+    player.seek(3)
+    assert [tuple(b) for b in player.detect_boxes(None)] == [(3, 3, 10, 10)]
+    assert [tuple(b) for b in player.detect_boxes(None)] == [(4, 4, 10, 10)]
+    with pytest.raises(RuntimeError):
+        player.detect_boxes(None)
+
+
+def test_seek_past_end_fails():
+    with pytest.raises(RuntimeError):
+        ManifestPlayer(_manifest(2), lambda image, boxes: image).seek(3)
+
+
+def test_key_changes_with_input_content(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b'frame data')
+    first = manifest_path_for(str(path), SETTINGS, str(tmp_path))
+    assert manifest_path_for(str(path), SETTINGS, str(tmp_path)) == first
+    path.write_bytes(b'frame dat4')
+    assert manifest_path_for(str(path), SETTINGS, str(tmp_path)) != first
+
+
+@pytest.mark.parametrize('name', DETECTION_SETTINGS)
+def test_key_changes_with_every_detection_setting(name):
+    changed = dict(SETTINGS, **{name: 'changed'})
+    assert manifest_key('digest', changed) != manifest_key('digest', SETTINGS)
+
+
+@pytest.mark.parametrize('name, value', [('blur_engine', 'pixelate'), ('crf', 28), ('video_codec', 'hevc')])
+def test_render_only_settings_keep_the_key(name, value):
+    # Changing only the look of the blur replays the cached boxes
+    assert manifest_key('digest', dict(SETTINGS, **{name: value})) == manifest_key('digest', SETTINGS)
+
+
+def test_format_version_bump_invalidates_keys_and_files(tmp_path, monkeypatch):
+    path = str(tmp_path / 'm.npz')
+    _manifest(3).save(path)
+    key = manifest_key('digest', SETTINGS)
+    monkeypatch.setattr(face_blur_manifest, 'MANIFEST_VERSION', 2)
+    assert manifest_key('digest', SETTINGS) != key
+    assert BoxManifest.try_load(path) is None
+
+
+def test_round_trip_and_corrupt_files(tmp_path):
+    path = str(tmp_path / 'm.npz')
+    _manifest(4).save(path)
+    loaded = BoxManifest.load(path)
+    assert len(loaded) == 4 and loaded.boxes_for(2) == [(2, 2, 10, 10)]
+    assert loaded.meta['frames'] == 4
+    with open(path, 'wb') as f:
+        f.write(b'not an npz')
+    assert BoxManifest.try_load(path) is None
+    assert BoxManifest.try_load(str(tmp_path / 'missing.npz')) is None
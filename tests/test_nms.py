@@ -0,0 +1,80 @@
+"""Vectorized NMS keeps exactly what the old per-pair _dedup_boxes kept."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_nms import dedup_boxes, iou_matrix, nms, weighted_box_fusion  # noqa: E402
+
+
+def _legacy_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _legacy_dedup(boxes, iou_thresh=0.35):
+    # The pre-NMS implementation: first box wins, later overlaps are dropped
+    kept = []
+    for b in boxes:
+        if all(_legacy_iou(b, k) < iou_thresh for k in kept):
+            kept.append(b)
+    return kept
+
+
+def _random_boxes(seed, n=60, img=600):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, img - 100, (n, 2))
+    wh = rng.integers(10, 120, (n, 2))
+    boxes = np.hstack([base, wh])
+    # Jittered copies, as the dual-model + Haar passes produce
+    dups = boxes[rng.integers(0, n, n // 2)] + rng.integers(-8, 9, (n // 2, 4))
+    dups[:, 2:] = np.maximum(dups[:, 2:], 1)
+    boxes = np.vstack([boxes, dups])
+    return [tuple(int(v) for v in b) for b in rng.permutation(boxes)], rng.random(len(boxes))
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('iou_thresh', [0.2, 0.35, 0.6])
+def test_nms_without_scores_matches_legacy_dedup(seed, iou_thresh):
+    boxes, _ = _random_boxes(seed)
+    kept, scores = dedup_boxes(boxes, iou_thresh=iou_thresh)
+    assert kept == _legacy_dedup(boxes, iou_thresh)
+    assert scores == [1.0] * len(kept)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_nms_with_scores_matches_legacy_on_score_order(seed):
+    boxes, scores = _random_boxes(seed)
+    by_score = [boxes[i] for i in np.argsort(-scores, kind='stable')]
+    assert [boxes[i] for i in nms(boxes, scores)] == _legacy_dedup(by_score)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_iou_matrix_matches_pairwise_iou(seed):
+    boxes, _ = _random_boxes(seed, n=20)
+    expected = [[_legacy_iou(a, b) for b in boxes] for a in boxes]
+    assert np.allclose(iou_matrix(boxes), expected)
+
+
+def test_wbf_merges_a_cluster_towards_the_confident_box():
+    fused, scores = weighted_box_fusion([(0, 0, 100, 100), (10, 10, 100, 100), (500, 500, 50, 50)],
+                                        [0.9, 0.1, 0.5])
+    assert len(fused) == 2 and scores == [0.9, 0.5]
+    x, y, w, h = fused[0]
+    assert 0 <= x <= 2 and 0 <= y <= 2 and w == 100 and h == 100
+    assert fused[1] == (500, 500, 50, 50)
+
+
+def test_empty_and_unknown_method():
+    assert dedup_boxes([]) == ([], [])
+    with pytest.raises(ValueError):
+        dedup_boxes([(0, 0, 1, 1)], method='soft')
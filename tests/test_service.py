@@ -0,0 +1,46 @@
+"""Job service: the scheduler keeps serving after a worker process dies."""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import face_blur_service  # noqa: E402
+from face_blur_service import MAX_ATTEMPTS, JobQueue, Scheduler  # noqa: E402
+
+
+def _fake_job(input_path, output_path, settings):
+    # Runs in a pool process: 'crash' inputs kill it as an OOM kill would
+    if 'crash' in os.path.basename(input_path):
+        os._exit(1)
+    return True, None
+
+
+def _wait_for(queue, job_id, statuses, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id)['status']}")
+
+
+def test_dead_worker_process_does_not_stop_the_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(face_blur_service, '_run_job', _fake_job)
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    crash = queue.add(str(tmp_path / 'crash.jpg'), str(tmp_path / 'crash_out.jpg'), priority=1)
+    fine = queue.add(str(tmp_path / 'fine.jpg'), str(tmp_path / 'fine_out.jpg'))
+    scheduler = Scheduler(queue, workers=1)
+    scheduler.start()
+    try:
+        assert _wait_for(queue, fine, ('done', 'failed'))['status'] == 'done'
+        job = _wait_for(queue, crash, ('done', 'failed'))
+        # Retried like an interrupted job, then given up on
+        assert job['status'] == 'failed' and job['attempts'] == MAX_ATTEMPTS
+        assert scheduler.running == {'image': 0, 'video': 0}
+        assert scheduler._thread.is_alive()
+    finally:
+        scheduler.stop()
+        queue.close()
@@ -0,0 +1,55 @@
+"""Keyframe tracker: flow runs on the detection-scale view, boxes stay in frame pixels."""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_frame import FrameViews  # noqa: E402
+from face_blur_stats import NULL_STATS  # noqa: E402
+from face_blur_tracking import KeyframeTracker  # noqa: E402
+
+SIDE = 120
+PATCH = np.random.default_rng(3).integers(0, 256, (SIDE // 8, SIDE // 8), dtype=np.uint8)
+PATCH = cv2.resize(PATCH, (SIDE, SIDE), interpolation=cv2.INTER_NEAREST)
+
+
+class ScaledDetector:
+    """Detector stand-in at half scale; only the first frame is 'detected'."""
+
+    stats = NULL_STATS
+
+    def __init__(self, box):
+        self.box = box
+        self.calls = 0
+        self._views = FrameViews()
+
+    def prepare(self, image):
+        return self._views.set_frame(image, 0.5)
+
+    def detect_boxes(self, image, views=None):
+        self.calls += 1
+        return [self.box]
+
+
+def _frame(x, y):
+    img = np.full((720, 1280, 3), 90, np.uint8)
+    img[y:y + SIDE, x:x + SIDE] = PATCH[..., None]
+    return img
+
+
+def test_tracks_on_small_gray_and_returns_full_size_boxes():
+    detector = ScaledDetector((400, 300, SIDE, SIDE))
+    tracker = KeyframeTracker(detector, interval=10, drift_grow=0.0)
+    tracker.detect_boxes(_frame(400, 300))
+    for step in range(1, 5):
+        x, y = 400 + 8 * step, 300 + 4 * step
+        (bx, by, bw, bh), = tracker.detect_boxes(_frame(x, y))
+        assert abs(bx - x) <= 3 and abs(by - y) <= 3
+        assert abs(bw - SIDE) <= 6 and abs(bh - SIDE) <= 6
+    assert detector.calls == 1 and tracker.tracked == 4
+    # The flow history is the half-scale view, not a full-resolution copy
+    assert tracker.prev_gray.shape == (360, 640)
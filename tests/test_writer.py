@@ -0,0 +1,38 @@
+"""Still output: streamed and in-memory encodes write the same file."""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_blur_writer import AsyncImageWriter, write_image  # noqa: E402
+
+
+@pytest.mark.parametrize('ext', ['.png', '.jpg', '.webp'])
+def test_streamed_write_matches_in_memory(tmp_path, ext):
+    img = np.random.default_rng(0).integers(0, 256, (90, 120, 3), dtype=np.uint8)
+    streamed, buffered = str(tmp_path / f'a{ext}'), str(tmp_path / f'b{ext}')
+    nbytes, _, write_s = write_image(streamed, img, jpeg_quality=92)
+    assert nbytes == os.path.getsize(streamed) and write_s == 0.0
+    assert write_image(buffered, img, in_memory=True, jpeg_quality=92)[0] == nbytes
+    with open(streamed, 'rb') as a, open(buffered, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_async_report_splits_write_time_only_in_memory(tmp_path):
+    img = np.zeros((8, 8, 3), np.uint8)
+    for in_memory in (False, True):
+        with AsyncImageWriter(in_memory=in_memory) as writer:
+            writer.submit(str(tmp_path / f'{in_memory}.png'), img).result()
+        report = writer.report()
+        assert report['bytes_written'] == os.path.getsize(tmp_path / f'{in_memory}.png')
+        assert ('write_ms' in report) == in_memory
+
+
+def test_failed_write_raises(tmp_path):
+    with pytest.raises(OSError):
+        write_image(str(tmp_path / 'missing' / 'a.png'), np.zeros((8, 8, 3), np.uint8))